@@ -1,10 +1,44 @@
 import streamlit as st
-import requests
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+import hashlib
+import math
+import os
 import time
-import re
+import uuid
+
+from dedup import collapse_rows
+from catalog import NICHE_KEYWORDS, REGION_CODES
+from checkpoints import ScanCheckpoints
+from corpus_index import CorpusIndex
+from keyword_frontier import KeywordFrontier
+from prewarm import Prewarmer
+from run_archive import RunArchive, diff_runs
+from scheduler import ScanScheduler
+from scanner import (
+    COLLAPSED_REGION_NAME,
+    UNKNOWN_COUNTRY_NAME,
+    ScanBudget,
+    batch_keywords,
+    calculate_days_old,
+    empty_pushdown,
+    calculate_virality_score,
+    measure_projection,
+    query_keywords,
+    region_overlap,
+    run_local_search_task,
+    run_search_task,
+    run_watchlist_task,
+    search_start_date,
+)
+from thumbnails import ThumbnailCache, thumbnail_url
+from title_clusters import cluster_titles
+from usage_log import UsageLog
+from watchlist import Watchlist, parse_channel_id
+from work_queue import WorkQueue
+from worker import new_worker_id, run_one_task
+from youtube_api import QUOTA_COST, YOUTUBE_SEARCH_URL, response_cache, stats_delta
 
 # ================== PAGE CONFIG ==================
 
@@ -71,182 +105,15 @@ st.markdown("""
 
 # ================== CONSTANTS ==================
 
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
-YOUTUBE_VIDEO_URL = "https://www.googleapis.com/youtube/v3/videos"
-YOUTUBE_CHANNEL_URL = "https://www.googleapis.com/youtube/v3/channels"
+# Max local corpus hits per keyword
+LOCAL_RESULTS_PER_KEYWORD = 50
 
-# Spanish-speaking regions
-REGION_CODES = {
-    "🇪🇸 España (Spain)": "ES",
-    "🇲🇽 México": "MX",
-    "🇦🇷 Argentina": "AR",
-    "🇨🇴 Colombia": "CO",
-    "🇨🇱 Chile": "CL",
-    "🇵🇪 Perú": "PE",
-    "🇻🇪 Venezuela": "VE",
-    "🇪🇨 Ecuador": "EC",
-    "🇬🇹 Guatemala": "GT",
-    "🇨🇺 Cuba": "CU",
-    "🇧🇴 Bolivia": "BO",
-    "🇩🇴 República Dominicana": "DO",
-    "🇭🇳 Honduras": "HN",
-    "🇵🇾 Paraguay": "PY",
-    "🇸🇻 El Salvador": "SV",
-    "🇳🇮 Nicaragua": "NI",
-    "🇨🇷 Costa Rica": "CR",
-    "🇵🇦 Panamá": "PA",
-    "🇺🇾 Uruguay": "UY",
-    "🇺🇸 USA (Hispanic)": "US",
-}
+# Results table pagination
+RESULTS_PAGE_SIZES = [25, 50, 100, 250]
+TEXT_FILTER_COLUMNS = ["Título", "Canal", "Tags", "Palabra Clave"]
 
-# ================== SPANISH MOTIVATION KEYWORDS ==================
-
-NICHE_KEYWORDS = {
-    "💪 Motivación General": [
-        "motivación español",
-        "motivación personal",
-        "frases motivacionales",
-        "motivación diaria",
-        "palabras de motivación",
-        "motivación para la vida",
-        "mensajes motivacionales",
-        "reflexiones motivacionales",
-        "motivación cortos",
-        "motivación shorts",
-    ],
-    "🏆 Éxito y Superación": [
-        "éxito personal",
-        "superación personal",
-        "cómo tener éxito",
-        "mentalidad de éxito",
-        "historias de éxito",
-        "claves del éxito",
-        "éxito en la vida",
-        "secretos del éxito",
-        "camino al éxito",
-        "mentalidad ganadora",
-    ],
-    "💰 Dinero y Riqueza": [
-        "motivación dinero",
-        "mentalidad millonaria",
-        "riqueza mentalidad",
-        "libertad financiera",
-        "éxito financiero",
-        "cómo ser rico",
-        "dinero y éxito",
-        "abundancia financiera",
-        "mentalidad de rico",
-        "educación financiera motivación",
-    ],
-    "🧠 Mentalidad y Mindset": [
-        "mentalidad positiva",
-        "cambiar mentalidad",
-        "mentalidad de crecimiento",
-        "psicología del éxito",
-        "mente millonaria",
-        "reprogramar la mente",
-        "mentalidad fuerte",
-        "poder de la mente",
-        "actitud mental positiva",
-        "mentalidad emprendedora",
-    ],
-    "📈 Emprendimiento": [
-        "motivación emprendedor",
-        "emprendimiento shorts",
-        "consejos emprendedores",
-        "éxito emprendedor",
-        "historias emprendedores",
-        "mentalidad emprendedora",
-        "cómo emprender",
-        "negocios motivación",
-        "emprender desde cero",
-        "ser tu propio jefe",
-    ],
-    "⏰ Disciplina y Hábitos": [
-        "disciplina personal",
-        "hábitos exitosos",
-        "rutina de éxito",
-        "autodisciplina",
-        "hábitos millonarios",
-        "constancia y disciplina",
-        "hábitos diarios éxito",
-        "despertar temprano motivación",
-        "productividad personal",
-        "gestión del tiempo",
-    ],
-    "❤️ Amor Propio y Autoestima": [
-        "amor propio",
-        "autoestima alta",
-        "quererse a uno mismo",
-        "confianza en ti mismo",
-        "valorarte a ti mismo",
-        "aceptación personal",
-        "empoderamiento personal",
-        "creer en ti mismo",
-        "fortaleza interior",
-        "paz interior",
-    ],
-    "🔥 Frases de Líderes": [
-        "frases de éxito",
-        "frases motivadoras famosos",
-        "citas inspiradoras",
-        "frases líderes mundiales",
-        "palabras de sabios",
-        "frases celebres motivación",
-        "consejos de millonarios",
-        "frases de emprendedores",
-        "sabiduría de vida",
-        "frases para reflexionar",
-    ],
-    "💼 Trabajo y Carrera": [
-        "motivación laboral",
-        "éxito profesional",
-        "crecer en el trabajo",
-        "desarrollo profesional",
-        "carrera exitosa",
-        "motivación para trabajar",
-        "liderazgo personal",
-        "ser mejor profesional",
-        "ascender en el trabajo",
-        "pasión por el trabajo",
-    ],
-    "🌅 Superación de Problemas": [
-        "superar obstáculos",
-        "salir adelante",
-        "nunca rendirse",
-        "superar momentos difíciles",
-        "resiliencia personal",
-        "levantarse después de caer",
-        "fortaleza mental",
-        "superar el fracaso",
-        "vencer el miedo",
-        "transformar dolor en fuerza",
-    ],
-    "🎯 Metas y Objetivos": [
-        "lograr tus metas",
-        "cumplir objetivos",
-        "sueños y metas",
-        "alcanzar tus sueños",
-        "propósito de vida",
-        "visualización de metas",
-        "metas claras",
-        "objetivos de vida",
-        "planificar el éxito",
-        "enfoque en metas",
-    ],
-    "🧘 Paz Mental y Bienestar": [
-        "paz mental",
-        "tranquilidad interior",
-        "bienestar emocional",
-        "equilibrio vida",
-        "calma interior",
-        "mente tranquila",
-        "serenidad personal",
-        "vivir en paz",
-        "soltar y avanzar",
-        "mindfulness español",
-    ],
-}
+# Max bars per categorical chart in the Análisis tab
+MAX_CHART_POINTS = 15
 
 # ================== API KEY MANAGEMENT ==================
 
@@ -266,155 +133,102 @@ def get_api_key() -> Optional[str]:
     
     return None
 
-# ================== CACHING DECORATORS ==================
-
-@st.cache_data(ttl=3600, show_spinner=False)
-def cached_search_shorts(keyword: str, start_date: str, region: str, api_key: str, max_results: int = 15, language: str = "es") -> Dict:
-    """Cached YouTube search for Spanish content."""
-    params = {
-        "part": "snippet",
-        "q": keyword,
-        "type": "video",
-        "order": "viewCount",
-        "publishedAfter": start_date,
-        "maxResults": max_results,
-        "videoDuration": "short",
-        "regionCode": region,
-        "relevanceLanguage": language,  # Prioritize Spanish content
-        "key": api_key,
-    }
+def get_server_api_key() -> Optional[str]:
+    """API key configured for the server itself (never a key typed in by a user)."""
     try:
-        response = requests.get(YOUTUBE_SEARCH_URL, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+        return st.secrets["YOUTUBE_API_KEY"]
+    except (KeyError, FileNotFoundError):
+        return os.environ.get("YOUTUBE_API_KEY")
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def cached_video_details(video_ids_tuple: Tuple[str, ...], api_key: str) -> Dict:
-    """Cached video details fetch."""
-    params = {
-        "part": "snippet,statistics,contentDetails",
-        "id": ",".join(video_ids_tuple),
-        "key": api_key,
-    }
-    try:
-        response = requests.get(YOUTUBE_VIDEO_URL, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+# ================== CACHING ==================
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def cached_channel_stats(channel_ids_tuple: Tuple[str, ...], api_key: str) -> Dict:
-    """Cached channel stats fetch."""
-    params = {
-        "part": "statistics,snippet",
-        "id": ",".join(channel_ids_tuple),
-        "key": api_key,
-    }
-    try:
-        response = requests.get(YOUTUBE_CHANNEL_URL, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+@st.cache_resource(show_spinner=False)
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache shared by all sessions."""
+    return ThumbnailCache()
 
-# ================== HELPER FUNCTIONS ==================
+@st.cache_resource(show_spinner=False)
+def get_work_queue() -> WorkQueue:
+    """Shared sweep work queue (path set by SWEEP_QUEUE_DB)."""
+    return WorkQueue()
 
-def parse_duration(iso_duration: str) -> str:
-    """Convert ISO 8601 duration to MM:SS format."""
-    if not iso_duration or not iso_duration.startswith("PT"):
-        return "00:00"
-    
-    duration = iso_duration[2:]
-    minutes = 0
-    seconds = 0
-    
-    if "M" in duration:
-        match = re.match(r'(\d+)M', duration)
-        if match:
-            minutes = int(match.group(1))
-        duration = re.sub(r'\d+M', '', duration)
-    
-    if "S" in duration:
-        match = re.match(r'(\d+)S', duration)
-        if match:
-            seconds = int(match.group(1))
-    
-    return f"{minutes:02d}:{seconds:02d}"
+@st.cache_resource(show_spinner=False)
+def get_watchlist() -> Watchlist:
+    """Shared channel watchlist."""
+    return Watchlist()
 
-def parse_duration_seconds(iso_duration: str) -> int:
-    """Convert ISO 8601 duration to total seconds."""
-    if not iso_duration or not iso_duration.startswith("PT"):
-        return 0
-    
-    duration = iso_duration[2:]
-    minutes = 0
-    seconds = 0
-    
-    if "M" in duration:
-        match = re.match(r'(\d+)M', duration)
-        if match:
-            minutes = int(match.group(1))
-        duration = re.sub(r'\d+M', '', duration)
-    
-    if "S" in duration:
-        match = re.match(r'(\d+)S', duration)
-        if match:
-            seconds = int(match.group(1))
-    
-    return minutes * 60 + seconds
+@st.cache_resource(show_spinner=False)
+def get_checkpoints() -> ScanCheckpoints:
+    """Shared store of scan checkpoints, for resuming scans by ID."""
+    return ScanCheckpoints()
 
-def calculate_engagement_rate(views: int, likes: int, comments: int) -> float:
-    """Calculate engagement rate as percentage."""
-    if views == 0:
-        return 0.0
-    engagement = ((likes or 0) + (comments or 0)) / views * 100
-    return round(engagement, 2)
+@st.cache_resource(show_spinner=False)
+def get_corpus_index() -> CorpusIndex:
+    """Shared full-text index of every fetched video."""
+    return CorpusIndex()
 
-def calculate_virality_score(views: int, subs: int, days_old: int) -> float:
-    """Calculate virality score (0-100)."""
-    if subs == 0 or days_old == 0:
-        return 0.0
-    
-    views_per_sub = views / max(subs, 1)
-    views_per_day = views / max(days_old, 1)
-    
-    sub_ratio_score = min(views_per_sub * 10, 50)
-    velocity_score = min(views_per_day / 1000 * 50, 50)
-    
-    return round(sub_ratio_score + velocity_score, 1)
+@st.cache_resource(show_spinner=False)
+def get_usage_log() -> UsageLog:
+    """Shared log of searches, used to pick what to pre-warm."""
+    return UsageLog()
 
-def calculate_days_old(published_at: str) -> int:
-    """Calculate days since video was published."""
-    try:
-        pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-        now = datetime.now(pub_date.tzinfo)
-        return (now - pub_date).days
-    except:
-        return 0
 
-def generate_idea_angle_spanish(title: str, category: str, views: int, engagement: float) -> str:
-    """Generate actionable idea angle in Spanish context."""
-    hooks = []
-    
-    if views > 1000000:
-        hooks.append("formato VIRAL")
-    elif views > 100000:
-        hooks.append("formato de alto rendimiento")
-    
-    if engagement > 5:
-        hooks.append("gancho de alto engagement")
-    
-    hook_text = ", ".join(hooks) if hooks else "formato trending"
-    
-    return (
-        f"Recrea este {hook_text} para '{category}'. "
-        f"Estudia: '{title[:50]}...' - Adapta la estructura del gancho, "
-        f"cambia los ejemplos, mantén un ritmo similar. "
-        f"Usa voz en español neutro o específico para tu audiencia."
-    )
+@st.cache_resource(show_spinner=False)
+def get_keyword_frontier() -> KeywordFrontier:
+    """Shared keyword frontier and extended catalog."""
+    return KeywordFrontier()
+
+
+@st.cache_resource(show_spinner=False)
+def get_scan_scheduler() -> ScanScheduler:
+    """Process-wide admission control shared by every session's scans."""
+    return ScanScheduler()
+
+
+@st.cache_resource(show_spinner=False)
+def get_run_archive() -> RunArchive:
+    """Shared archive of completed scans."""
+    return RunArchive()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_run_diff(old_id: str, new_id: str) -> Optional[Dict]:
+    """
+    `diff_runs` of two archived runs, or None when one is no longer archived.
+    Archived runs never change, so the run IDs are the whole cache key.
+    """
+    run_archive = get_run_archive()
+    old_run, new_run = run_archive.load(old_id), run_archive.load(new_id)
+    if old_run is None or new_run is None:
+        return None
+    return diff_runs(old_run["results_df"], new_run["results_df"])
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_title_clusters(results_fingerprint: str, corpus_fingerprint: Optional[str], _results_df: pd.DataFrame) -> Tuple[List[Dict], int]:
+    """
+    Hook clusters of the current results' titles (plus the local corpus when
+    `corpus_fingerprint` is given); recomputed only when a fingerprint changes.
+    Returns the clusters and the number of titles clustered.
+    """
+    titles = _results_df["Título"].tolist()
+    scores = _results_df["Score Viralidad"].tolist()
+    if corpus_fingerprint is not None:
+        in_results = set(_results_df["Video ID"])
+        for video_id, title, views, subs, published_at in get_corpus_index().title_stats():
+            if video_id not in in_results and title:
+                titles.append(title)
+                scores.append(calculate_virality_score(views or 0, subs or 0, max(calculate_days_old(published_at), 1)))
+    clusters, _ = cluster_titles(titles, scores)
+    return clusters, len(titles)
+
+@st.cache_resource(show_spinner=False)
+def get_prewarmer(api_key: str) -> Prewarmer:
+    """Process-wide cache pre-warmer, started once per server."""
+    # Search pages only: the app's scans hit those in the shared memory cache
+    prewarmer = Prewarmer(api_key, get_usage_log())
+    prewarmer.start_background()
+    return prewarmer
+
+# ================== HELPER FUNCTIONS ==================
 
 def format_number(num: int) -> str:
     """Format large numbers for display."""
@@ -424,18 +238,6 @@ def format_number(num: int) -> str:
         return f"{num/1_000:.1f}K"
     return str(num)
 
-def get_virality_label(score: float) -> str:
-    """Get virality tier label in Spanish."""
-    if score >= 80:
-        return "🔥 VIRAL"
-    elif score >= 60:
-        return "⚡ Muy Caliente"
-    elif score >= 40:
-        return "📈 Creciendo"
-    elif score >= 20:
-        return "✅ Bueno"
-    return "📊 Normal"
-
 def convert_df_to_csv(df: pd.DataFrame) -> bytes:
     """Convert DataFrame to CSV bytes."""
     return df.to_csv(index=False).encode("utf-8")
@@ -448,25 +250,174 @@ def convert_df_to_excel(df: pd.DataFrame) -> bytes:
         df.to_excel(writer, index=False, sheet_name='Shorts Ideas')
     return output.getvalue()
 
-def is_likely_spanish(title: str, description: str) -> bool:
-    """Check if content is likely in Spanish."""
-    spanish_indicators = [
-        # Common Spanish words
-        'el', 'la', 'los', 'las', 'de', 'del', 'en', 'es', 'por', 'para',
-        'que', 'con', 'como', 'cómo', 'más', 'pero', 'si', 'tu', 'tú',
-        'vida', 'éxito', 'motivación', 'ser', 'estar', 'hacer', 'poder',
-        'tiempo', 'día', 'mejor', 'nunca', 'siempre', 'todo', 'nada',
-        # Motivation-specific
-        'superación', 'mentalidad', 'disciplina', 'hábitos', 'metas',
-        'sueños', 'triunfo', 'fracaso', 'esfuerzo', 'perseverancia',
-        # Common endings
-        'ción', 'mente', 'ando', 'iendo', 'ado', 'ido',
-    ]
-    
-    text = (title + " " + description).lower()
-    matches = sum(1 for word in spanish_indicators if word in text)
-    
-    return matches >= 3
+@st.cache_data(show_spinner=False, max_entries=6)
+def get_export_bytes(results_version: str, export_format: str, _results_df: pd.DataFrame) -> bytes:
+    """CSV, Excel or JSON export of the current results, built once per result set rather than per rerun."""
+    if export_format == "xlsx":
+        return convert_df_to_excel(_results_df)
+    if export_format == "json":
+        return _results_df.to_json(orient="records", indent=2, force_ascii=False).encode("utf-8")
+    return convert_df_to_csv(_results_df)
+
+def finish_scan(task_results: List[Dict], errors: List[str], summary: Dict, collapse: bool, keep: str) -> bool:
+    """Merge, score-sort and store a (possibly partial) scan's rows in the session."""
+    all_rows = []
+    merged_video_ids = set()
+    detail_counters = {"detail_videos": 0, "detail_payload_bytes": 0, "detail_record_bytes": 0, "search_videos": 0}
+    pushdown = empty_pushdown()
+    harvest = {}
+    
+    # Merge rows from all tasks, keeping the first row per video
+    for task_result in task_results:
+        for key in detail_counters:
+            detail_counters[key] += task_result.get(key, 0)
+        for key, count in task_result.get("harvest", {}).items():
+            harvest[key] = harvest.get(key, 0) + count
+        for key, saved in task_result.get("pushdown", {}).items():
+            pushdown[key] += saved
+        for row in task_result["rows"]:
+            if row["Video ID"] not in merged_video_ids:
+                merged_video_ids.add(row["Video ID"])
+                all_rows.append(row)
+    
+    # Grow the keyword frontier: judge probed candidates, mine tags and titles of every result
+    frontier_info = summary.get("frontier")
+    if frontier_info:
+        summary = {
+            **summary,
+            "frontier": get_keyword_frontier().record_sweep(
+                frontier_info["category"], task_results, frontier_info["probes"],
+                NICHE_KEYWORDS.get(frontier_info["category"], [])
+            ),
+        }
+    
+    # Show errors
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} advertencias"):
+            for err in errors:
+                st.warning(err)
+    
+    if not all_rows:
+        st.session_state.search_completed = False
+        if summary.get("stopped"):
+            st.warning(stop_note(summary["stopped"]))
+        if summary.get("resumable_scan"):
+            st.info(f"♻️ Búsqueda `{summary['resumable_scan']}` guardada: puedes reanudarla en '♻️ Reanudar Búsqueda'.")
+        st.warning(
+            "No se encontraron videos con tus filtros. Intenta:\n"
+            "- Aumentar días de búsqueda\n"
+            "- Reducir vistas mínimas\n"
+            "- Aumentar suscriptores máximos\n"
+            "- Reducir engagement/viralidad mínimos\n"
+            "- Desactivar filtro 'Solo español'"
+        )
+        return False
+    
+    duplicates_collapsed = 0
+    if collapse:
+        collapsed_rows = collapse_rows(all_rows, keep)
+        duplicates_collapsed = len(all_rows) - len(collapsed_rows)
+        all_rows = collapsed_rows
+    results_df = pd.DataFrame(all_rows)
+    results_df = results_df.sort_values(
+        by=["Score Viralidad", "Vistas"],
+        ascending=[False, False]
+    ).reset_index(drop=True)
+    
+    st.session_state.results_df = results_df
+    st.session_state.results_version = uuid.uuid4().hex
+    st.session_state.search_completed = True
+    st.session_state.scan_summary = {
+        **summary,
+        **detail_counters,
+        "pushdown": pushdown,
+        "harvest": harvest,
+        "stale_seconds": max((t.get("stale_seconds", 0) for t in task_results), default=0),
+        "region_overlap": region_overlap(task_results),
+        "other_countries": sum(t.get("other_countries", 0) for t in task_results),
+        "duplicates_collapsed": duplicates_collapsed,
+    }
+    st.session_state.results_page = 1
+    
+    # Archive the run so it can be reloaded or compared later without API calls
+    if summary.get("params"):
+        scan_summary = st.session_state.scan_summary
+        try:
+            scan_summary["run_id"] = get_run_archive().save(
+                results_df, summary["params"], {k: v for k, v in scan_summary.items() if k != "params"}
+            )
+        except ImportError:
+            st.info("Instala pyarrow para archivar las búsquedas")
+    
+    # Quota per unique video found, per query mode, to compare OR-batched and one-keyword searches.
+    # Only this scan's own searches count (not other sessions, cache refreshes or prewarming), and
+    # only scans that sent requests: one answered from the cache says nothing about batching.
+    quota_units = summary.get("scan_quota_units")
+    batching = summary.get("query_batching") or {}
+    if quota_units and detail_counters["search_videos"] and batching.get("queries"):
+        mode = "batched" if batching["keywords"] > batching["queries"] else "single"
+        st.session_state.setdefault("quota_per_video", {})[mode] = {
+            "value": quota_units / detail_counters["search_videos"],
+            "category": (frontier_info or {}).get("category", ""),
+            "at": time.time(),
+            "results_version": st.session_state.results_version,
+        }
+    return True
+
+def quota_note(measurement: Dict) -> str:
+    """Quota per unique video, naming the scan it was measured in when it is not the one shown."""
+    note = f"{measurement['value']:.1f}"
+    if measurement["results_version"] != st.session_state.get("results_version"):
+        at = time.strftime("%H:%M", time.localtime(measurement["at"]))
+        note += f" [otra búsqueda: {measurement['category'] or 'sin categoría'}, {at}]"
+    return note
+
+def stop_note(stopped: Dict) -> str:
+    """What a stopped scan left out, for the results summary."""
+    reason = "⏱️ Se alcanzó el tiempo máximo" if stopped["reason"] == "deadline" else "⏹️ Búsqueda cancelada"
+    skipped = stopped["searches_total"] - stopped["searches_done"]
+    note = f"{reason}: resultados parciales. Se omitieron {skipped} de {stopped['searches_total']} búsquedas"
+    if stopped.get("watchlist_skipped"):
+        note += f" y {stopped['watchlist_skipped']} canales de la watchlist"
+    return note + "."
+
+def with_thumbnail_previews(df: pd.DataFrame) -> pd.DataFrame:
+    """Swap full-size thumbnail URLs for small cached previews on every row of the page."""
+    if "Thumbnail" not in df.columns or df.empty:
+        return df
+    
+    df = df.copy()
+    video_ids = df["Video ID"].tolist()
+    previews = get_thumbnail_cache().preview_uris(video_ids)
+    # Only thumbnails that could not be fetched fall back to YouTube's lightweight variant
+    df["Thumbnail"] = [previews.get(v) or thumbnail_url(v, "medium") for v in video_ids]
+    return df
+
+def query_results(df: pd.DataFrame, text_filter: str, sort_by: str, ascending: bool = False) -> pd.DataFrame:
+    """Filter results by free text and sort them server-side."""
+    if text_filter:
+        mask = pd.Series(False, index=df.index)
+        for col in TEXT_FILTER_COLUMNS:
+            if col in df.columns:
+                mask |= df[col].astype(str).str.contains(text_filter, case=False, regex=False)
+        df = df[mask]
+    if sort_by in df.columns:
+        df = df.sort_values(by=sort_by, ascending=ascending, kind="stable")
+    return df
+
+def paginate_results(df: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    """Slice out a single page of results (1-based page number)."""
+    start = max(page - 1, 0) * page_size
+    return df.iloc[start:start + page_size]
+
+def downsample_for_chart(counts: pd.Series, max_points: int = MAX_CHART_POINTS) -> pd.Series:
+    """Keep the largest categories of a count series and fold the rest into 'Otros'."""
+    if len(counts) <= max_points:
+        return counts
+    counts = counts.sort_values(ascending=False)
+    top = counts.iloc[:max_points - 1].copy()
+    top["Otros"] = counts.iloc[max_points - 1:].sum()
+    return top
 
 # ================== SIDEBAR ==================
 
@@ -505,7 +456,8 @@ with st.sidebar:
         min_value=1,
         max_value=30,
         value=7,
-        help="Buscar videos publicados en este período"
+        help="Buscar videos publicados en este período. El período empieza a las 00:00 UTC del día "
+             "de inicio (para reutilizar la caché), así que incluye hasta ~24 h más que los días indicados"
     )
     
     region = st.selectbox(
@@ -517,9 +469,25 @@ with st.sidebar:
     
     results_per_keyword = st.select_slider(
         "Resultados por palabra clave:",
-        options=[5, 10, 15, 20, 25],
+        options=[5, 10, 15, 20, 25, 50, 100, 200],
         value=10,
-        help="Más resultados = más quota de API usada"
+        help="Más resultados = más quota de API usada (100 unidades por cada página de 50)"
+    )
+    
+    keyword_batch_size = st.select_slider(
+        "Palabras clave por búsqueda:",
+        options=[1, 2, 3, 4, 5],
+        value=1,
+        help="Combina varias palabras clave en una sola búsqueda con el operador OR (|): "
+             "menos quota por video; cada video se atribuye a su palabra clave por título, tags y descripción"
+    )
+    
+    max_scan_seconds = st.select_slider(
+        "Tiempo máximo de búsqueda:",
+        options=[0, 30, 60, 120, 300, 600],
+        value=0,
+        format_func=lambda s: "Sin límite" if s == 0 else (f"{s} s" if s < 60 else f"{s // 60} min"),
+        help="Al llegar al límite no se lanzan más búsquedas y se muestran los resultados parciales"
     )
     
     st.markdown("---")
@@ -587,6 +555,58 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # Re-upload Filter
+    st.markdown("### 🧬 Re-subidas")
+    
+    collapse_duplicates = st.checkbox(
+        "Agrupar casi duplicados",
+        value=True,
+        help="Agrupa el mismo clip re-subido en varios canales (título, tags y descripción similares)"
+    )
+    
+    duplicate_keep = st.radio(
+        "Representante del grupo:",
+        options=["best", "earliest"],
+        format_func=lambda k: "🏆 Mejor rendimiento" if k == "best" else "🕰️ Más antiguo",
+        horizontal=True,
+        disabled=not collapse_duplicates
+    )
+    
+    st.markdown("---")
+    
+    # In-memory API cache footprint
+    cache_usage = response_cache.usage()
+    st.markdown("### 🗄️ Caché en memoria")
+    st.progress(min(cache_usage["stored_bytes"] / max(cache_usage["max_bytes"], 1), 1.0))
+    st.caption(
+        f"{cache_usage['entries']} respuestas · {cache_usage['stored_bytes'] / 1024 ** 2:.1f} de "
+        f"{cache_usage['max_bytes'] / 1024 ** 2:.0f} MB comprimidas "
+        f"({cache_usage['raw_bytes'] / max(cache_usage['stored_bytes'], 1):.1f}x) · "
+        f"{cache_usage['evictions']} expulsadas por espacio"
+        + (f" · sirve datos caducados hasta {response_cache.max_stale / 3600:g} h mientras se actualizan" if response_cache.max_stale else "")
+    )
+    
+    # Scans and API requests running across all sessions
+    scheduler_usage = get_scan_scheduler().usage()
+    st.caption(
+        f"🚦 {scheduler_usage['running']}/{scheduler_usage['max_running']} búsquedas en curso · "
+        f"{scheduler_usage['queued']} en cola · {scheduler_usage['requests']['inflight']}/"
+        f"{scheduler_usage['requests']['max_inflight']} llamadas a la API en vuelo"
+    )
+    
+    st.markdown("---")
+    
+    # Cache pre-warming status
+    server_api_key = get_server_api_key()
+    if server_api_key and os.environ.get("PREWARM_ENABLED") == "1":
+        prewarm_status = get_prewarmer(server_api_key).status()
+        st.markdown("### 🔥 Pre-calentamiento")
+        st.caption(
+            f"Horas pico (UTC): {', '.join(f'{h:02d}:00' for h in prewarm_status['peak_hours']) or 'sin datos aún'} · "
+            f"Quota restante hoy: {prewarm_status['quota_left']}/{prewarm_status['budget']}"
+        )
+        st.markdown("---")
+    
     # Info Section
     st.markdown("### 💡 Tips Pro")
     st.info(
@@ -671,8 +691,234 @@ with tab1:
                 options=list(REGION_CODES.keys()),
                 default=["🇪🇸 España (Spain)", "🇲🇽 México", "🇦🇷 Argentina"]
             )
+            region_mode = st.radio(
+                "Modo multi-región:",
+                options=["fanout", "collapsed"],
+                format_func={
+                    "fanout": "🔁 Una búsqueda por país",
+                    "collapsed": "🌐 Una búsqueda para todos",
+                }.get,
+                horizontal=True,
+                help="'Una búsqueda para todos' busca cada palabra clave una sola vez sin región "
+                     "y asigna cada video al país de su canal: una fracción de la quota. Los videos de "
+                     "canales de otros países se descartan"
+            )
         else:
             selected_regions = [region]
+            region_mode = "fanout"
+    
+    # Local corpus option
+    with st.expander("💾 Corpus Local (Opcional)"):
+        search_source = st.radio(
+            "Fuente de búsqueda:",
+            options=["live", "both", "local"],
+            format_func={
+                "live": "🌐 Solo API en vivo",
+                "both": "🔀 Corpus local + API en vivo",
+                "local": "💾 Solo corpus local (0 quota)",
+            }.get,
+            help="El corpus local indexa títulos, tags y descripciones de todos los videos ya vistos"
+        )
+        st.caption(f"📚 {len(get_corpus_index()):,} videos indexados localmente")
+    
+    # Distributed execution option
+    with st.expander("⚙️ Ejecución Distribuida (Opcional)"):
+        use_work_queue = st.checkbox(
+            "Usar cola de trabajo compartida",
+            value=False,
+            help="Guarda cada palabra clave × país como tarea durable; los procesos `worker.py` "
+                 "de esta misma máquina que apunten a la cola las procesan en paralelo junto con esta sesión"
+        )
+        if use_work_queue:
+            st.caption(f"Cola: `{get_work_queue().path}` · Inicia más workers con `python worker.py`")
+    
+    # Time-window harvest option
+    with st.expander("🪓 Cosecha por Ventanas de Tiempo (Opcional)"):
+        harvest_mode = st.checkbox(
+            "Superar el límite de resultados por búsqueda",
+            value=False,
+            help="La API solo pagina ~500 resultados por búsqueda. Divide el período en ventanas "
+                 "más cortas (en paralelo) mientras se saturen, para enumerar muchos más Shorts"
+        )
+        harvest_budget = st.select_slider(
+            "Búsquedas máximas por palabra clave:",
+            options=[5, 10, 20, 50, 100],
+            value=20,
+            disabled=not harvest_mode,
+            format_func=lambda n: f"{n} ({n * QUOTA_COST[YOUTUBE_SEARCH_URL]:,} unidades)"
+        )
+        harvest_searches = harvest_budget if harvest_mode else 0
+    
+    # Keyword frontier / extended catalog
+    frontier = get_keyword_frontier()
+    extended_catalog = frontier.promoted(category)
+    with st.expander(f"🌱 Catálogo Extendido ({len(extended_catalog)})"):
+        st.caption(
+            "Las tags y frases de los títulos de cada resultado se convierten en palabras clave candidatas, "
+            "puntuadas por la viralidad de sus videos. Una parte de cada búsqueda sondea las mejores; "
+            "las que encuentran suficientes videos nuevos pasan al catálogo extendido de la categoría."
+        )
+        use_extended_catalog = st.checkbox("Incluir palabras clave promovidas", value=True)
+        probe_share = st.select_slider(
+            "Búsquedas dedicadas a sondear candidatas:",
+            options=[0.0, 0.1, 0.2, 0.3],
+            value=0.1,
+            format_func=lambda share: "Ninguna" if share == 0 else f"{share:.0%}"
+        )
+        for kw, e in sorted(extended_catalog.items(), key=lambda item: -item[1]["rows"]):
+            col_keyword, col_demote = st.columns([5, 1])
+            with col_keyword:
+                st.markdown(f"**{kw}** · {e['rows']} videos nuevos · score medio {e['avg_score']}")
+            with col_demote:
+                if st.button("🗑️ Quitar", key=f"demote_{kw}", help="La saca del catálogo extendido y no se volverá a sondear pronto"):
+                    frontier.demote(category, kw)
+                    st.rerun()
+        candidates = frontier.top_candidates(category, 10)
+        if candidates:
+            st.markdown("**Próximas candidatas:**")
+            st.caption(" · ".join(f"{c['keyword']} ({c['score']:.0f}, {c['videos']} videos)" for c in candidates))
+    
+    # Channel watchlist
+    watchlist = get_watchlist()
+    with st.expander(f"📌 Watchlist de Canales ({len(watchlist)})"):
+        st.caption(
+            "Los canales vigilados se consultan por su playlist de subidas (~1 unidad de quota "
+            "en vez de 100 por búsqueda). Los canales más rápidos se consultan más seguido. "
+            "No hay consultas en segundo plano: los canales pendientes se consultan al lanzar una búsqueda."
+        )
+        
+        new_channels = st.text_area(
+            "Agregar canales (ID o URL, uno por línea):",
+            placeholder="https://youtube.com/channel/UC...",
+            height=80
+        )
+        if st.button("➕ Agregar a la watchlist") and new_channels:
+            added = sum(
+                watchlist.add(channel_id)
+                for channel_id in filter(None, map(parse_channel_id, new_channels.split("\n")))
+            )
+            st.success(f"✅ {added} canales agregados")
+        
+        if st.session_state.get("search_completed") and not st.session_state.results_df.empty:
+            result_channels = (
+                st.session_state.results_df.drop_duplicates("URL del Canal")
+                .set_index("URL del Canal")["Canal"].to_dict()
+            )
+            picked = st.multiselect(
+                "Agregar canales de los resultados:",
+                options=list(result_channels.keys()),
+                format_func=lambda url: result_channels[url]
+            )
+            if st.button("➕ Agregar seleccionados") and picked:
+                added = sum(watchlist.add(parse_channel_id(url), result_channels[url]) for url in picked)
+                st.success(f"✅ {added} canales agregados")
+        
+        if len(watchlist):
+            now = time.time()
+            for c in watchlist.channels():
+                col_channel, col_remove = st.columns([5, 1])
+                with col_channel:
+                    next_poll = "ahora" if c["next_poll"] <= now else f"en {(c['next_poll'] - now) / 3600:.1f} h"
+                    st.markdown(
+                        f"[{c['title']}](https://youtube.com/channel/{c['id']}) · "
+                        f"{c['velocity']:,.0f} vistas/día (mejor reciente) · próxima consulta {next_poll}"
+                    )
+                with col_remove:
+                    if st.button("🗑️ Quitar", key=f"unwatch_{c['id']}"):
+                        watchlist.remove(c["id"])
+                        st.rerun()
+        
+        include_watchlist = st.checkbox(
+            "Incluir canales pendientes de la watchlist en la búsqueda",
+            value=len(watchlist) > 0
+        )
+        watchlist_only = st.checkbox(
+            "Solo watchlist (sin búsqueda por palabras clave)",
+            value=False
+        )
+        force_watchlist = st.checkbox(
+            "Consultar todos los canales (ignorar calendario)",
+            value=False
+        )
+    
+    # Resume an interrupted scan from its checkpoint
+    unfinished_scans = get_checkpoints().unfinished()
+    with st.expander(f"♻️ Reanudar Búsqueda ({len(unfinished_scans)})"):
+        st.caption(
+            "Cada búsqueda guarda un punto de control tras cada tarea completada. Al reanudarla "
+            "solo se repiten las palabras clave × país que faltaron (con sus filtros originales)."
+        )
+        resume_id = st.selectbox(
+            "Búsqueda a reanudar:",
+            options=[scan["id"] for scan in unfinished_scans],
+            format_func=lambda scan_id: next(
+                f"{scan['id']} · {scan['category']} · {scan['done']}/{scan['total']} tareas · "
+                f"{datetime.fromtimestamp(scan['updated_at']).strftime('%d/%m %H:%M')}"
+                for scan in unfinished_scans if scan["id"] == scan_id
+            ),
+            index=None,
+            placeholder="Sin búsquedas pendientes" if not unfinished_scans else "Elige una búsqueda"
+        )
+        resume_btn = st.button("♻️ Reanudar", disabled=not (api_key and resume_id))
+    
+    # Archived runs: reload one without API calls, or compare two
+    run_archive = get_run_archive()
+    archived_runs = run_archive.runs()
+    run_labels = {
+        run["id"]: (
+            f"{run['id']} · {run['category']} · {run['rows']} videos · "
+            f"{datetime.fromtimestamp(run['created_at']).strftime('%d/%m %H:%M')}"
+            + (" · ⚠️ parcial" if run["partial"] else "")
+        )
+        for run in archived_runs
+    }
+    with st.expander(f"🗂️ Historial de Búsquedas ({len(archived_runs)})"):
+        st.caption(
+            "Cada búsqueda completada se archiva comprimida (Parquet) con sus parámetros. "
+            "Cargarla o compararla no usa quota. Las marcadas ⚠️ parcial se cancelaron o "
+            "alcanzaron el tiempo máximo antes de terminar."
+        )
+        load_id = st.selectbox(
+            "Búsqueda a cargar:",
+            options=list(run_labels),
+            format_func=run_labels.get,
+            index=None,
+            placeholder="Sin búsquedas archivadas" if not archived_runs else "Elige una búsqueda"
+        )
+        load_btn = st.button("📂 Cargar", disabled=not load_id)
+        
+        st.markdown("**🔀 Comparar dos búsquedas**")
+        col_old, col_new = st.columns(2)
+        with col_old:
+            diff_old_id = st.selectbox("Antes:", options=list(run_labels), format_func=run_labels.get, index=None, key="diff_old")
+        with col_new:
+            diff_new_id = st.selectbox("Después:", options=list(run_labels), format_func=run_labels.get, index=None, key="diff_new")
+        
+        if diff_old_id and diff_new_id and diff_old_id != diff_new_id:
+            run_diff = get_run_diff(diff_old_id, diff_new_id)
+            if run_diff is None:
+                st.error("❌ Una de las búsquedas ya no está en el archivo")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Nuevos", len(run_diff["entered"]))
+                col2.metric("Desaparecidos", len(run_diff["dropped"]))
+                col3.metric("Score cambiado", len(run_diff["changed"]))
+                col4.metric("Sin cambios", run_diff["unchanged"])
+                partial_runs = [run["id"] for run in archived_runs if run["partial"] and run["id"] in (diff_old_id, diff_new_id)]
+                if partial_runs:
+                    st.caption(
+                        f"⚠️ {' y '.join(partial_runs)} {'son parciales' if len(partial_runs) > 1 else 'es parcial'}: "
+                        "parte de los 'Nuevos' o 'Desaparecidos' pueden ser videos que no se llegaron a buscar."
+                    )
+                
+                diff_columns = ["Título", "Canal", "Score Viralidad", "Vistas", "URL del Video"]
+                tab_entered, tab_dropped, tab_changed = st.tabs(["🆕 Nuevos", "📉 Desaparecidos", "↕️ Cambios de score"])
+                with tab_entered:
+                    st.dataframe(run_diff["entered"][diff_columns], hide_index=True)
+                with tab_dropped:
+                    st.dataframe(run_diff["dropped"][diff_columns], hide_index=True)
+                with tab_changed:
+                    st.dataframe(run_diff["changed"], hide_index=True)
     
     # Search Button
     st.markdown("---")
@@ -688,290 +934,609 @@ with tab1:
 
     # ================== SEARCH EXECUTION ==================
     
-    if search_btn:
+    if search_btn or resume_btn:
+        checkpoint = get_checkpoints().load(resume_id) if resume_btn else None
         if not api_key:
             st.error("❌ Por favor configura tu YouTube API key en la barra lateral")
+        elif resume_btn and checkpoint is None:
+            st.error(f"❌ No se encontró la búsqueda {resume_id}")
         else:
-            # Prepare keywords
-            keywords = NICHE_KEYWORDS.get(category, []).copy()
-            if custom_keywords:
-                custom_list = [kw.strip() for kw in custom_keywords.split('\n') if kw.strip()]
-                keywords.extend(custom_list)
-            
-            # Calculate date range
-            start_date = (datetime.utcnow() - timedelta(days=int(days))).isoformat("T") + "Z"
-            
-            # Get regions to search
-            if multi_region and selected_regions:
-                regions_to_search = [(r, REGION_CODES[r]) for r in selected_regions]
+            if checkpoint is not None:
+                # Resume with the scan's own parameters; only its missing tasks are searched
+                checkpoint_id = checkpoint["id"]
+                keywords = checkpoint["params"]["keywords"]
+                start_date = checkpoint["params"]["start_date"]
+                results_per_keyword = checkpoint["params"]["results_per_keyword"]
+                harvest_searches = checkpoint["params"].get("harvest_searches", 0)
+                probe_keywords = checkpoint["params"].get("probe_keywords", [])
+                scan_filters = checkpoint["params"]["filters"]
+                scan_tasks = checkpoint["tasks"]
+                completed_tasks = checkpoint["results"]
+                seen_video_ids = checkpoint["seen"]
+                use_work_queue = False
+                search_source = "live"
             else:
-                regions_to_search = [(region, REGION_CODES[region])]
+                # Prepare keywords
+                keywords = [] if watchlist_only else NICHE_KEYWORDS.get(category, []).copy()
+                if use_extended_catalog and not watchlist_only:
+                    keywords.extend(kw for kw in frontier.extended_keywords(category) if kw not in keywords)
+                if custom_keywords and not watchlist_only:
+                    custom_list = [kw.strip() for kw in custom_keywords.split('\n') if kw.strip()]
+                    keywords.extend(custom_list)
+                
+                # Calculate date range
+                start_date = search_start_date(int(days))
+                
+                # Get regions to search
+                if multi_region and selected_regions:
+                    regions_to_search = [(r, REGION_CODES[r]) for r in selected_regions]
+                else:
+                    regions_to_search = [(region, REGION_CODES[region])]
+                
+                get_usage_log().log_search(category, [code for _, code in regions_to_search], int(days), results_per_keyword)
+                
+                scan_filters = {
+                    "category": category,
+                    "spanish_only": spanish_only,
+                    "duration_range": list(duration_range),
+                    "min_views": min_views,
+                    "max_subs": max_subs,
+                    "min_engagement": min_engagement,
+                    "min_virality": min_virality,
+                    "countries": [code for _, code in regions_to_search],
+                }
+                # Collapsed mode: one region-less search per query, rows assigned by channel country
+                search_regions = (
+                    [(COLLAPSED_REGION_NAME, "")]
+                    if multi_region and region_mode == "collapsed" and len(regions_to_search) > 1
+                    else regions_to_search
+                )
+                scan_tasks = [
+                    (query, region_name, region_code)
+                    for region_name, region_code in search_regions
+                    for query in batch_keywords(keywords, keyword_batch_size)
+                ] if search_source != "local" else []
+                # Probe the frontier's best candidates, each on its own, in the first region
+                probe_keywords = []
+                if scan_tasks and probe_share:
+                    candidates = frontier.top_candidates(category, math.ceil(probe_share * len(scan_tasks)))
+                    probe_keywords = [c["keyword"] for c in candidates]
+                    scan_tasks += [(kw, *search_regions[0]) for kw in probe_keywords]
+                completed_tasks = {}
+                seen_video_ids = set()
+                checkpoint_id = None
+                if scan_tasks and not use_work_queue:
+                    # The work queue is durable already; inline scans get a checkpoint
+                    checkpoint_id = get_checkpoints().create(
+                        {
+                            "keywords": keywords,
+                            "start_date": start_date,
+                            "results_per_keyword": results_per_keyword,
+                            "harvest_searches": harvest_searches,
+                            "probe_keywords": probe_keywords,
+                            "filters": scan_filters,
+                        },
+                        scan_tasks,
+                    )
+            
+            # Parameters archived with the run's results
+            run_params = {
+                "keywords": keywords,
+                "start_date": start_date,
+                "results_per_keyword": results_per_keyword,
+                "harvest_searches": harvest_searches,
+                "regions": sorted({region_name for _, region_name, _ in scan_tasks}),
+                "filters": scan_filters,
+            }
             
             # Progress tracking
-            total_searches = len(keywords) * len(regions_to_search)
+            total_searches = len(scan_tasks)
+            query_batching = {
+                "keywords": sum(len(query_keywords(query)) for query, _, _ in scan_tasks),
+                "queries": total_searches,
+            }
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            all_rows = []
-            seen_video_ids = set()
+            api_stats_before = response_cache.snapshot()
             errors = []
-            search_count = 0
+            task_results = []
+            corpus = get_corpus_index()
+            local_search_ms = None
+            budget = ScanBudget(max_scan_seconds)
+            searches_done = 0
+            watchlist_skipped = 0
+            queue = scan_id = ticket = None
+            failed_tasks = 0
+            scan_finished = False
             
-            for region_name, region_code in regions_to_search:
-                for kw in keywords:
-                    search_count += 1
-                    progress = search_count / total_searches
-                    progress_bar.progress(progress)
-                    status_text.text(f"🔎 Buscando: {kw} en {region_name} ({search_count}/{total_searches})")
-                    
-                    # Search for videos
-                    search_data = cached_search_shorts(
-                        kw, start_date, region_code, api_key, 
-                        results_per_keyword, language="es"
-                    )
-                    
-                    if "error" in search_data:
-                        errors.append(f"Error en '{kw}': {search_data['error']}")
-                        continue
-                    
-                    if "items" not in search_data or not search_data["items"]:
-                        continue
-                    
-                    videos = search_data["items"]
-                    video_ids = [v["id"]["videoId"] for v in videos if v["id"]["videoId"] not in seen_video_ids]
-                    channel_ids = list(set([v["snippet"]["channelId"] for v in videos]))
-                    
-                    if not video_ids:
-                        continue
-                    
-                    seen_video_ids.update(video_ids)
-                    
-                    # Fetch detailed data
-                    vid_details = cached_video_details(tuple(video_ids), api_key)
-                    chan_details = cached_channel_stats(tuple(channel_ids), api_key)
-                    
-                    if "error" in vid_details or "error" in chan_details:
-                        continue
-                    
-                    vid_map = {item["id"]: item for item in vid_details.get("items", [])}
-                    chan_map = {item["id"]: item for item in chan_details.get("items", [])}
-                    
-                    # Process each video
-                    for v in videos:
-                        vid_id = v["id"]["videoId"]
-                        ch_id = v["snippet"]["channelId"]
-                        
-                        if vid_id not in vid_map:
-                            continue
-                        
-                        v_detail = vid_map.get(vid_id, {})
-                        c_detail = chan_map.get(ch_id, {})
-                        
-                        v_snippet = v_detail.get("snippet", {})
-                        v_stats = v_detail.get("statistics", {})
-                        v_content = v_detail.get("contentDetails", {})
-                        c_stats = c_detail.get("statistics", {})
-                        c_snippet = c_detail.get("snippet", {})
-                        
-                        # Extract data
-                        title = v_snippet.get("title", "")
-                        description = v_snippet.get("description", "")
-                        
-                        # Spanish language filter
-                        if spanish_only and not is_likely_spanish(title, description):
-                            continue
-                        
-                        # Extract metrics
-                        views = int(v_stats.get("viewCount", 0))
-                        likes = int(v_stats.get("likeCount", 0)) if "likeCount" in v_stats else 0
-                        comments = int(v_stats.get("commentCount", 0)) if "commentCount" in v_stats else 0
-                        subs = int(c_stats.get("subscriberCount", 0)) if "subscriberCount" in c_stats else 0
-                        
-                        # Duration check
-                        duration_sec = parse_duration_seconds(v_content.get("duration", ""))
-                        if duration_sec < duration_range[0] or duration_sec > duration_range[1]:
-                            continue
-                        
-                        # Calculate derived metrics
-                        published_at = v_snippet.get("publishedAt", "")
-                        days_old = calculate_days_old(published_at)
-                        engagement_rate = calculate_engagement_rate(views, likes, comments)
-                        virality_score = calculate_virality_score(views, subs, max(days_old, 1))
-                        views_per_day = views / max(days_old, 1)
+            if search_source != "local":
+                # Clicking it reruns the script, which interrupts the scan between two searches
+                st.button(
+                    "⏹️ Cancelar búsqueda",
+                    key="cancel_scan",
+                    help="Detiene la búsqueda y muestra los resultados obtenidos hasta ahora"
+                )
+            
+            try:
+                if search_source != "local":
+                    if use_work_queue:
+                        # Durable tasks: external workers and this session lease them from the same queue
+                        queue = get_work_queue()
+                        scan_id = queue.create_scan(
+                            {
+                                "start_date": start_date,
+                                "results_per_keyword": results_per_keyword,
+                                "harvest_searches": harvest_searches,
+                                "filters": scan_filters,
+                            },
+                            scan_tasks,
+                        )
+                        worker_id = new_worker_id()
                         
-                        # Apply filters
-                        if views < min_views:
-                            continue
-                        if max_subs > 0 and subs > max_subs:
-                            continue
-                        if engagement_rate < min_engagement:
-                            continue
-                        if virality_score < min_virality:
-                            continue
+                        while True:
+                            queue_progress = queue.progress(scan_id)
+                            finished = queue_progress["done"] + queue_progress["failed"] + queue_progress["cancelled"]
+                            progress_bar.progress(finished / max(queue_progress["total"], 1))
+                            status_text.text(
+                                f"⚙️ Cola {scan_id}: {finished}/{queue_progress['total']} tareas "
+                                f"({queue_progress['leased']} en curso)"
+                            )
+                            if finished == queue_progress["total"]:
+                                break
+                            if budget.stop_reason():
+                                # Drop what nobody has started; wait for tasks other workers are running
+                                queue.cancel(scan_id)
+                                if queue_progress["leased"]:
+                                    time.sleep(1)
+                                continue
+                            if run_one_task(queue, worker_id, api_key, scan_id=scan_id, corpus=corpus) is None:
+                                # Remaining tasks are leased by other workers
+                                time.sleep(1)
                         
-                        # Build row
-                        tags = v_snippet.get("tags", [])
-                        thumbnails = v_snippet.get("thumbnails", {})
-                        channel_country = c_snippet.get("country", "N/A")
+                        task_results = queue.results(scan_id)
+                        errors.extend(queue.errors(scan_id))
+                        queue_progress = queue.progress(scan_id)
+                        searches_done = queue_progress["done"] + queue_progress["failed"]
+                    
+                    else:
+                        scheduler = get_scan_scheduler()
+                        if total_searches > len(completed_tasks):
+                            # Wait for a slot shared fairly with every other session's scans
+                            scan_owner = st.session_state.setdefault("scan_owner", uuid.uuid4().hex[:8])
+                            ticket = scheduler.submit(scan_owner, total_searches - len(completed_tasks))
+                            while not scheduler.wait(ticket, timeout=1) and not budget.stop_reason():
+                                queue_status = scheduler.queue_status(ticket)
+                                status_text.text(
+                                    f"🚦 En cola: posición {queue_status['position']} · "
+                                    f"espera estimada ~{queue_status['estimated_wait']:.0f} s"
+                                )
                         
-                        all_rows.append({
-                            # Identifiers
-                            "Video ID": vid_id,
-                            "Título": title,
-                            "URL del Video": f"https://youtube.com/shorts/{vid_id}",
-                            
-                            # Performance
-                            "Vistas": views,
-                            "Likes": likes,
-                            "Comentarios": comments,
-                            "Engagement (%)": engagement_rate,
-                            "Score Viralidad": virality_score,
-                            "Nivel Viralidad": get_virality_label(virality_score),
-                            "Vistas/Día": round(views_per_day, 0),
+                        for task_index, (kw, region_name, region_code) in enumerate(scan_tasks):
+                            if task_index in completed_tasks:
+                                task_results.append(completed_tasks[task_index])
+                                searches_done += 1
+                                continue
+                            if budget.stop_reason():
+                                break
+                            progress_bar.progress((searches_done + 1) / max(total_searches, 1))
+                            status_text.text(f"🔎 Buscando: {kw} en {region_name} ({searches_done + 1}/{total_searches})")
                             
-                            # Video Details
-                            "Duración": parse_duration(v_content.get("duration", "")),
-                            "Duración (seg)": duration_sec,
-                            "Publicado": published_at[:10] if published_at else "",
-                            "Días Online": days_old,
-                            "Descripción": description[:300],
-                            "Tags": ", ".join(tags[:10]) if tags else "",
+                            # A failed task is retried on resume, so it must not leave its hits marked as seen
+                            seen_before_task = set(seen_video_ids)
+                            with scheduler.owned(ticket):
+                                task_result = run_search_task(
+                                    kw, region_name, region_code, start_date, api_key,
+                                    results_per_keyword, scan_filters, seen_video_ids, corpus,
+                                    harvest_searches=harvest_searches
+                                )
+                            scheduler.task_done(ticket)
+                            searches_done += 1
                             
-                            # Thumbnail
-                            "Thumbnail": thumbnails.get("high", {}).get("url", thumbnails.get("default", {}).get("url", "")),
+                            if task_result["error"]:
+                                # Not checkpointed, so resuming retries it
+                                errors.append(task_result["error"])
+                                failed_tasks += 1
+                                seen_video_ids = seen_before_task
+                            else:
+                                get_checkpoints().save_task(checkpoint_id, task_index, task_result, seen_video_ids)
+                            task_results.append(task_result)
                             
-                            # Channel
-                            "Canal": v_snippet.get("channelTitle", ""),
-                            "URL del Canal": f"https://youtube.com/channel/{ch_id}",
-                            "Suscriptores": subs,
-                            "País del Canal": channel_country,
-                            
-                            # Meta
-                            "Categoría": category,
-                            "Palabra Clave": kw,
-                            "Región Búsqueda": region_name,
-                            
-                            # Actionable
-                            "Ángulo de Idea": generate_idea_angle_spanish(title, category, views, engagement_rate),
-                        })
-                    
-                    time.sleep(0.1)
-            
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Show errors
-            if errors:
-                with st.expander(f"⚠️ {len(errors)} advertencias"):
-                    for err in errors:
-                        st.warning(err)
-            
-            # Process results
-            if all_rows:
-                results_df = pd.DataFrame(all_rows)
-                results_df = results_df.sort_values(
-                    by=["Score Viralidad", "Vistas"],
-                    ascending=[False, False]
-                ).reset_index(drop=True)
-                
-                st.session_state.results_df = results_df
-                st.session_state.search_completed = True
-                
-                # Summary
-                st.markdown("---")
-                st.subheader("📊 Resumen de Resultados")
-                
-                col1, col2, col3, col4, col5 = st.columns(5)
+                            time.sleep(0.1)
                 
-                with col1:
-                    st.metric("Videos Encontrados", len(results_df))
-                with col2:
-                    st.metric("Vistas Promedio", format_number(int(results_df["Vistas"].mean())))
-                with col3:
-                    st.metric("Engagement Promedio", f"{results_df['Engagement (%)'].mean():.2f}%")
-                with col4:
-                    viral_count = len(results_df[results_df["Score Viralidad"] >= 60])
-                    st.metric("Videos Virales", viral_count)
-                with col5:
-                    st.metric("Viralidad Promedio", f"{results_df['Score Viralidad'].mean():.1f}")
+                # Answer keywords from the local corpus index (after live results, which are fresher)
+                if search_source != "live" and keywords:
+                    local_started = time.perf_counter()
+                    for kw in keywords:
+                        task_results.append(run_local_search_task(
+                            kw, start_date, corpus, scan_filters,
+                            limit=LOCAL_RESULTS_PER_KEYWORD, seen_video_ids=seen_video_ids
+                        ))
+                    local_search_ms = (time.perf_counter() - local_started) * 1000
                 
-                # Results Table
-                st.markdown("---")
-                st.subheader("🎬 Resultados de Videos")
-                
-                display_cols = st.multiselect(
-                    "Columnas a mostrar:",
-                    options=results_df.columns.tolist(),
-                    default=[
-                        "Título", "Vistas", "Engagement (%)", 
-                        "Nivel Viralidad", "Canal", "Suscriptores", "URL del Video"
-                    ]
-                )
-                
-                if display_cols:
-                    st.dataframe(
-                        results_df[display_cols],
-                        use_container_width=True,
-                        height=400,
-                        column_config={
-                            "URL del Video": st.column_config.LinkColumn("URL del Video"),
-                            "URL del Canal": st.column_config.LinkColumn("URL del Canal"),
-                            "Thumbnail": st.column_config.ImageColumn("Thumbnail", width="medium"),
-                            "Vistas": st.column_config.NumberColumn("Vistas", format="%d"),
-                            "Score Viralidad": st.column_config.ProgressColumn(
-                                "Score Viralidad",
-                                min_value=0,
-                                max_value=100,
-                            ),
-                        }
-                    )
-                
-                # Download Options
-                st.markdown("---")
-                st.subheader("📥 Exportar Resultados")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.download_button(
-                        "📄 Descargar CSV",
-                        data=convert_df_to_csv(results_df),
-                        file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-                
-                with col2:
-                    try:
-                        excel_data = convert_df_to_excel(results_df)
-                        st.download_button(
-                            "📊 Descargar Excel",
-                            data=excel_data,
-                            file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
+                # Poll watched channels through their uploads playlists
+                if include_watchlist or watchlist_only:
+                    watch_ids = [c["id"] for c in watchlist.channels()] if force_watchlist else watchlist.due()
+                    if watch_ids and budget.stop_reason():
+                        watchlist_skipped = len(watch_ids)
+                    elif watch_ids:
+                        status_text.text(f"📌 Consultando {len(watch_ids)} canales de la watchlist...")
+                        watch_result = run_watchlist_task(
+                            watch_ids, start_date, api_key, scan_filters,
+                            seen_video_ids=seen_video_ids, corpus=corpus
+                        )
+                        watchlist.record_polls(
+                            watch_ids, watch_result["velocity"], watch_result["titles"], failed=watch_result["failed"]
                         )
-                    except ImportError:
-                        st.info("Instala openpyxl para exportar a Excel")
+                        errors.extend(watch_result["errors"])
+                        task_results.append(watch_result)
                 
-                with col3:
-                    st.download_button(
-                        "📋 Descargar JSON",
-                        data=results_df.to_json(orient="records", indent=2, force_ascii=False),
-                        file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.json",
-                        mime="application/json",
-                        use_container_width=True
-                    )
+                if checkpoint_id and searches_done == total_searches and not failed_tasks:
+                    get_checkpoints().finish(checkpoint_id)
+                    checkpoint_id = None
+                scan_finished = True
+            
+            finally:
+                if ticket is not None:
+                    get_scan_scheduler().finish(ticket)
+                if not scan_finished:
+                    # Interrupted by the cancel button (or any other widget): keep what was gathered
+                    if queue is not None and scan_id:
+                        queue.cancel(scan_id)
+                        task_results = queue.results(scan_id)
+                        searches_done = len(task_results)
+                    st.session_state.interrupted_scan = {
+                        "task_results": task_results,
+                        "errors": errors,
+                        "summary": {
+                            "api": stats_delta(api_stats_before, response_cache.snapshot()),
+                            "local_search_ms": local_search_ms,
+                            "query_batching": query_batching,
+                            "scan_quota_units": None if ticket is None or completed_tasks else ticket.usage["quota_units"],
+                            "frontier": {"category": scan_filters["category"], "probes": probe_keywords},
+                            "params": run_params,
+                            "resumable_scan": checkpoint_id,
+                            "stopped": {
+                                "reason": "cancelled",
+                                "searches_done": searches_done,
+                                "searches_total": total_searches,
+                                "watchlist_skipped": watchlist_skipped,
+                            },
+                        },
+                    }
+            
+            progress_bar.empty()
+            status_text.empty()
             
+            stop_reason = budget.stop_reason()
+            finish_scan(
+                task_results,
+                errors,
+                {
+                    "api": stats_delta(api_stats_before, response_cache.snapshot()),
+                    "local_search_ms": local_search_ms,
+                    "query_batching": query_batching,
+                    "scan_quota_units": None if ticket is None or completed_tasks else ticket.usage["quota_units"],
+                    "frontier": {"category": scan_filters["category"], "probes": probe_keywords},
+                    "params": run_params,
+                    "resumable_scan": checkpoint_id,
+                    "stopped": {
+                        "reason": stop_reason,
+                        "searches_done": searches_done,
+                        "searches_total": total_searches,
+                        "watchlist_skipped": watchlist_skipped,
+                    } if stop_reason and (searches_done < total_searches or watchlist_skipped) else None,
+                },
+                collapse_duplicates,
+                duplicate_keep,
+            )
+    
+    elif "interrupted_scan" in st.session_state:
+        interrupted = st.session_state.pop("interrupted_scan")
+        finish_scan(
+            interrupted["task_results"],
+            interrupted["errors"],
+            interrupted["summary"],
+            collapse_duplicates,
+            duplicate_keep,
+        )
+    
+    if load_btn:
+        archived = run_archive.load(load_id)
+        if archived is None:
+            st.error(f"❌ No se encontró la búsqueda archivada {load_id}")
+        else:
+            st.session_state.results_df = archived["results_df"]
+            st.session_state.results_version = uuid.uuid4().hex
+            st.session_state.search_completed = True
+            st.session_state.scan_summary = {
+                **archived["summary"],
+                "run_id": archived["id"],
+                "archived_at": archived["created_at"],
+                "resumable_scan": None,
+            }
+            st.session_state.results_page = 1
+    
+    # ================== RESULTS ==================
+    
+    if st.session_state.get("search_completed") and not st.session_state.results_df.empty:
+        results_df = st.session_state.results_df
+        scan_summary = st.session_state.get("scan_summary", {})
+        
+        # Summary
+        st.markdown("---")
+        st.subheader("📊 Resumen de Resultados")
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Videos Encontrados", len(results_df))
+        with col2:
+            st.metric("Vistas Promedio", format_number(int(results_df["Vistas"].mean())))
+        with col3:
+            st.metric("Engagement Promedio", f"{results_df['Engagement (%)'].mean():.2f}%")
+        with col4:
+            viral_count = len(results_df[results_df["Score Viralidad"] >= 60])
+            st.metric("Videos Virales", viral_count)
+        with col5:
+            st.metric("Viralidad Promedio", f"{results_df['Score Viralidad'].mean():.1f}")
+        
+        if scan_summary.get("archived_at"):
+            st.caption(
+                f"📂 Búsqueda archivada `{scan_summary['run_id']}` del "
+                f"{datetime.fromtimestamp(scan_summary['archived_at']).strftime('%d/%m/%Y %H:%M')}, "
+                "cargada sin llamadas a la API (las cifras de abajo son de la búsqueda original)"
+            )
+        elif scan_summary.get("run_id"):
+            st.caption(f"🗂️ Archivada como `{scan_summary['run_id']}` en '🗂️ Historial de Búsquedas'")
+        
+        api_summary = scan_summary.get("api", {})
+        if api_summary:
+            st.caption(
+                f"🌐 {api_summary['requests']} llamadas a la API ({api_summary.get('quota_units', 0)} unidades de quota) · "
+                f"{api_summary['cache_hits']} desde caché · "
+                f"{api_summary.get('coalesced', 0)} compartidas con otras sesiones · "
+                f"{api_summary['revalidated']} revalidadas por ETag (304), "
+                f"ahorrando {api_summary['bytes_saved'] / 1024:.0f} KB y {api_summary['seconds_saved']:.1f} s"
+                + (f" · {api_summary['evictions']} expulsadas de la caché por espacio" if api_summary.get("evictions") else "")
+            )
+        
+        if scan_summary.get("stale_seconds"):
+            st.caption(
+                f"⚡ {api_summary.get('stale_served', 0)} respuestas servidas al instante desde caché caducada "
+                f"(hasta {scan_summary['stale_seconds'] / 60:.0f} min de antigüedad extra); "
+                f"se actualizan en segundo plano para la próxima búsqueda"
+            )
+        
+        batching = scan_summary.get("query_batching") or {}
+        quota_per_video = st.session_state.get("quota_per_video", {})
+        if batching.get("keywords", 0) > batching.get("queries", 0):
+            note = f"🔗 Búsqueda agrupada: {batching['keywords']} palabras clave en {batching['queries']} consultas OR"
+            if "batched" in quota_per_video:
+                note += f" · {quota_note(quota_per_video['batched'])} unidades de quota por video único"
+            if "single" in quota_per_video:
+                note += f" (vs {quota_note(quota_per_video['single'])} con una palabra clave por búsqueda)"
             else:
-                st.warning(
-                    "No se encontraron videos con tus filtros. Intenta:\n"
-                    "- Aumentar días de búsqueda\n"
-                    "- Reducir vistas mínimas\n"
-                    "- Aumentar suscriptores máximos\n"
-                    "- Reducir engagement/viralidad mínimos\n"
-                    "- Desactivar filtro 'Solo español'"
+                note += " · haz una búsqueda con 1 palabra clave por búsqueda para comparar"
+            st.caption(note)
+        elif "batched" in quota_per_video and "single" in quota_per_video:
+            st.caption(
+                f"🔗 Quota por video único: {quota_note(quota_per_video['single'])} unidades con una palabra clave por búsqueda "
+                f"vs {quota_note(quota_per_video['batched'])} agrupando con OR"
+            )
+        
+        if scan_summary.get("local_search_ms") is not None:
+            st.caption(f"💾 Búsquedas en el corpus local respondidas en {scan_summary['local_search_ms']:.0f} ms (0 unidades de quota)")
+        
+        if scan_summary.get("detail_videos"):
+            per_thousand = 1000 / scan_summary["detail_videos"]
+            st.caption(
+                f"📦 Por cada 1.000 videos: {scan_summary['detail_payload_bytes'] * per_thousand / 1024:.0f} KB de respuesta "
+                f"(proyección fields=) y {scan_summary['detail_record_bytes'] * per_thousand / 1024:.0f} KB en memoria"
+            )
+            # Reduction against the same videos fetched without the projection, measured on demand
+            if st.button(
+                "📏 Medir ahorro de la proyección",
+                disabled=not api_key,
+                help="Pide hasta 50 de estos videos con y sin fields= (hasta 2 unidades de quota) y compara tamaños"
+            ):
+                st.session_state.projection_baseline = measure_projection(results_df["Video ID"].tolist(), api_key)
+            baseline = st.session_state.get("projection_baseline")
+            if baseline and "error" in baseline:
+                st.error(f"❌ No se pudo medir la proyección: {baseline['error']}")
+            elif baseline:
+                st.caption(
+                    f"📏 Medido en {baseline['videos']} videos, por cada 1.000: respuesta "
+                    f"{baseline['payload_kb']:.0f} KB con fields= vs {baseline['payload_kb_full']:.0f} KB sin proyección "
+                    f"(−{100 * (1 - baseline['payload_kb'] / max(baseline['payload_kb_full'], 1e-9)):.0f}%) · memoria "
+                    f"{baseline['memory_kb']:.0f} KB en registros vs {baseline['memory_kb_full']:.0f} KB como JSON anidado "
+                    f"(−{100 * (1 - baseline['memory_kb'] / max(baseline['memory_kb_full'], 1e-9)):.0f}%)"
+                )
+        
+        pushdown = scan_summary.get("pushdown", {})
+        if any(pushdown.values()):
+            st.caption(
+                f"⏬ Filtros anticipados: {pushdown['search_pages']} páginas de búsqueda sin pedir "
+                f"({pushdown['search_pages'] * QUOTA_COST[YOUTUBE_SEARCH_URL]} unidades) · "
+                f"{pushdown['videos_big_channel']} videos de canales sobre el máximo de suscriptores y "
+                f"{pushdown['videos_duration']} fuera de duración sin descargar · "
+                f"{pushdown['channels']} canales sin consultar · {pushdown['detail_calls']} llamadas de detalle evitadas"
+            )
+        
+        harvest = scan_summary.get("harvest", {})
+        if harvest:
+            note = (
+                f"🪓 Cosecha por ventanas: {harvest['windows']} ventanas de tiempo ({harvest['splits']} divisiones) · "
+                f"{harvest['searches']} búsquedas · {scan_summary['search_videos']:,} videos únicos"
+            )
+            left = harvest["saturated"] + harvest["truncated"] + harvest["unsearched"]
+            if left:
+                note += f" · {left} ventanas con resultados sin enumerar: sube las búsquedas máximas"
+            st.caption(note)
+        
+        frontier_outcome = scan_summary.get("frontier") or {}
+        if frontier_outcome.get("promoted") or frontier_outcome.get("rejected"):
+            st.caption(
+                f"🌱 Candidatas sondeadas: {len(frontier_outcome['promoted']) + len(frontier_outcome['rejected'])} "
+                f"(referencia: {frontier_outcome['baseline']:.1f} videos por palabra clave del catálogo) · "
+                f"promovidas: {', '.join(frontier_outcome['promoted']) or 'ninguna'}"
+            )
+        
+        overlap = scan_summary.get("region_overlap", [])
+        if len(overlap) > 1:
+            with st.expander("🌎 Solapamiento entre regiones"):
+                overlap_df = pd.DataFrame(overlap)
+                st.dataframe(overlap_df, hide_index=True, use_container_width=True)
+                avg_overlap = overlap_df["Solapamiento (%)"].mean()
+                low_value = overlap_df[overlap_df["Únicos"] < 0.2 * overlap_df["Videos"]]["Región"].tolist()
+                st.caption(
+                    f"En promedio el {avg_overlap:.0f}% de los videos de cada región también aparece en otra. "
+                    + (
+                        f"Aportan pocos videos propios: {', '.join(low_value)}; el modo '🌐 Una búsqueda para todos' "
+                        f"costaría 1/{len(overlap)} de las búsquedas."
+                        if low_value else
+                        "Cada región aporta videos propios: la búsqueda por país compensa su quota."
+                    )
+                )
+        elif overlap and overlap[0]["Región"] == COLLAPSED_REGION_NAME:
+            by_region = results_df["Región Búsqueda"].value_counts()
+            st.caption(
+                f"🌐 Búsqueda colapsada: {overlap[0]['Búsquedas']} búsquedas sin región; videos asignados por país del canal — "
+                + " · ".join(f"{name}: {count}" for name, count in by_region.head(8).items())
+                + f". Se descartaron {scan_summary.get('other_countries', 0)} videos de canales de países no seleccionados; "
+                f"los canales sin país declarado se muestran como '{UNKNOWN_COUNTRY_NAME}'."
+            )
+        
+        if scan_summary.get("stopped"):
+            st.warning(stop_note(scan_summary["stopped"]))
+        
+        if scan_summary.get("resumable_scan"):
+            st.info(
+                f"♻️ Búsqueda `{scan_summary['resumable_scan']}` guardada con tareas pendientes: "
+                "reanúdala en '♻️ Reanudar Búsqueda' para completar solo lo que falta."
+            )
+        
+        if scan_summary.get("duplicates_collapsed"):
+            st.caption(f"🧬 {scan_summary['duplicates_collapsed']} re-subidas agrupadas (ver columna 'Copias')")
+        
+        # Results Table
+        st.markdown("---")
+        st.subheader("🎬 Resultados de Videos")
+        
+        display_cols = st.multiselect(
+            "Columnas a mostrar:",
+            options=results_df.columns.tolist(),
+            default=[
+                col for col in [
+                    "Título", "Vistas", "Engagement (%)", 
+                    "Nivel Viralidad", "Canal", "Suscriptores", "Copias", "URL del Video"
+                ] if col in results_df.columns
+            ],
+            key="display_cols"
+        )
+        
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+        
+        with col1:
+            text_filter = st.text_input(
+                "🔎 Filtrar:",
+                placeholder="Título, canal, tags o palabra clave",
+                key="results_filter"
+            )
+        with col2:
+            sort_by = st.selectbox(
+                "Ordenar por:",
+                options=results_df.columns.tolist(),
+                index=results_df.columns.get_loc("Score Viralidad"),
+                key="results_sort"
+            )
+        with col3:
+            sort_desc = st.selectbox(
+                "Orden:",
+                options=[True, False],
+                format_func=lambda d: "⬇️ Desc" if d else "⬆️ Asc",
+                key="results_sort_desc"
+            )
+        with col4:
+            page_size = st.selectbox(
+                "Filas:",
+                options=RESULTS_PAGE_SIZES,
+                index=1,
+                key="results_page_size"
+            )
+        
+        view_df = query_results(results_df, text_filter, sort_by, ascending=not sort_desc)
+        total_pages = max(1, -(-len(view_df) // page_size))
+        if st.session_state.get("results_page", 1) > total_pages:
+            st.session_state.results_page = total_pages
+        
+        page = st.number_input(
+            f"Página (de {total_pages}):",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key="results_page"
+        )
+        page_df = paginate_results(view_df, int(page), page_size)
+        
+        first_row = (int(page) - 1) * page_size + 1 if len(page_df) else 0
+        st.caption(f"Mostrando {first_row}–{first_row + len(page_df) - 1 if len(page_df) else 0} de {len(view_df)} videos")
+        
+        if display_cols:
+            table_df = with_thumbnail_previews(page_df) if "Thumbnail" in display_cols else page_df
+            st.dataframe(
+                table_df[display_cols],
+                use_container_width=True,
+                height=400,
+                column_config={
+                    "URL del Video": st.column_config.LinkColumn("URL del Video"),
+                    "URL del Canal": st.column_config.LinkColumn("URL del Canal"),
+                    "Thumbnail": st.column_config.ImageColumn("Thumbnail", width="small"),
+                    "Vistas": st.column_config.NumberColumn("Vistas", format="%d"),
+                    "Score Viralidad": st.column_config.ProgressColumn(
+                        "Score Viralidad",
+                        min_value=0,
+                        max_value=100,
+                    ),
+                }
+            )
+        
+        # Download Options
+        st.markdown("---")
+        st.subheader("📥 Exportar Resultados")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.download_button(
+                "📄 Descargar CSV",
+                data=get_export_bytes(st.session_state.results_version, "csv", results_df),
+                file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+        
+        with col2:
+            try:
+                excel_data = get_export_bytes(st.session_state.results_version, "xlsx", results_df)
+                st.download_button(
+                    "📊 Descargar Excel",
+                    data=excel_data,
+                    file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
                 )
+            except ImportError:
+                st.info("Instala openpyxl para exportar a Excel")
+        
+        with col3:
+            st.download_button(
+                "📋 Descargar JSON",
+                data=get_export_bytes(st.session_state.results_version, "json", results_df),
+                file_name=f"shorts_motivacion_esp_{datetime.now().strftime('%Y%m%d')}.json",
+                mime="application/json",
+                use_container_width=True
+            )
 
 with tab2:
     st.subheader("📊 Dashboard de Análisis")
@@ -1020,7 +1585,7 @@ with tab2:
         # Country Distribution
         if 'País del Canal' in df.columns:
             st.markdown("#### 🌎 Distribución por País del Canal")
-            country_dist = df['País del Canal'].value_counts()
+            country_dist = downsample_for_chart(df['País del Canal'].value_counts())
             st.bar_chart(country_dist)
         
     else:
@@ -1075,24 +1640,51 @@ with tab3:
     # Trending Hooks in Spanish
     st.markdown("### 🎣 Ganchos Virales en Español")
     
-    hooks = [
-        "🔥 'La verdad que nadie te dice sobre...'",
-        "🔥 '¿Por qué el 99% de personas nunca...'",
-        "🔥 'El secreto que los millonarios no quieren que sepas'",
-        "🔥 'Esto es lo que diferencia a los exitosos'",
-        "🔥 'Si estás viendo esto, no es coincidencia'",
-        "🔥 'Escucha esto si sientes que no avanzas'",
-        "🔥 'El error que está arruinando tu vida'",
-        "🔥 'Nadie te enseñó esto sobre el dinero'",
-        "🔥 'Tu problema no es la motivación, es...'",
-        "🔥 'Lo que aprendí perdiendo todo'",
-        "🔥 '3 señales de que serás exitoso'",
-        "🔥 'Este hábito cambió mi vida en 30 días'",
-    ]
-    
-    cols = st.columns(2)
-    for i, hook in enumerate(hooks):
-        cols[i % 2].write(hook)
+    if st.session_state.get("search_completed") and not st.session_state.results_df.empty:
+        ideas_df = st.session_state.results_df
+        include_corpus = st.checkbox(
+            "Incluir el corpus local",
+            value=False,
+            help="Agrupa también los títulos de todos los videos ya descargados (ver '💾 Corpus Local')"
+        )
+        results_fingerprint = hashlib.md5(
+            "\n".join(f"{v}:{s}" for v, s in zip(ideas_df["Video ID"], ideas_df["Score Viralidad"])).encode("utf-8")
+        ).hexdigest()
+        corpus_fingerprint = get_corpus_index().fingerprint() if include_corpus else None
+        
+        with st.spinner("Agrupando títulos por patrón de gancho..."):
+            clusters, clustered_titles = get_title_clusters(results_fingerprint, corpus_fingerprint, ideas_df)
+        
+        st.caption(f"{clustered_titles} títulos agrupados en {len(clusters)} patrones, ordenados por viralidad promedio")
+        for cluster in clusters:
+            with st.expander(
+                f"🔥 «{cluster['hook']}» · {cluster['size']} videos · Score Viralidad {cluster['avg_score']}"
+            ):
+                st.markdown(f"**Términos frecuentes:** {', '.join(cluster['terms'])}")
+                st.markdown("**Mejores ejemplos:**")
+                for title in cluster["examples"]:
+                    st.write(f"• {title}")
+    else:
+        st.caption("Haz una búsqueda para ver los ganchos que se repiten en tus resultados. Mientras tanto, algunos clásicos:")
+        
+        hooks = [
+            "🔥 'La verdad que nadie te dice sobre...'",
+            "🔥 '¿Por qué el 99% de personas nunca...'",
+            "🔥 'El secreto que los millonarios no quieren que sepas'",
+            "🔥 'Esto es lo que diferencia a los exitosos'",
+            "🔥 'Si estás viendo esto, no es coincidencia'",
+            "🔥 'Escucha esto si sientes que no avanzas'",
+            "🔥 'El error que está arruinando tu vida'",
+            "🔥 'Nadie te enseñó esto sobre el dinero'",
+            "🔥 'Tu problema no es la motivación, es...'",
+            "🔥 'Lo que aprendí perdiendo todo'",
+            "🔥 '3 señales de que serás exitoso'",
+            "🔥 'Este hábito cambió mi vida en 30 días'",
+        ]
+        
+        cols = st.columns(2)
+        for i, hook in enumerate(hooks):
+            cols[i % 2].write(hook)
     
     st.markdown("---")
     
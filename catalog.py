@@ -0,0 +1,178 @@
+"""Search catalog: Spanish-speaking regions and motivation keywords per category."""
+
+# ================== REGIONS ==================
+
+# Spanish-speaking regions
+REGION_CODES = {
+    "🇪🇸 España (Spain)": "ES",
+    "🇲🇽 México": "MX",
+    "🇦🇷 Argentina": "AR",
+    "🇨🇴 Colombia": "CO",
+    "🇨🇱 Chile": "CL",
+    "🇵🇪 Perú": "PE",
+    "🇻🇪 Venezuela": "VE",
+    "🇪🇨 Ecuador": "EC",
+    "🇬🇹 Guatemala": "GT",
+    "🇨🇺 Cuba": "CU",
+    "🇧🇴 Bolivia": "BO",
+    "🇩🇴 República Dominicana": "DO",
+    "🇭🇳 Honduras": "HN",
+    "🇵🇾 Paraguay": "PY",
+    "🇸🇻 El Salvador": "SV",
+    "🇳🇮 Nicaragua": "NI",
+    "🇨🇷 Costa Rica": "CR",
+    "🇵🇦 Panamá": "PA",
+    "🇺🇾 Uruguay": "UY",
+    "🇺🇸 USA (Hispanic)": "US",
+}
+
+REGION_NAMES = {code: name for name, code in REGION_CODES.items()}
+
+# ================== SPANISH MOTIVATION KEYWORDS ==================
+
+NICHE_KEYWORDS = {
+    "💪 Motivación General": [
+        "motivación español",
+        "motivación personal",
+        "frases motivacionales",
+        "motivación diaria",
+        "palabras de motivación",
+        "motivación para la vida",
+        "mensajes motivacionales",
+        "reflexiones motivacionales",
+        "motivación cortos",
+        "motivación shorts",
+    ],
+    "🏆 Éxito y Superación": [
+        "éxito personal",
+        "superación personal",
+        "cómo tener éxito",
+        "mentalidad de éxito",
+        "historias de éxito",
+        "claves del éxito",
+        "éxito en la vida",
+        "secretos del éxito",
+        "camino al éxito",
+        "mentalidad ganadora",
+    ],
+    "💰 Dinero y Riqueza": [
+        "motivación dinero",
+        "mentalidad millonaria",
+        "riqueza mentalidad",
+        "libertad financiera",
+        "éxito financiero",
+        "cómo ser rico",
+        "dinero y éxito",
+        "abundancia financiera",
+        "mentalidad de rico",
+        "educación financiera motivación",
+    ],
+    "🧠 Mentalidad y Mindset": [
+        "mentalidad positiva",
+        "cambiar mentalidad",
+        "mentalidad de crecimiento",
+        "psicología del éxito",
+        "mente millonaria",
+        "reprogramar la mente",
+        "mentalidad fuerte",
+        "poder de la mente",
+        "actitud mental positiva",
+        "mentalidad emprendedora",
+    ],
+    "📈 Emprendimiento": [
+        "motivación emprendedor",
+        "emprendimiento shorts",
+        "consejos emprendedores",
+        "éxito emprendedor",
+        "historias emprendedores",
+        "mentalidad emprendedora",
+        "cómo emprender",
+        "negocios motivación",
+        "emprender desde cero",
+        "ser tu propio jefe",
+    ],
+    "⏰ Disciplina y Hábitos": [
+        "disciplina personal",
+        "hábitos exitosos",
+        "rutina de éxito",
+        "autodisciplina",
+        "hábitos millonarios",
+        "constancia y disciplina",
+        "hábitos diarios éxito",
+        "despertar temprano motivación",
+        "productividad personal",
+        "gestión del tiempo",
+    ],
+    "❤️ Amor Propio y Autoestima": [
+        "amor propio",
+        "autoestima alta",
+        "quererse a uno mismo",
+        "confianza en ti mismo",
+        "valorarte a ti mismo",
+        "aceptación personal",
+        "empoderamiento personal",
+        "creer en ti mismo",
+        "fortaleza interior",
+        "paz interior",
+    ],
+    "🔥 Frases de Líderes": [
+        "frases de éxito",
+        "frases motivadoras famosos",
+        "citas inspiradoras",
+        "frases líderes mundiales",
+        "palabras de sabios",
+        "frases celebres motivación",
+        "consejos de millonarios",
+        "frases de emprendedores",
+        "sabiduría de vida",
+        "frases para reflexionar",
+    ],
+    "💼 Trabajo y Carrera": [
+        "motivación laboral",
+        "éxito profesional",
+        "crecer en el trabajo",
+        "desarrollo profesional",
+        "carrera exitosa",
+        "motivación para trabajar",
+        "liderazgo personal",
+        "ser mejor profesional",
+        "ascender en el trabajo",
+        "pasión por el trabajo",
+    ],
+    "🌅 Superación de Problemas": [
+        "superar obstáculos",
+        "salir adelante",
+        "nunca rendirse",
+        "superar momentos difíciles",
+        "resiliencia personal",
+        "levantarse después de caer",
+        "fortaleza mental",
+        "superar el fracaso",
+        "vencer el miedo",
+        "transformar dolor en fuerza",
+    ],
+    "🎯 Metas y Objetivos": [
+        "lograr tus metas",
+        "cumplir objetivos",
+        "sueños y metas",
+        "alcanzar tus sueños",
+        "propósito de vida",
+        "visualización de metas",
+        "metas claras",
+        "objetivos de vida",
+        "planificar el éxito",
+        "enfoque en metas",
+    ],
+    "🧘 Paz Mental y Bienestar": [
+        "paz mental",
+        "tranquilidad interior",
+        "bienestar emocional",
+        "equilibrio vida",
+        "calma interior",
+        "mente tranquila",
+        "serenidad personal",
+        "vivir en paz",
+        "soltar y avanzar",
+        "mindfulness español",
+    ],
+}
@@ -0,0 +1,139 @@
+"""
+Checkpoints for resumable scans.
+
+After every completed keyword × region task the scan's result rows and its
+`seen_video_ids` are written to SQLite, so a scan cut short by a restart, a
+dropped session, a deadline or a quota error can be resumed by ID and only
+the missing tasks are searched again.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from paths import CACHE_DIR
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(CACHE_DIR, "scan_checkpoints.db")
+
+# Checkpoints older than this are deleted when a new scan starts
+RETENTION_SECONDS = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    tasks TEXT NOT NULL,
+    seen TEXT NOT NULL DEFAULT '[]',
+    finished INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_tasks (
+    checkpoint_id TEXT NOT NULL REFERENCES checkpoints(id) ON DELETE CASCADE,
+    task_index INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (checkpoint_id, task_index)
+);
+"""
+
+
+class ScanCheckpoints:
+    """SQLite store of in-progress scans, shared by every session of the process."""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def create(self, params: Dict, tasks: Iterable[Tuple[str, str, str]]) -> str:
+        """Start a checkpoint for (keyword, region_name, region_code) tasks; returns its ID."""
+        checkpoint_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM checkpoints WHERE updated_at < ?", (now - RETENTION_SECONDS,))
+            conn.execute(
+                "INSERT INTO checkpoints (id, params, tasks, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (checkpoint_id, json.dumps(params), json.dumps([list(t) for t in tasks]), now, now),
+            )
+            conn.execute("COMMIT")
+        return checkpoint_id
+
+    def save_task(self, checkpoint_id: str, task_index: int, result: Dict, seen_video_ids: Set[str]) -> None:
+        """Record one completed task together with the scan's seen video IDs so far."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_tasks (checkpoint_id, task_index, result) VALUES (?, ?, ?)",
+                (checkpoint_id, task_index, json.dumps(result)),
+            )
+            conn.execute(
+                "UPDATE checkpoints SET seen = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(sorted(seen_video_ids)), time.time(), checkpoint_id),
+            )
+            conn.execute("COMMIT")
+
+    def finish(self, checkpoint_id: str) -> None:
+        """Mark a scan as complete; it no longer shows up as resumable."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE checkpoints SET finished = 1, updated_at = ? WHERE id = ?", (time.time(), checkpoint_id)
+            )
+
+    def load(self, checkpoint_id: str) -> Optional[Dict]:
+        """Params, tasks, completed results by task index and seen video IDs of a scan."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM checkpoints WHERE id = ?", (checkpoint_id,)).fetchone()
+            if row is None:
+                return None
+            results = conn.execute(
+                "SELECT task_index, result FROM checkpoint_tasks WHERE checkpoint_id = ?", (checkpoint_id,)
+            ).fetchall()
+        return {
+            "id": checkpoint_id,
+            "params": json.loads(row["params"]),
+            "tasks": [tuple(t) for t in json.loads(row["tasks"])],
+            "results": {r["task_index"]: json.loads(r["result"]) for r in results},
+            "seen": set(json.loads(row["seen"])),
+            "finished": bool(row["finished"]),
+        }
+
+    def unfinished(self, limit: int = 20) -> List[Dict]:
+        """Most recently updated scans that still have tasks to run."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.id, c.params, c.tasks, c.updated_at, COUNT(t.task_index) AS done "
+                "FROM checkpoints c LEFT JOIN checkpoint_tasks t ON t.checkpoint_id = c.id "
+                "WHERE c.finished = 0 GROUP BY c.id ORDER BY c.updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "id": row["id"],
+                "category": json.loads(row["params"])["filters"]["category"],
+                "done": row["done"],
+                "total": len(json.loads(row["tasks"])),
+                "updated_at": row["updated_at"],
+            }
+            for row in rows
+        ]
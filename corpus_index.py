@@ -0,0 +1,194 @@
+"""
+On-disk full-text index over every video the app has fetched.
+
+Built on SQLite FTS5 with accent folding (`remove_diacritics`), so keyword
+searches like "hábitos exitosos" can be answered locally in milliseconds
+instead of spending 100 quota units on a live search.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from dedup import normalize_text
+from paths import CACHE_DIR
+from records import ChannelRecord, VideoRecord, record_from_dict, record_to_dict
+
+DEFAULT_CORPUS_PATH = os.environ.get(
+    "CORPUS_INDEX_DB",
+    os.path.join(CACHE_DIR, "corpus_index.db"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    rowid INTEGER PRIMARY KEY,
+    video_id TEXT UNIQUE NOT NULL,
+    channel_id TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS video_text USING fts5(
+    title, tags, description,
+    tokenize = "unicode61 remove_diacritics 2"
+);
+CREATE INDEX IF NOT EXISTS idx_videos_published ON videos(published_at);
+"""
+
+# Words too common in Spanish to narrow a search
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "mi", "para", "por", "que", "se", "su", "te", "tu", "un", "una", "y",
+}
+
+
+def build_match_query(keyword: str) -> str:
+    """
+    Turn a keyword into an FTS5 query: every significant word must match.
+
+    Accents are folded by the tokenizer; longer words drop a plural "s" and
+    match as a prefix so "hábitos exitosos" also finds "hábito exitoso".
+    """
+    terms = []
+    for word in normalize_text(keyword).split():
+        if word in STOPWORDS:
+            continue
+        if len(word) >= 5:
+            terms.append(f'"{word[:-1] if word.endswith("s") else word}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms)
+
+
+class CorpusIndex:
+    """SQLite FTS5 index of fetched video and channel records."""
+
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def add(self, videos: Iterable[VideoRecord], channels: Iterable[ChannelRecord] = ()) -> int:
+        """Insert or refresh records; returns the number of videos written."""
+        now = time.time()
+        written = 0
+        with self._write_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for video in videos:
+                data = json.dumps(record_to_dict(video), ensure_ascii=False)
+                text = (video.title, " ".join(video.tags), video.description)
+                row = conn.execute("SELECT rowid FROM videos WHERE video_id = ?", (video.id,)).fetchone()
+                if row is None:
+                    rowid = conn.execute(
+                        "INSERT INTO videos (video_id, channel_id, published_at, data, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                        (video.id, video.channel_id, video.published_at, data, now),
+                    ).lastrowid
+                else:
+                    rowid = row[0]
+                    conn.execute(
+                        "UPDATE videos SET data = ?, indexed_at = ? WHERE rowid = ?", (data, now, rowid)
+                    )
+                    conn.execute("DELETE FROM video_text WHERE rowid = ?", (rowid,))
+                conn.execute(
+                    "INSERT INTO video_text (rowid, title, tags, description) VALUES (?, ?, ?, ?)",
+                    (rowid,) + text,
+                )
+                written += 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO channels (channel_id, data) VALUES (?, ?)",
+                [(c.id, json.dumps(record_to_dict(c), ensure_ascii=False)) for c in channels],
+            )
+            conn.execute("COMMIT")
+        return written
+
+    def channel_records(self, channel_ids: Iterable[str]) -> Dict[str, ChannelRecord]:
+        """Last known records of these channels (subscriber counts may be a little stale)."""
+        channel_ids = list(channel_ids)
+        if not channel_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT data FROM channels WHERE channel_id IN ({','.join('?' * len(channel_ids))})", channel_ids
+            ).fetchall()
+        records = (record_from_dict(ChannelRecord, json.loads(data)) for (data,) in rows)
+        return {record.id: record for record in records}
+
+    def video_durations(self, video_ids: Iterable[str]) -> Dict[str, str]:
+        """ISO 8601 durations of already indexed videos (they never change)."""
+        video_ids = list(video_ids)
+        if not video_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT video_id, json_extract(data, '$.duration') FROM videos "
+                f"WHERE video_id IN ({','.join('?' * len(video_ids))})",
+                video_ids,
+            ).fetchall()
+        return {video_id: duration for video_id, duration in rows if duration}
+
+    def fingerprint(self) -> str:
+        """Changes whenever a video is added or refreshed, for keying derived caches."""
+        with self._connect() as conn:
+            count, last_rowid, last_indexed = conn.execute(
+                "SELECT COUNT(*), MAX(rowid), MAX(indexed_at) FROM videos"
+            ).fetchone()
+        return f"{count}:{last_rowid}:{last_indexed}"
+
+    def title_stats(self) -> List[Tuple[str, str, int, int, str]]:
+        """(video ID, title, views, channel subscribers, published at) of every indexed video."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT v.video_id, json_extract(v.data, '$.title'), json_extract(v.data, '$.views'), "
+                "COALESCE(json_extract(c.data, '$.subscribers'), 0), v.published_at "
+                "FROM videos v LEFT JOIN channels c ON c.channel_id = v.channel_id"
+            ).fetchall()
+
+    def search(self, keyword: str, published_after: str = "", limit: int = 50) -> Tuple[List[VideoRecord], Dict[str, ChannelRecord]]:
+        """Best-matching videos for a keyword, plus the records of their channels."""
+        query = build_match_query(keyword)
+        if not query:
+            return [], {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT v.data, c.data FROM video_text "
+                "JOIN videos v ON v.rowid = video_text.rowid "
+                "LEFT JOIN channels c ON c.channel_id = v.channel_id "
+                "WHERE video_text MATCH ? AND v.published_at >= ? "
+                "ORDER BY bm25(video_text, 10.0, 5.0, 1.0) LIMIT ?",
+                (query, published_after[:19], limit),
+            ).fetchall()
+        videos = []
+        channels = {}
+        for video_data, channel_data in rows:
+            video = record_from_dict(VideoRecord, json.loads(video_data))
+            videos.append(video)
+            if channel_data:
+                channels[video.channel_id] = record_from_dict(ChannelRecord, json.loads(channel_data))
+        return videos, channels
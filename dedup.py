@@ -0,0 +1,185 @@
+"""
+Near-duplicate detection for re-uploaded Shorts.
+
+Uses MinHash signatures with LSH banding so each new video is only compared
+against the handful of videos sharing a band bucket, never the whole corpus.
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# ================== TEXT NORMALIZATION ==================
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_HASHTAG_RE = re.compile(r"#\w+")
+_NON_WORD_RE = re.compile(r"[^a-z0-9ñ ]+")
+_OTHER_NON_ASCII_RE = re.compile(r"[^\x00-\x7fñ]")
+
+# Fast path for the usual Spanish accents; anything else goes through NFKD
+_ACCENT_TABLE = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+
+# Words that say nothing about which clip it is
+_NOISE_WORDS = {
+    "shorts", "short", "viral", "parati", "fyp", "motivacion", "motivacional",
+    "video", "videos", "el", "la", "los", "las", "de", "del", "en", "y", "a",
+    "que", "un", "una", "por", "para", "con", "tu", "te", "mi", "es", "lo",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents, URLs, hashtags and punctuation."""
+    if not text:
+        return ""
+    text = text.lower().translate(_ACCENT_TABLE)
+    if _OTHER_NON_ASCII_RE.search(text):
+        text = text.replace("ñ", "\0")
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c)).replace("\0", "ñ")
+    text = _URL_RE.sub(" ", text)
+    text = _HASHTAG_RE.sub(" ", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def build_shingles(title: str, tags: Iterable[str] = (), description: str = "") -> List[str]:
+    """Build the shingle set used for similarity from title, tags and description."""
+    title_words = [w for w in normalize_text(title).split() if w not in _NOISE_WORDS]
+    desc_words = [w for w in normalize_text(description).split() if w not in _NOISE_WORDS][:40]
+
+    shingles = set()
+    for prefix, words in (("t", title_words), ("d", desc_words)):
+        if len(words) == 1:
+            shingles.add(f"{prefix}:{words[0]}")
+        for i in range(len(words) - 1):
+            shingles.add(f"{prefix}:{words[i]} {words[i + 1]}")
+    for tag in tags or ():
+        tag = normalize_text(tag)
+        if tag and tag not in _NOISE_WORDS:
+            shingles.add(f"g:{tag}")
+    return sorted(shingles)
+
+# ================== MINHASH INDEX ==================
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index that clusters near-duplicate videos.
+
+    Videos are added one at a time as rows arrive; candidates come only from
+    shared LSH buckets and are confirmed by estimated Jaccard similarity.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.5, seed: int = 7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[tuple, List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._parent: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._parent
+
+    def signature(self, shingles: List[str]) -> Optional[np.ndarray]:
+        """Compute the MinHash signature of a shingle set."""
+        if not shingles:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def add(self, key: str, title: str, tags: Iterable[str] = (), description: str = "") -> str:
+        """Add a video and return the ID of the cluster it joined."""
+        if key in self._parent:
+            return self.find(key)
+        self._parent[key] = key
+
+        sig = self.signature(build_shingles(title, tags, description))
+        if sig is None:
+            return key
+        self._signatures[key] = sig
+
+        checked = set()
+        for band in range(self.bands):
+            start = band * self.rows
+            bucket_key = (band, sig[start:start + self.rows].tobytes())
+            members = self._buckets.setdefault(bucket_key, [])
+            # Bucket members need not match each other, so every one is a candidate (once across bands)
+            for other in members:
+                if other in checked:
+                    continue
+                checked.add(other)
+                if self.find(other) != self.find(key) and self.similarity(key, other) >= self.threshold:
+                    self._union(key, other)
+            members.append(key)
+
+        return self.find(key)
+
+    def similarity(self, key_a: str, key_b: str) -> float:
+        """Estimated Jaccard similarity between two indexed videos."""
+        sig_a = self._signatures.get(key_a)
+        sig_b = self._signatures.get(key_b)
+        if sig_a is None or sig_b is None:
+            return 0.0
+        return float(np.count_nonzero(sig_a == sig_b)) / self.num_perm
+
+    def find(self, key: str) -> str:
+        """Return the cluster ID for a video (union-find with path halving)."""
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def _union(self, key_a: str, key_b: str) -> None:
+        root_a, root_b = self.find(key_a), self.find(key_b)
+        if root_a != root_b:
+            # Keep the older entry as root so cluster IDs stay stable
+            self._parent[root_a] = root_b
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """Group every indexed video by cluster ID."""
+        groups: Dict[str, List[str]] = {}
+        for key in self._parent:
+            groups.setdefault(self.find(key), []).append(key)
+        return groups
+
+
+def collapse_rows(rows: List[Dict], keep: str = "best") -> List[Dict]:
+    """
+    Keep one result row per near-duplicate cluster, with its size in "Copias".
+
+    `keep` is "best" (highest score, then views) or "earliest" (oldest upload).
+    """
+    index = NearDuplicateIndex()
+    for row in rows:
+        index.add(row["Video ID"], row["Título"], row["Tags"].split(", "), row["Descripción"])
+
+    groups: Dict[str, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(index.find(row["Video ID"]), []).append(row)
+
+    order = ("Días Online", "Vistas") if keep == "earliest" else ("Score Viralidad", "Vistas")
+    return [
+        {**max(members, key=lambda r: tuple(r[k] for k in order)), "Grupo Duplicado": cluster, "Copias": len(members)}
+        for cluster, members in groups.items()
+    ]
@@ -0,0 +1,190 @@
+"""
+Deterministic in-process fake of the YouTube Data API endpoints the app uses.
+
+Install it with `youtube_api.set_transport(FakeYouTubeAPI())` to run scans
+offline (load tests, demos). Responses are derived from a hash of the
+request, so the same query always returns the same videos and ETags, and a
+matching `If-None-Match` gets a 304.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from youtube_api import YOUTUBE_CHANNEL_URL, YOUTUBE_PLAYLIST_ITEMS_URL, YOUTUBE_SEARCH_URL, YOUTUBE_VIDEO_URL
+
+# Titles are drawn from this vocabulary so distinct videos don't look like re-uploads
+VOCABULARY = (
+    "secreto vida éxito mentalidad disciplina hábitos metas sueños triunfo fracaso esfuerzo "
+    "perseverancia motivación cambio rutina mañana dinero negocio emprender enfoque tiempo "
+    "miedo confianza fuerza paciencia gratitud lectura ejercicio dieta salud sueño estudio "
+    "trabajo familia amigos viaje historia consejo error lección verdad método regla "
+    "minuto semana año camino puerta montaña río ciudad silencio música libro frase"
+).split()
+
+COUNTRIES = ["ES", "MX", "AR", "CO", "CL", "US", "N/A"]
+
+
+def _seed(*parts: str) -> int:
+    return int(hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()[:12], 16)
+
+
+class FakeResponse:
+    """Minimal `requests.Response` stand-in."""
+
+    def __init__(self, status_code: int, body: Dict = None, etag: str = ""):
+        self.status_code = status_code
+        self._body = body or {}
+        self.content = json.dumps(self._body).encode("utf-8") if body is not None else b""
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self) -> Dict:
+        return self._body
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class FakeYouTubeAPI:
+    """
+    Thread-safe fake transport with a fixed per-call latency.
+
+    `calls` counts requests per endpoint name ("search", "videos", ...) and
+    `not_modified` counts 304 answers. A `region_overlap` share of each
+    query's hits is the same in every region, like real Spanish searches.
+    Searches honour publishedAfter/publishedBefore and, like the real API,
+    page through at most `result_cap` hits however many match.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        results_per_query: int = 200,
+        channels: int = 200,
+        region_overlap: float = 0.7,
+        result_cap: int = 500,
+    ):
+        self.latency = latency
+        self.results_per_query = results_per_query
+        self.result_cap = result_cap
+        self.channels = channels
+        self.region_overlap = region_overlap
+        self.calls: Counter = Counter()
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, params: Dict, headers: Dict, timeout: float) -> FakeResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        name = url.rsplit("/", 1)[-1]
+        body = self._body(url, params)
+        etag = '"%x"' % _seed(json.dumps(body, sort_keys=True))
+        with self._lock:
+            self.calls[name] += 1
+            if headers.get("If-None-Match") == etag:
+                self.not_modified += 1
+                return FakeResponse(304, etag=etag)
+        body["etag"] = etag
+        return FakeResponse(200, body, etag)
+
+    # ================== RESPONSES ==================
+
+    def _body(self, url: str, params: Dict) -> Dict:
+        if url == YOUTUBE_SEARCH_URL:
+            return self._search(params)
+        if url == YOUTUBE_VIDEO_URL:
+            return {"items": [self._video(v) for v in params["id"].split(",") if v]}
+        if url == YOUTUBE_CHANNEL_URL:
+            return {"items": [self._channel(c) for c in params["id"].split(",") if c]}
+        if url == YOUTUBE_PLAYLIST_ITEMS_URL:
+            return {"items": self._playlist_items(params)}
+        return {"items": []}
+
+    def _video_id(self, *parts: str) -> str:
+        return "v%010x" % (_seed(*parts) % 16 ** 10)
+
+    def _channel_id(self, video_id: str) -> str:
+        return "UC%022d" % (_seed(video_id) % self.channels)
+
+    def _search(self, params: Dict) -> Dict:
+        """One page of a query's hits, most viewed first, like `order=viewCount`."""
+        query, region = params.get("q", ""), params.get("regionCode", "")
+        shared = int(self.results_per_query * self.region_overlap)
+        after = params.get("publishedAfter", "")
+        before = params.get("publishedBefore") or "9999"
+        ranked = sorted(
+            (
+                video_id
+                for video_id in (
+                    self._video_id(query, region if i >= shared else "", str(i)) for i in range(self.results_per_query)
+                )
+                if after <= self._published_at(video_id) < before
+            ),
+            key=self._views, reverse=True,
+        )
+        offset = int(params.get("pageToken") or 0)
+        end = min(offset + min(int(params.get("maxResults", 5)), 50), self.result_cap)
+        body = {
+            "pageInfo": {"totalResults": len(ranked)},
+            "items": [
+                {"id": {"videoId": video_id}, "snippet": {"channelId": self._channel_id(video_id)}}
+                for video_id in ranked[offset:end]
+            ],
+        }
+        if end < min(len(ranked), self.result_cap):
+            body["nextPageToken"] = str(end)
+        return body
+
+    def _published_at(self, video_id: str) -> str:
+        """Upload time 1-21 days ago, spread over the day (stable within the hour)."""
+        seed = _seed(video_id)
+        now = int(time.time()) // 3600 * 3600
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - (seed % 20 + 1) * 86400 + (seed >> 8) % 86400))
+
+    def _views(self, video_id: str) -> int:
+        return 1_000 + _seed(video_id) % 5_000_000
+
+    def _video(self, video_id: str) -> Dict:
+        seed = _seed(video_id)
+        words = random.Random(seed).sample(VOCABULARY, 9)
+        views = self._views(video_id)
+        return {
+            "id": video_id,
+            "snippet": {
+                "title": f"El {words[0]} de la {words[1]}: {words[2]}, {words[3]} y {words[4]}",
+                "description": f"Un short sobre {words[5]} y {words[6]} para que no te rindas.",
+                "channelId": self._channel_id(video_id),
+                "channelTitle": f"Canal {seed % self.channels}",
+                "publishedAt": self._published_at(video_id),
+                "tags": words[7:] + ["shorts"],
+                "thumbnails": {"default": {"url": f"https://i.ytimg.com/vi/{video_id}/default.jpg"}},
+            },
+            "statistics": {
+                "viewCount": str(views),
+                "likeCount": str(views // (20 + seed % 30)),
+                "commentCount": str(views // (300 + seed % 500)),
+            },
+            "contentDetails": {"duration": f"PT{15 + seed % 45}S"},
+        }
+
+    def _channel(self, channel_id: str) -> Dict:
+        seed = _seed(channel_id)
+        return {
+            "id": channel_id,
+            "snippet": {"country": COUNTRIES[seed % len(COUNTRIES)]},
+            "statistics": {"subscriberCount": str(500 + seed % 60_000)},
+        }
+
+    def _playlist_items(self, params: Dict) -> List[Dict]:
+        playlist_id = params.get("playlistId", "")
+        items = []
+        for i in range(int(params.get("maxResults", 10))):
+            items.append({"contentDetails": {
+                "videoId": self._video_id(playlist_id, str(i)),
+                "videoPublishedAt": time.strftime("%Y-%m-%dT%H:00:00Z", time.gmtime(time.time() - (i + 1) * 86400)),
+            }})
+        return items
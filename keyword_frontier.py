@@ -0,0 +1,216 @@
+"""
+Tag-driven keyword frontier that grows the catalog per category.
+
+Tags and title n-grams of result videos become candidate keywords, scored
+by how many videos carry them and how viral those videos are. Each sweep
+spends a small share of its searches probing the top candidates; those
+that find enough new videos are promoted into a persisted extended catalog,
+the rest are set aside.
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List
+
+from corpus_index import STOPWORDS
+from dedup import normalize_text
+from paths import CACHE_DIR
+from scanner import query_keywords
+
+DEFAULT_FRONTIER_PATH = os.path.join(CACHE_DIR, "keyword_frontier.json")
+
+# Tags that say nothing about the niche
+GENERIC_TAGS = {
+    "short", "shorts", "youtube", "youtube shorts", "viral", "fyp", "parati", "para ti",
+    "tiktok", "reels", "trending", "tendencia", "video", "videos",
+}
+
+# Candidates need this many videos before they are probed
+MIN_SUPPORT = 2
+# Shrinks the average score of rarely seen terms towards PRIOR_SCORE
+PRIOR_SCORE = 20.0
+PRIOR_WEIGHT = 3
+MAX_CANDIDATES = 2000
+# Videos remembered per category so repeated scans don't count them twice
+MAX_OBSERVED = 20_000
+# A probe is promoted when it finds at least this many new result rows ...
+PROMOTE_MIN_ROWS = 2
+# ... and at least this share of what a catalog keyword found in the same sweep
+PROMOTE_RATIO = 0.5
+# Rejected candidates may be probed again after this long
+REPROBE_SECONDS = 30 * 24 * 3600
+
+
+def _is_term(words: List[str]) -> bool:
+    return (
+        bool(words)
+        and words[0] not in STOPWORDS
+        and words[-1] not in STOPWORDS
+        and not all(w.isdigit() for w in words)
+        and len(" ".join(words)) >= 4
+    )
+
+
+def row_terms(row: Dict) -> Dict[str, str]:
+    """Candidate keywords of one result row: its tags and title bi/trigrams -> source."""
+    terms: Dict[str, str] = {}
+    for tag in row.get("Tags", "").split(", "):
+        words = normalize_text(tag).split()
+        if 1 <= len(words) <= 4 and _is_term(words) and " ".join(words) not in GENERIC_TAGS:
+            terms[" ".join(words)] = "tag"
+    words = normalize_text(row.get("Título", "")).split()
+    for n in (2, 3):
+        for i in range(len(words) - n + 1):
+            gram = words[i:i + n]
+            if _is_term(gram):
+                terms.setdefault(" ".join(gram), "title")
+    return terms
+
+
+def candidate_score(candidate: Dict) -> float:
+    """Expected yield: shrunk average virality of the carrying videos × log of their count."""
+    mean = (candidate["score_sum"] + PRIOR_SCORE * PRIOR_WEIGHT) / (candidate["videos"] + PRIOR_WEIGHT)
+    return round(mean * math.log1p(candidate["videos"]), 2)
+
+
+class KeywordFrontier:
+    """JSON-file frontier of candidate, promoted and rejected keywords per category."""
+
+    def __init__(self, path: str = DEFAULT_FRONTIER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._categories: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self._categories = json.load(fh)
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Per process: the app, the service and workers may save the same file at once
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self._categories, fh, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _category(self, category: str) -> Dict:
+        return self._categories.setdefault(
+            category, {"candidates": {}, "promoted": {}, "rejected": {}, "observed": {}}
+        )
+
+    def observe(self, category: str, rows: Iterable[Dict], known_keywords: Iterable[str] = ()) -> int:
+        """Mine tags and title n-grams of result rows into candidates; returns videos newly counted."""
+        known = {normalize_text(k) for k in known_keywords}
+        now = time.time()
+        counted = 0
+        with self._lock:
+            state = self._category(category)
+            candidates, observed = state["candidates"], state["observed"]
+            for row in rows:
+                if row["Video ID"] in observed:
+                    continue
+                observed[row["Video ID"]] = now
+                counted += 1
+                for term, source in row_terms(row).items():
+                    if term in known or term in state["promoted"] or term in state["rejected"]:
+                        continue
+                    candidate = candidates.setdefault(term, {"videos": 0, "score_sum": 0.0, "source": source})
+                    candidate["videos"] += 1
+                    candidate["score_sum"] += row["Score Viralidad"]
+
+            if len(observed) > MAX_OBSERVED:
+                state["observed"] = dict(sorted(observed.items(), key=lambda kv: kv[1])[-MAX_OBSERVED:])
+            if len(candidates) > MAX_CANDIDATES:
+                keep = heapq.nlargest(MAX_CANDIDATES, candidates, key=lambda t: candidate_score(candidates[t]))
+                state["candidates"] = {t: candidates[t] for t in keep}
+            self._save()
+        return counted
+
+    def top_candidates(self, category: str, n: int = 10) -> List[Dict]:
+        """Highest expected-yield candidates with enough support, best first."""
+        now = time.time()
+        with self._lock:
+            state = self._category(category)
+            # Rejections expire, so a term whose niche grows can be probed again
+            for term, entry in list(state["rejected"].items()):
+                if entry["probed_at"] < now - REPROBE_SECONDS:
+                    del state["rejected"][term]
+            ranked = heapq.nlargest(
+                n,
+                ((candidate_score(c), term, c) for term, c in state["candidates"].items() if c["videos"] >= MIN_SUPPORT),
+                key=lambda item: item[0],
+            )
+        return [
+            {"keyword": term, "score": score, "videos": c["videos"], "source": c["source"]}
+            for score, term, c in ranked
+        ]
+
+    def record_probe(self, category: str, keyword: str, rows: List[Dict], baseline: float) -> bool:
+        """
+        Judge a probed candidate by the new result rows its search found.
+
+        Promoted when it found at least PROMOTE_MIN_ROWS and PROMOTE_RATIO
+        of `baseline` (mean rows per catalog keyword in the same sweep).
+        """
+        new_rows = len(rows)
+        entry = {
+            "rows": new_rows,
+            "avg_score": round(sum(r["Score Viralidad"] for r in rows) / new_rows, 1) if rows else 0.0,
+            "probed_at": time.time(),
+        }
+        promoted = new_rows >= max(PROMOTE_MIN_ROWS, PROMOTE_RATIO * baseline)
+        with self._lock:
+            state = self._category(category)
+            state["candidates"].pop(keyword, None)
+            state["promoted" if promoted else "rejected"][keyword] = entry
+            self._save()
+        return promoted
+
+    def record_sweep(
+        self, category: str, task_results: List[Dict], probes: List[str], known_keywords: Iterable[str] = ()
+    ) -> Dict:
+        """
+        Update the frontier after a sweep: judge its probe searches against
+        the catalog keywords' mean yield, then mine every result row.
+
+        An OR-batched catalog search packs several keywords (and asks for
+        that many more results), so its rows count per packed keyword.
+        """
+        probe_set = set(probes)
+        searches = [t for t in task_results if "keyword" in t]
+        catalog_rows = [
+            len(t["rows"]) / len(query_keywords(t["keyword"])) for t in searches if t["keyword"] not in probe_set
+        ]
+        baseline = sum(catalog_rows) / len(catalog_rows) if catalog_rows else 0.0
+
+        outcome = {"observed": 0, "promoted": [], "rejected": [], "baseline": round(baseline, 1)}
+        for task_result in searches:
+            if task_result["keyword"] in probe_set and not task_result.get("error"):
+                promoted = self.record_probe(category, task_result["keyword"], task_result["rows"], baseline)
+                outcome["promoted" if promoted else "rejected"].append(task_result["keyword"])
+        outcome["observed"] = self.observe(
+            category, (row for t in task_results for row in t["rows"]), known_keywords
+        )
+        return outcome
+
+    def extended_keywords(self, category: str) -> List[str]:
+        """Promoted keywords of a category, highest yield first."""
+        with self._lock:
+            promoted = self._category(category)["promoted"]
+            return sorted(promoted, key=lambda k: -promoted[k]["rows"])
+
+    def promoted(self, category: str) -> Dict[str, Dict]:
+        with self._lock:
+            return dict(self._category(category)["promoted"])
+
+    def demote(self, category: str, keyword: str) -> None:
+        """Drop a promoted keyword from the extended catalog (it will not be probed again soon)."""
+        with self._lock:
+            state = self._category(category)
+            entry = state["promoted"].pop(keyword, None)
+            if entry is not None:
+                state["rejected"][keyword] = {**entry, "probed_at": time.time()}
+                self._save()
@@ -0,0 +1,310 @@
+"""
+Multi-user load test: N concurrent headless sessions against the fake API.
+
+Each simulated user drives its own `streamlit.testing.v1.AppTest` session
+of app.py through load → search → re-filter → sort/page → export, in its
+own process: AppTest swaps process-wide globals on every run and is not
+thread-safe. The sessions share the on-disk state (usage log, corpus,
+archive) but not the in-memory API cache, so API calls are those of N
+cold servers, an upper bound. Reports p50/p95 latency per interaction
+with the sessions that failed it, RSS growth per session and API calls
+issued.
+
+    python loadtest.py --users 20 --latency 0.05
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+from unittest import mock
+
+from fake_api import FakeYouTubeAPI
+from youtube_api import response_cache, set_transport, stats_delta
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SEARCH_BUTTON = "🚀 Buscar Shorts Virales"
+INTERACTIONS = ["load", "search", "filter", "sort_page", "export"]
+EXPORT_BUTTONS = ["📄 Descargar CSV", "📊 Descargar Excel"]
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Peak RSS as a fallback (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+# ================== USER SESSION ==================
+
+class SimulatedUser:
+    """One browser session scripted through the search / re-filter / export flow."""
+
+    def __init__(self, user_id: int, timeout: float, filter_text: str):
+        from streamlit.testing.v1 import AppTest
+
+        self.user_id = user_id
+        self.filter_text = filter_text
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.session_state["api_key"] = "loadtest-key"
+        self.timings: Dict[str, float] = {}
+        self.failed_step = ""
+        self.error = ""
+        self.result_rows = 0
+        self.export_bytes = 0
+
+    def _timed(self, name: str, action) -> None:
+        started = time.perf_counter()
+        try:
+            action()
+            if self.at.exception:
+                raise RuntimeError(self.at.exception[0].value)
+        except Exception:
+            self.failed_step = name
+            raise
+        self.timings[name] = time.perf_counter() - started
+
+    def _download(self) -> None:
+        """Rerun (rebuilding the exports) and fetch the CSV and Excel bytes the download buttons serve."""
+        import streamlit.testing.v1.app_test as app_test
+
+        # AppTest drops its media file manager after each run; keep this run's to read the downloads
+        managers = []
+
+        class RecordingMediaFileManager(app_test.MediaFileManager):
+            def __init__(self, storage):
+                super().__init__(storage)
+                managers.append(self)
+
+        with mock.patch.object(app_test, "MediaFileManager", RecordingMediaFileManager):
+            self.at.run()
+        if self.at.exception:
+            return
+        buttons = {b.proto.label: b.proto.url for b in self.at.get("download_button")}
+        storage = managers[-1]._storage
+        for label in EXPORT_BUTTONS:
+            if label not in buttons:
+                raise RuntimeError(f"no se mostró '{label}'")
+            self.export_bytes += len(storage.get_file(buttons[label].rsplit("/", 1)[-1]).content)
+
+    def run(self) -> None:
+        at = self.at
+        try:
+            self._timed("load", at.run)
+            search = next(b for b in at.button if b.label == SEARCH_BUTTON)
+            self._timed("search", lambda: search.click().run())
+            results_df = at.session_state["results_df"] if "results_df" in at.session_state else None
+            self.result_rows = 0 if results_df is None else len(results_df)
+            if not self.result_rows:
+                self.failed_step = "search"
+                raise RuntimeError("search returned no results")
+            self._timed("filter", lambda: at.text_input(key="results_filter").input(self.filter_text).run())
+
+            def sort_and_page():
+                at.selectbox(key="results_sort").select("Vistas")
+                at.number_input(key="results_page").set_value(1)
+                at.run()
+
+            self._timed("sort_page", sort_and_page)
+            self._timed("export", self._download)
+        except Exception as e:  # report, don't abort the whole run
+            self.error = f"{self.failed_step}: {e or e.__class__.__name__}"
+
+
+def run_session(user_id: int, latency: float, timeout: float, filter_text: str, start_gate, results) -> None:
+    """Process entry point: run one session against a fake API and put its figures on `results`."""
+    fake = FakeYouTubeAPI(latency=latency)
+    set_transport(fake)
+    api_before = response_cache.snapshot()
+
+    # Import-time memory (Streamlit, pandas, app modules) shouldn't count as per-session growth
+    warmup = SimulatedUser(-1, timeout, filter_text)
+    warmup.at.run()
+    del warmup
+
+    session = SimulatedUser(user_id, timeout, filter_text)
+    rss_before = rss_bytes()
+    try:
+        start_gate.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass  # another session's process died before starting; run anyway
+    started_at = time.time()
+    session.run()
+    results.put({
+        "user_id": user_id,
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "timings": session.timings,
+        "failed_step": session.failed_step,
+        "error": session.error,
+        "result_rows": session.result_rows,
+        "export_bytes": session.export_bytes,
+        "rss_before": rss_before,
+        "rss_after": rss_bytes(),
+        "api_calls": dict(fake.calls),
+        "api_not_modified": fake.not_modified,
+        "cache": stats_delta(api_before, response_cache.snapshot()),
+        "cache_usage": response_cache.usage(),
+    })
+
+# ================== RUNNER ==================
+
+def run_load_test(users: int, latency: float, timeout: float, filter_text: str) -> Dict:
+    """Run `users` concurrent sessions, one process each, and collect latency, memory and API figures."""
+    context = multiprocessing.get_context("spawn")
+    start_gate = context.Barrier(users)
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_session, args=(i, latency, timeout, filter_text, start_gate, results), daemon=True)
+        for i in range(users)
+    ]
+
+    for process in processes:
+        process.start()
+    sessions = {}
+    while len(sessions) < users and any(p.is_alive() for p in processes):
+        try:
+            session = results.get(timeout=1)
+            sessions[session["user_id"]] = session
+        except queue.Empty:
+            pass
+    while not results.empty():
+        session = results.get()
+        sessions[session["user_id"]] = session
+    for process in processes:
+        process.join()
+    # From the start gate to the last session done, leaving out process start-up and warm-up
+    reported = list(sessions.values())
+    wall_seconds = (
+        max(s["finished_at"] for s in reported) - min(s["started_at"] for s in reported) if reported else 0.0
+    )
+
+    # A process that died without reporting fails every interaction from the first
+    for user_id, process in enumerate(processes):
+        if user_id not in sessions:
+            sessions[user_id] = {
+                "user_id": user_id, "timings": {}, "failed_step": INTERACTIONS[0],
+                "error": f"{INTERACTIONS[0]}: el proceso terminó con código {process.exitcode}",
+                "result_rows": 0, "export_bytes": 0, "rss_before": 0, "rss_after": 0,
+                "api_calls": {}, "api_not_modified": 0, "cache": {}, "cache_usage": {},
+            }
+    sessions = [sessions[user_id] for user_id in range(users)]
+
+    latencies = defaultdict(list)
+    failed = Counter()
+    skipped = Counter()
+    for session in sessions:
+        for name, seconds in session["timings"].items():
+            latencies[name].append(seconds)
+        if session["failed_step"]:
+            failed[session["failed_step"]] += 1
+            for name in INTERACTIONS[INTERACTIONS.index(session["failed_step"]) + 1:]:
+                skipped[name] += 1
+
+    api_calls = Counter()
+    cache = Counter()
+    cache_usage = Counter()
+    for session in sessions:
+        api_calls.update(session["api_calls"])
+        cache.update(session["cache"])
+        cache_usage.update({k: session["cache_usage"].get(k, 0) for k in ("entries", "stored_bytes", "raw_bytes", "evictions")})
+    reported = [s for s in sessions if s["rss_after"]]
+
+    return {
+        "users": users,
+        "wall_seconds": wall_seconds,
+        "errors": [f"user {s['user_id']}: {s['error']}" for s in sessions if s["error"]],
+        "result_rows": statistics.mean([s["result_rows"] for s in sessions]) if sessions else 0,
+        "export_bytes": statistics.mean([s["export_bytes"] for s in sessions if s["export_bytes"]] or [0]),
+        "latency": {
+            name: {
+                "p50": percentile(latencies[name], 50),
+                "p95": percentile(latencies[name], 95),
+                "n": len(latencies[name]),
+                "failed": failed[name],
+                "skipped": skipped[name],
+            }
+            for name in INTERACTIONS
+        },
+        "rss_before": statistics.mean([s["rss_before"] for s in reported]) if reported else 0,
+        "rss_after": statistics.mean([s["rss_after"] for s in reported]) if reported else 0,
+        "rss_per_session": statistics.mean([s["rss_after"] - s["rss_before"] for s in reported]) if reported else 0,
+        "api_calls": dict(api_calls),
+        "api_not_modified": sum(s["api_not_modified"] for s in sessions),
+        "cache": dict(cache),
+        "cache_usage": dict(cache_usage),
+    }
+
+
+def print_report(report: Dict) -> None:
+    mib = 1024 * 1024
+    print(f"\n{report['users']} usuarios concurrentes (un proceso cada uno) · {report['wall_seconds']:.1f}s en total · "
+          f"{report['result_rows']:.0f} filas por sesión · {report['export_bytes'] / 1024:.0f} KB exportados (CSV + Excel)")
+    print(f"\n{'interacción':<12}{'p50 (s)':>10}{'p95 (s)':>10}{'n':>6}{'fallos':>8}{'omitidas':>10}")
+    for name, row in report["latency"].items():
+        print(f"{name:<12}{row['p50']:>10.3f}{row['p95']:>10.3f}{row['n']:>6}{row['failed']:>8}{row['skipped']:>10}")
+
+    print(f"\nRSS por proceso: {report['rss_before'] / mib:.1f} MiB → {report['rss_after'] / mib:.1f} MiB "
+          f"({report['rss_per_session'] / mib:+.2f} MiB por sesión)")
+
+    calls = report["api_calls"]
+    cache = report["cache"]
+    print(f"Llamadas API emitidas (caché en memoria por proceso): {sum(calls.values())} "
+          f"({', '.join(f'{k}: {v}' for k, v in sorted(calls.items())) or 'ninguna'}) · "
+          f"{cache.get('quota_units', 0):,} unidades de cuota")
+    print(f"Caché: {cache.get('cache_hits', 0)} aciertos · {cache.get('coalesced', 0)} coalescidas · "
+          f"{report['api_not_modified']} respuestas 304")
+    usage = report["cache_usage"]
+    print(f"Caché en memoria (suma de procesos): {usage.get('entries', 0)} respuestas · "
+          f"{usage.get('stored_bytes', 0) / mib:.2f} MiB comprimidas de {usage.get('raw_bytes', 0) / mib:.2f} MiB · "
+          f"{usage.get('evictions', 0)} expulsadas por espacio")
+
+    if report["errors"]:
+        print(f"\n{len(report['errors'])} sesiones con error:")
+        for error in report["errors"]:
+            print(f"  - {error}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the app with concurrent headless sessions.")
+    parser.add_argument("--users", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API latency per call (s)")
+    parser.add_argument("--timeout", type=float, default=300, help="max seconds per interaction")
+    parser.add_argument("--filter", default="secreto", help="text typed into the results filter")
+    args = parser.parse_args(argv)
+
+    # Keep the run's watchlist, usage log, corpus and queue out of the real cache (inherited by the sessions)
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as cache_dir:
+        os.environ["APP_CACHE_DIR"] = cache_dir
+        for name in ("SWEEP_QUEUE_DB", "CORPUS_INDEX_DB", "PREWARM_ENABLED"):
+            os.environ.pop(name, None)
+        report = run_load_test(args.users, args.latency, args.timeout, args.filter)
+
+    print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""Where the app keeps its local state (override with APP_CACHE_DIR)."""
+
+import os
+
+CACHE_DIR = os.environ.get(
+    "APP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
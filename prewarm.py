@@ -0,0 +1,225 @@
+"""
+Cache pre-warmer for the most-requested category × region combinations.
+
+Shortly before the busiest hours in the usage log, it re-runs the top
+(category, region, days) searches so interactive users hit a warm cache.
+Spending is capped at a share of the daily API quota.
+
+Only search pages are warmed in the app: their keys match a default scan
+(one keyword per search, one region at a time), while a scan's detail
+batches depend on its filters, on what the corpus already knows and on
+the videos earlier searches in the same scan returned, so warmed detail
+batches would rarely be hit. A headless process has its own memory cache;
+it runs whole search tasks to fill the shared corpus index instead.
+
+Runs in-process (started by the app when PREWARM_ENABLED=1) or headless:
+
+    YOUTUBE_API_KEY=... python prewarm.py --once
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from catalog import NICHE_KEYWORDS, REGION_NAMES
+from corpus_index import CorpusIndex
+from paths import CACHE_DIR
+from scanner import SEARCH_PAGE_SIZE, default_filters, run_search_task, search_start_date
+from usage_log import Combination, UsageLog
+from youtube_api import (
+    CACHE_TTL_SECONDS,
+    QUOTA_COST,
+    YOUTUBE_CHANNEL_URL,
+    YOUTUBE_SEARCH_URL,
+    YOUTUBE_VIDEO_URL,
+    cached_search_shorts,
+    request_meter,
+)
+
+DEFAULT_STATE_PATH = os.path.join(CACHE_DIR, "prewarm_state.json")
+
+DAILY_QUOTA = int(os.environ.get("YOUTUBE_DAILY_QUOTA", 10_000))
+PREWARM_QUOTA_SHARE = float(os.environ.get("PREWARM_QUOTA_SHARE", 0.2))
+
+
+def estimate_cost(combo: Combination, details: bool = False) -> int:
+    """Worst-case quota units to warm one combination (cache misses everywhere)."""
+    keywords = len(NICHE_KEYWORDS.get(combo[0], []))
+    pages = math.ceil(combo[3] / SEARCH_PAGE_SIZE)
+    per_page = QUOTA_COST[YOUTUBE_SEARCH_URL]
+    if details:
+        per_page += QUOTA_COST[YOUTUBE_VIDEO_URL] + QUOTA_COST[YOUTUBE_CHANNEL_URL]
+    return keywords * pages * per_page
+
+
+class Prewarmer:
+    """
+    Plans and runs pre-warm passes within a daily quota budget. With a
+    `corpus`, each pass runs whole search tasks (details included) into it.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        usage_log: Optional[UsageLog] = None,
+        corpus: Optional[CorpusIndex] = None,
+        daily_quota: int = DAILY_QUOTA,
+        quota_share: float = PREWARM_QUOTA_SHARE,
+        top_n: int = 5,
+        lead_minutes: int = 30,
+        state_path: str = DEFAULT_STATE_PATH,
+    ):
+        self.api_key = api_key
+        self.usage_log = usage_log or UsageLog()
+        self.corpus = corpus
+        self.budget = int(daily_quota * quota_share)
+        self.top_n = top_n
+        self.lead_minutes = lead_minutes
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_report: List[str] = []
+        self.state = {"day": "", "units": 0, "warmed": {}}
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as fh:
+                self.state.update(json.load(fh))
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as fh:
+            json.dump(self.state, fh)
+
+    def quota_left(self, now: float) -> int:
+        """Pre-warm units still available today (UTC day, like the API quota); read-only."""
+        day, units = self.state["day"], self.state["units"]
+        return self.budget - (units if day == time.strftime("%Y-%m-%d", time.gmtime(now)) else 0)
+
+    def due_combinations(self, now: Optional[float] = None) -> List[Combination]:
+        """Top combinations to refresh now: a peak hour is coming up and their cache would be expired by then."""
+        now = time.time() if now is None else now
+        events = self.usage_log.events(now=now)
+        peaks = self.usage_log.peak_hours(events=events)
+        upcoming_hour = time.gmtime(now + self.lead_minutes * 60).tm_hour
+        if upcoming_hour not in peaks:
+            return []
+
+        due = []
+        for combo, _ in self.usage_log.top_combinations(self.top_n, events=events):
+            warmed_at = self.state["warmed"].get(json.dumps(combo), 0)
+            # Refresh if the cached entry would already be expired when the peak starts
+            if warmed_at + CACHE_TTL_SECONDS < now + self.lead_minutes * 60:
+                due.append(combo)
+        return due
+
+    def _warm_search(self, keyword: str, region_code: str, start_date: str, results_per_keyword: int) -> None:
+        """Fetch a keyword's search pages with the same parameters as `run_search_task`."""
+        remaining = results_per_keyword
+        page_token = None
+        while remaining > 0:
+            search_data = cached_search_shorts(
+                keyword, start_date, region_code, self.api_key,
+                min(remaining, SEARCH_PAGE_SIZE), language="es", page_token=page_token
+            )
+            items = search_data.get("items", [])
+            remaining -= len(items)
+            page_token = search_data.get("nextPageToken")
+            if "error" in search_data or not items or not page_token:
+                break
+
+    def warm(self, combo: Combination, now: Optional[float] = None) -> int:
+        """Warm every keyword of a combination; returns the units this pass itself spent."""
+        category, region_code, days, results_per_keyword = combo
+        # The window peak-hour users will ask for, not the one current as we warm ahead of them
+        now = time.time() if now is None else now
+        start_date = search_start_date(days, datetime.utcfromtimestamp(now + self.lead_minutes * 60))
+        # Meter this pass's own requests: interactive scans running meanwhile are not charged to it
+        meter = Counter()
+        token = request_meter.set(meter)
+        try:
+            seen_video_ids = set()
+            for keyword in NICHE_KEYWORDS.get(category, []):
+                if self.corpus is None:
+                    self._warm_search(keyword, region_code, start_date, results_per_keyword)
+                else:
+                    run_search_task(
+                        keyword, REGION_NAMES.get(region_code, region_code), region_code, start_date, self.api_key,
+                        results_per_keyword, default_filters(category), seen_video_ids, self.corpus
+                    )
+        finally:
+            request_meter.reset(token)
+        return meter["quota_units"]
+
+    def run_once(self, now: Optional[float] = None) -> List[str]:
+        """Warm whatever is due and affordable; returns a short report."""
+        now = time.time() if now is None else now
+        report = []
+        with self._lock:
+            today = time.strftime("%Y-%m-%d", time.gmtime(now))
+            if self.state["day"] != today:
+                self.state.update(day=today, units=0)
+            for combo in self.due_combinations(now):
+                left = self.quota_left(now)
+                if estimate_cost(combo, details=self.corpus is not None) > left:
+                    report.append(f"skip {combo}: {left} units left of {self.budget}")
+                    continue
+                spent = self.warm(combo, now)
+                self.state["units"] += spent
+                self.state["warmed"][json.dumps(combo)] = now
+                report.append(f"warmed {combo}: {spent} units")
+            self._save_state()
+        self.last_report = report
+        return report
+
+    def start_background(self, interval: float = 300) -> threading.Thread:
+        """Run `run_once` every `interval` seconds in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            def loop() -> None:
+                while True:
+                    try:
+                        self.run_once()
+                    except Exception as e:  # never let the thread die
+                        self.last_report = [f"error: {type(e).__name__}: {e}"]
+                    time.sleep(interval)
+
+            self._thread = threading.Thread(target=loop, name="prewarmer", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def status(self) -> Dict:
+        now = time.time()
+        return {
+            "peak_hours": self.usage_log.peak_hours(),
+            "quota_left": self.quota_left(now),
+            "budget": self.budget,
+            "last_report": self.last_report,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-warm the cache for popular searches.")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"), help="YouTube API key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=300, help="Seconds between passes")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or YOUTUBE_API_KEY)")
+
+    # A separate process has its own memory cache; what it shares with the app is the corpus index
+    prewarmer = Prewarmer(args.api_key, corpus=CorpusIndex())
+    while True:
+        for line in prewarmer.run_once() or ["nothing due"]:
+            print(line)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compact records for the API fields the row builder actually uses.
+
+Requests ask for these fields only (`fields=` projections), and responses
+are parsed once into slotted records instead of nested JSON dicts.
+"""
+
+import sys
+from typing import Dict, Iterable, Tuple
+
+# ================== FIELD PROJECTIONS ==================
+
+SEARCH_FIELDS = "etag,nextPageToken,pageInfo/totalResults,items(id/videoId,snippet/channelId)"
+VIDEO_FIELDS = (
+    "etag,items(id,"
+    "snippet(title,description,channelId,channelTitle,publishedAt,tags,thumbnails(default/url,high/url)),"
+    "statistics(viewCount,likeCount,commentCount),"
+    "contentDetails/duration)"
+)
+CHANNEL_FIELDS = "etag,items(id,snippet/country,statistics/subscriberCount)"
+PLAYLIST_ITEM_FIELDS = "etag,items(contentDetails(videoId,videoPublishedAt))"
+
+# ================== RECORDS ==================
+
+class VideoRecord:
+    """Video fields used to score and display a result row."""
+
+    __slots__ = (
+        "id", "title", "description", "channel_id", "channel_title", "published_at",
+        "tags", "thumbnail_url", "views", "likes", "comments", "duration",
+    )
+
+    def __init__(self, item: Dict):
+        snippet = item.get("snippet", {})
+        stats = item.get("statistics", {})
+        thumbnails = snippet.get("thumbnails", {})
+        self.id: str = item.get("id", "")
+        self.title: str = snippet.get("title", "")
+        self.description: str = snippet.get("description", "")
+        self.channel_id: str = snippet.get("channelId", "")
+        self.channel_title: str = snippet.get("channelTitle", "")
+        self.published_at: str = snippet.get("publishedAt", "")
+        self.tags: Tuple[str, ...] = tuple(snippet.get("tags", ()))
+        self.thumbnail_url: str = thumbnails.get("high", {}).get("url", thumbnails.get("default", {}).get("url", ""))
+        self.views: int = int(stats.get("viewCount", 0))
+        self.likes: int = int(stats.get("likeCount", 0))
+        self.comments: int = int(stats.get("commentCount", 0))
+        self.duration: str = item.get("contentDetails", {}).get("duration", "")
+
+
+class ChannelRecord:
+    """Channel fields used for filtering and display."""
+
+    __slots__ = ("id", "subscribers", "country")
+
+    def __init__(self, item: Dict):
+        self.id: str = item.get("id", "")
+        self.subscribers: int = int(item.get("statistics", {}).get("subscriberCount", 0))
+        self.country: str = item.get("snippet", {}).get("country", "N/A")
+
+def record_to_dict(record) -> Dict:
+    """Plain dict of a record's fields, for storage."""
+    return {name: getattr(record, name) for name in record.__slots__}
+
+
+def record_from_dict(cls, data: Dict):
+    """Rebuild a record from `record_to_dict` output without going through the API shape."""
+    record = cls.__new__(cls)
+    for name in cls.__slots__:
+        value = data.get(name)
+        setattr(record, name, tuple(value) if isinstance(value, list) else value)
+    return record
+
+# ================== PARSERS ==================
+
+def parse_videos(body: Dict) -> Dict:
+    """Parse a videos.list response into `{"items": [VideoRecord, ...]}`."""
+    return {"etag": body.get("etag"), "items": [VideoRecord(item) for item in body.get("items", [])]}
+
+
+def parse_unprojected_videos(body: Dict) -> Dict:
+    """Sizes of a videos.list response fetched without `fields=`, the projection's baseline."""
+    items = body.get("items", [])
+    return {"videos": len(items), "json_bytes": json_size(items)}
+
+
+def parse_channels(body: Dict) -> Dict:
+    """Parse a channels.list response into `{"items": [ChannelRecord, ...]}`."""
+    return {"etag": body.get("etag"), "items": [ChannelRecord(item) for item in body.get("items", [])]}
+
+
+def record_size(record) -> int:
+    """Approximate in-memory size of a record and the values it holds."""
+    size = sys.getsizeof(record)
+    for name in record.__slots__:
+        value = getattr(record, name)
+        size += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+def records_size(records: Iterable) -> int:
+    """Approximate in-memory size of many records."""
+    return sum(record_size(r) for r in records)
+
+
+def json_size(value) -> int:
+    """Approximate in-memory size of parsed JSON: nested dicts, lists and their values."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(json_size(k) + json_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(json_size(v) for v in value)
+    return size
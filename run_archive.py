@@ -0,0 +1,157 @@
+"""
+Archive of completed scans.
+
+Each run's result rows are written to a zstd-compressed Parquet file, so a
+reload reads back typed columns in milliseconds without any API call. The
+runs are indexed in SQLite with their parameters, summary and timestamp,
+and flagged `partial` when the scan was cancelled or hit its deadline;
+beyond `MAX_RUNS` the oldest are deleted.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from paths import CACHE_DIR
+
+DEFAULT_ARCHIVE_DIR = os.path.join(CACHE_DIR, "runs")
+MAX_RUNS = 200
+PARQUET_COMPRESSION = "zstd"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    params TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class RunArchive:
+    """Parquet files of archived runs plus their SQLite index, shared by every session."""
+
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIR, max_runs: int = MAX_RUNS):
+        self.directory = directory
+        self.max_runs = max_runs
+        self.path = os.path.join(directory, "runs.db")
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _file(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.parquet")
+
+    def save(self, results_df: pd.DataFrame, params: Dict, summary: Dict) -> str:
+        """
+        Archive a run's rows with its parameters and summary; returns the run ID.
+        A summary with `stopped` set marks the run as partial.
+
+        Raises ImportError when no Parquet engine (pyarrow) is installed.
+        """
+        run_id = uuid.uuid4().hex[:12]
+        tmp_path = f"{self._file(run_id)}.tmp"
+        results_df.to_parquet(tmp_path, engine="pyarrow", compression=PARQUET_COMPRESSION, index=False)
+        os.replace(tmp_path, self._file(run_id))
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO runs (id, category, params, summary, rows, bytes, created_at, partial) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    params.get("filters", {}).get("category", ""),
+                    json.dumps(params, ensure_ascii=False),
+                    json.dumps(summary, ensure_ascii=False, default=str),
+                    len(results_df),
+                    os.path.getsize(self._file(run_id)),
+                    time.time(),
+                    int(bool(summary.get("stopped"))),
+                ),
+            )
+            expired = [
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM runs ORDER BY created_at DESC LIMIT -1 OFFSET ?", (self.max_runs,)
+                ).fetchall()
+            ]
+            conn.executemany("DELETE FROM runs WHERE id = ?", [(expired_id,) for expired_id in expired])
+            conn.execute("COMMIT")
+        for expired_id in expired:
+            if os.path.exists(self._file(expired_id)):
+                os.remove(self._file(expired_id))
+        return run_id
+
+    def runs(self, limit: int = 50) -> List[Dict]:
+        """Most recent runs, newest first (without their rows)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, category, rows, bytes, created_at, partial FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{**dict(row), "partial": bool(row["partial"])} for row in rows]
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        """A run's parameters, summary, timestamp and result rows (`results_df`)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None or not os.path.exists(self._file(run_id)):
+            return None
+        return {
+            "id": run_id,
+            "category": row["category"],
+            "params": json.loads(row["params"]),
+            "summary": json.loads(row["summary"]),
+            "created_at": row["created_at"],
+            "partial": bool(row["partial"]),
+            "results_df": pd.read_parquet(self._file(run_id), engine="pyarrow"),
+        }
+
+
+def diff_runs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Dict:
+    """
+    Compare two runs by video: new entrants, dropped videos and, for videos
+    in both, the change in virality score and views (largest change first)
+    plus how many kept the same score.
+    """
+    entered = new_df[~new_df["Video ID"].isin(old_df["Video ID"])]
+    dropped = old_df[~old_df["Video ID"].isin(new_df["Video ID"])]
+    both = old_df[["Video ID", "Score Viralidad", "Vistas"]].merge(
+        new_df[["Video ID", "Título", "Canal", "Score Viralidad", "Vistas"]],
+        on="Video ID",
+        suffixes=(" antes", " ahora"),
+    )
+    both["Δ Score"] = (both["Score Viralidad ahora"] - both["Score Viralidad antes"]).round(1)
+    both["Δ Vistas"] = both["Vistas ahora"] - both["Vistas antes"]
+    changed = both[both["Δ Score"] != 0].sort_values("Δ Score", key=lambda s: s.abs(), ascending=False)
+    return {
+        "entered": entered.reset_index(drop=True),
+        "dropped": dropped.reset_index(drop=True),
+        "changed": changed[
+            ["Título", "Canal", "Score Viralidad antes", "Score Viralidad ahora", "Δ Score", "Vistas antes", "Vistas ahora", "Δ Vistas", "Video ID"]
+        ].reset_index(drop=True),
+        "unchanged": len(both) - len(changed),
+    }
@@ -0,0 +1,957 @@
+"""
+Scan engine: one keyword × region search through details, channels and scoring.
+
+Kept free of Streamlit so the same pipeline runs in the UI, in queue
+workers and in headless tools.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import contextvars
+import math
+import re
+import threading
+import time
+
+from catalog import REGION_NAMES
+from corpus_index import STOPWORDS, CorpusIndex
+from dedup import normalize_text
+from records import ChannelRecord, VideoRecord, records_size
+from youtube_api import (
+    cached_channel_stats,
+    cached_playlist_items,
+    cached_search_shorts,
+    cached_video_details,
+    unprojected_video_sizes,
+    uploads_playlist_id,
+)
+
+# videos.list / channels.list accept up to 50 IDs per call
+API_BATCH_SIZE = 50
+
+# search.list returns at most 50 hits per page
+SEARCH_PAGE_SIZE = 50
+
+# search.list stops paging around 500 hits per query, however many match
+SEARCH_RESULT_CAP = 500
+# Harvest windows narrower than this are not split any further
+MIN_WINDOW_SECONDS = 3600
+HARVEST_WORKERS = 4
+
+# search.list `q` treats "|" as OR; keywords packed into one query by default
+QUERY_SEPARATOR = "|"
+KEYWORD_BATCH_SIZE = 3
+
+# Region-collapsed scans search once without a region code and label rows by channel country
+COLLAPSED_REGION_NAME = "🌐 Todas las regiones"
+OTHER_COUNTRIES_NAME = "🌐 Otros países"
+UNKNOWN_COUNTRY_NAME = "❔ País desconocido"
+
+WATCHLIST_KEYWORD = "📌 Watchlist"
+LOCAL_REGION_NAME = "💾 Corpus local"
+
+# ================== SCORING HELPERS ==================
+
+def parse_duration(iso_duration: str) -> str:
+    """Convert ISO 8601 duration to MM:SS format."""
+    if not iso_duration or not iso_duration.startswith("PT"):
+        return "00:00"
+    
+    duration = iso_duration[2:]
+    minutes = 0
+    seconds = 0
+    
+    if "M" in duration:
+        match = re.match(r'(\d+)M', duration)
+        if match:
+            minutes = int(match.group(1))
+        duration = re.sub(r'\d+M', '', duration)
+    
+    if "S" in duration:
+        match = re.match(r'(\d+)S', duration)
+        if match:
+            seconds = int(match.group(1))
+    
+    return f"{minutes:02d}:{seconds:02d}"
+
+def parse_duration_seconds(iso_duration: str) -> int:
+    """Convert ISO 8601 duration to total seconds."""
+    if not iso_duration or not iso_duration.startswith("PT"):
+        return 0
+    
+    duration = iso_duration[2:]
+    minutes = 0
+    seconds = 0
+    
+    if "M" in duration:
+        match = re.match(r'(\d+)M', duration)
+        if match:
+            minutes = int(match.group(1))
+        duration = re.sub(r'\d+M', '', duration)
+    
+    if "S" in duration:
+        match = re.match(r'(\d+)S', duration)
+        if match:
+            seconds = int(match.group(1))
+    
+    return minutes * 60 + seconds
+
+def calculate_engagement_rate(views: int, likes: int, comments: int) -> float:
+    """Calculate engagement rate as percentage."""
+    if views == 0:
+        return 0.0
+    engagement = ((likes or 0) + (comments or 0)) / views * 100
+    return round(engagement, 2)
+
+def calculate_virality_score(views: int, subs: int, days_old: int) -> float:
+    """Calculate virality score (0-100)."""
+    if subs == 0 or days_old == 0:
+        return 0.0
+    
+    views_per_sub = views / max(subs, 1)
+    views_per_day = views / max(days_old, 1)
+    
+    sub_ratio_score = min(views_per_sub * 10, 50)
+    velocity_score = min(views_per_day / 1000 * 50, 50)
+    
+    return round(sub_ratio_score + velocity_score, 1)
+
+def calculate_days_old(published_at: str) -> int:
+    """Calculate days since video was published."""
+    try:
+        pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+        now = datetime.now(pub_date.tzinfo)
+        return (now - pub_date).days
+    except:
+        return 0
+
+def generate_idea_angle_spanish(title: str, category: str, views: int, engagement: float) -> str:
+    """Generate actionable idea angle in Spanish context."""
+    hooks = []
+    
+    if views > 1000000:
+        hooks.append("formato VIRAL")
+    elif views > 100000:
+        hooks.append("formato de alto rendimiento")
+    
+    if engagement > 5:
+        hooks.append("gancho de alto engagement")
+    
+    hook_text = ", ".join(hooks) if hooks else "formato trending"
+    
+    return (
+        f"Recrea este {hook_text} para '{category}'. "
+        f"Estudia: '{title[:50]}...' - Adapta la estructura del gancho, "
+        f"cambia los ejemplos, mantén un ritmo similar. "
+        f"Usa voz en español neutro o específico para tu audiencia."
+    )
+
+def get_virality_label(score: float) -> str:
+    """Get virality tier label in Spanish."""
+    if score >= 80:
+        return "🔥 VIRAL"
+    elif score >= 60:
+        return "⚡ Muy Caliente"
+    elif score >= 40:
+        return "📈 Creciendo"
+    elif score >= 20:
+        return "✅ Bueno"
+    return "📊 Normal"
+
+def is_likely_spanish(title: str, description: str) -> bool:
+    """Check if content is likely in Spanish."""
+    spanish_indicators = [
+        # Common Spanish words
+        'el', 'la', 'los', 'las', 'de', 'del', 'en', 'es', 'por', 'para',
+        'que', 'con', 'como', 'cómo', 'más', 'pero', 'si', 'tu', 'tú',
+        'vida', 'éxito', 'motivación', 'ser', 'estar', 'hacer', 'poder',
+        'tiempo', 'día', 'mejor', 'nunca', 'siempre', 'todo', 'nada',
+        # Motivation-specific
+        'superación', 'mentalidad', 'disciplina', 'hábitos', 'metas',
+        'sueños', 'triunfo', 'fracaso', 'esfuerzo', 'perseverancia',
+        # Common endings
+        'ción', 'mente', 'ando', 'iendo', 'ado', 'ido',
+    ]
+    
+    text = (title + " " + description).lower()
+    matches = sum(1 for word in spanish_indicators if word in text)
+    
+    return matches >= 3
+
+# ================== QUERY BATCHING ==================
+
+def batch_keywords(keywords: List[str], batch_size: int = KEYWORD_BATCH_SIZE) -> List[str]:
+    """
+    Pack neighbouring keywords into OR queries ("a|b|c"), one search each.
+
+    Catalog keywords are listed by theme, so neighbours are related and
+    their results overlap the most. A batch size of 1 keeps one per query.
+    """
+    batch_size = max(batch_size, 1)
+    return [
+        QUERY_SEPARATOR.join(keywords[i:i + batch_size])
+        for i in range(0, len(keywords), batch_size)
+    ]
+
+
+def query_keywords(query: str) -> List[str]:
+    """Keywords packed in a search query (a plain keyword gives itself)."""
+    return [k.strip() for k in query.split(QUERY_SEPARATOR) if k.strip()] or [query]
+
+
+def attribute_keyword(keywords: List[str], title: str, tags: List[str], description: str) -> str:
+    """
+    Keyword of an OR query that a result most likely matched.
+
+    A keyword scores 3 for appearing in the title, 2 in the tags and 1 in
+    the description, plus a share of its content words found anywhere;
+    ties go to the earlier keyword.
+    """
+    fields = [(normalize_text(title), 3), (normalize_text(" ".join(tags)), 2), (normalize_text(description), 1)]
+    words = set(" ".join(text for text, _ in fields).split())
+
+    def score(keyword: str) -> float:
+        phrase = normalize_text(keyword)
+        content = [w for w in phrase.split() if w not in STOPWORDS] or phrase.split()
+        overlap = sum(w in words for w in content) / max(len(content), 1)
+        return max((weight for text, weight in fields if phrase and phrase in text), default=0) + overlap
+
+    return max(keywords, key=lambda k: (score(k), -keywords.index(k)))
+
+# ================== REGIONS ==================
+
+def region_for_country(country: str) -> str:
+    """Catalog region of a channel's country, for rows of region-collapsed scans."""
+    if country == "N/A":
+        return UNKNOWN_COUNTRY_NAME
+    return REGION_NAMES.get(country, OTHER_COUNTRIES_NAME)
+
+
+def in_selected_countries(country: str, region_name: str, filters: Dict) -> bool:
+    """
+    Whether a row of a region-collapsed task belongs to the selected
+    countries (`filters["countries"]`; empty = any). A region-less search
+    also returns other countries' channels; channels that set no country
+    are kept, under `UNKNOWN_COUNTRY_NAME`.
+    """
+    countries = filters.get("countries")
+    return region_name != COLLAPSED_REGION_NAME or not countries or country == "N/A" or country in countries
+
+
+def count_other_countries(
+    hits: List[Tuple[str, str]], vid_map: Dict[str, VideoRecord], chan_map: Dict[str, ChannelRecord],
+    region_name: str, filters: Dict,
+) -> int:
+    """Fetched hits of a region-collapsed task dropped for their channel's country."""
+    return sum(
+        1 for vid_id, ch_id in hits
+        if vid_id in vid_map and ch_id in chan_map
+        and not in_selected_countries(chan_map[ch_id].country, region_name, filters)
+    )
+
+
+def region_overlap(task_results: List[Dict]) -> List[Dict]:
+    """
+    Per searched region: search hits, hits no other region returned, and
+    the share also found elsewhere. High overlap means the per-region
+    fan-out spends quota on videos a single search already finds.
+    """
+    hits_by_region: Dict[str, Set[str]] = {}
+    searches: Dict[str, int] = {}
+    for task_result in task_results:
+        region_name = task_result.get("region")
+        if region_name is None:
+            continue
+        hits_by_region.setdefault(region_name, set()).update(task_result.get("video_ids", []))
+        searches[region_name] = searches.get(region_name, 0) + 1
+
+    stats = []
+    for region_name, hits in hits_by_region.items():
+        elsewhere = set().union(*(h for r, h in hits_by_region.items() if r != region_name))
+        unique = len(hits - elsewhere)
+        stats.append({
+            "Región": region_name,
+            "Búsquedas": searches[region_name],
+            "Videos": len(hits),
+            "Únicos": unique,
+            "Solapamiento (%)": round(100 * (1 - unique / len(hits)), 1) if hits else 0.0,
+        })
+    return sorted(stats, key=lambda r: -r["Únicos"])
+
+# ================== PAYLOAD BASELINE ==================
+
+def measure_projection(video_ids: List[str], api_key: str) -> Dict:
+    """
+    KB per 1,000 videos with and without the `fields=` projection, measured
+    on the same videos (up to `API_BATCH_SIZE`): response size, and memory
+    as slotted records vs the nested JSON dicts. Costs up to 2 quota units.
+    """
+    sample = tuple(video_ids[:API_BATCH_SIZE])
+    projected = cached_video_details(sample, api_key)
+    full = unprojected_video_sizes(sample, api_key)
+    if "error" in projected or "error" in full:
+        return {"error": projected.get("error") or full.get("error")}
+    if not projected.get("items") or not full["videos"]:
+        return {"error": "Ningún video de la muestra sigue disponible"}
+
+    videos, full_videos = len(projected["items"]), full["videos"]
+    return {
+        "videos": videos,
+        "payload_kb": projected.get("payload_bytes", 0) / videos * 1000 / 1024,
+        "payload_kb_full": full.get("payload_bytes", 0) / full_videos * 1000 / 1024,
+        "memory_kb": records_size(projected["items"]) / videos * 1000 / 1024,
+        "memory_kb_full": full["json_bytes"] / full_videos * 1000 / 1024,
+    }
+
+# ================== SCAN TASK ==================
+
+class ScanBudget:
+    """
+    Time limit and cancel flag for a scan.
+
+    Checked before each new search only, so a search already running still
+    gets its details and channel stats and contributes its rows.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None):
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def stop_reason(self) -> Optional[str]:
+        """Why the scan must stop ("cancelled" / "deadline"), or None to go on."""
+        if self._cancelled.is_set():
+            return "cancelled"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "deadline"
+        return None
+
+
+def search_start_date(days: int, now: Optional[datetime] = None) -> str:
+    """
+    `publishedAfter` for a look-back window of `days`.
+
+    Truncated to the UTC day so repeated searches share cache entries (and
+    can be pre-warmed). The window has to outlive the cache TTL plus the
+    maximum staleness: with an hourly window, an expired search entry would
+    never be asked for again, and stale-while-revalidate would never apply
+    to searches.
+    """
+    now = now or datetime.utcnow()
+    start = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.isoformat("T") + "Z"
+
+
+def default_filters(category: str) -> Dict:
+    """Filters that let every search hit through."""
+    return {
+        "category": category,
+        "spanish_only": False,
+        "duration_range": [0, 60],
+        "min_views": 0,
+        "max_subs": 0,
+        "min_engagement": 0.0,
+        "min_virality": 0,
+        "countries": [],
+    }
+
+
+def build_rows(
+    video_channel_ids: List[Tuple[str, str]],
+    vid_map: Dict[str, VideoRecord],
+    chan_map: Dict[str, ChannelRecord],
+    keyword: str,
+    region_name: str,
+    filters: Dict,
+) -> List[Dict]:
+    """
+    Score and filter fetched videos into result rows.
+
+    For an OR query each row's "Palabra Clave" is the keyword it matched.
+    """
+    rows = []
+    keywords = query_keywords(keyword)
+    category = filters["category"]
+    duration_range = filters["duration_range"]
+    
+    # Process each video
+    for vid_id, ch_id in video_channel_ids:
+        if vid_id not in vid_map:
+            continue
+        
+        video = vid_map[vid_id]
+        channel = chan_map.get(ch_id)
+        channel_country = channel.country if channel else "N/A"
+        if not in_selected_countries(channel_country, region_name, filters):
+            continue
+        
+        # Extract data
+        title = video.title
+        description = video.description
+        
+        # Spanish language filter
+        if filters["spanish_only"] and not is_likely_spanish(title, description):
+            continue
+        
+        # Extract metrics
+        views = video.views
+        likes = video.likes
+        comments = video.comments
+        subs = channel.subscribers if channel else 0
+        
+        # Duration check
+        duration_sec = parse_duration_seconds(video.duration)
+        if duration_sec < duration_range[0] or duration_sec > duration_range[1]:
+            continue
+        
+        # Calculate derived metrics
+        published_at = video.published_at
+        days_old = calculate_days_old(published_at)
+        engagement_rate = calculate_engagement_rate(views, likes, comments)
+        virality_score = calculate_virality_score(views, subs, max(days_old, 1))
+        views_per_day = views / max(days_old, 1)
+        
+        # Apply filters
+        if views < filters["min_views"]:
+            continue
+        if filters["max_subs"] > 0 and subs > filters["max_subs"]:
+            continue
+        if engagement_rate < filters["min_engagement"]:
+            continue
+        if virality_score < filters["min_virality"]:
+            continue
+        
+        # Build row
+        tags = video.tags
+        row_region = region_for_country(channel_country) if region_name == COLLAPSED_REGION_NAME else region_name
+        
+        rows.append({
+            # Identifiers
+            "Video ID": vid_id,
+            "Título": title,
+            "URL del Video": f"https://youtube.com/shorts/{vid_id}",
+            
+            # Performance
+            "Vistas": views,
+            "Likes": likes,
+            "Comentarios": comments,
+            "Engagement (%)": engagement_rate,
+            "Score Viralidad": virality_score,
+            "Nivel Viralidad": get_virality_label(virality_score),
+            "Vistas/Día": round(views_per_day, 0),
+            
+            # Video Details
+            "Duración": parse_duration(video.duration),
+            "Duración (seg)": duration_sec,
+            "Publicado": published_at[:10] if published_at else "",
+            "Días Online": days_old,
+            "Descripción": description[:300],
+            "Tags": ", ".join(tags[:10]) if tags else "",
+            
+            # Thumbnail
+            "Thumbnail": video.thumbnail_url,
+            
+            # Channel
+            "Canal": video.channel_title,
+            "URL del Canal": f"https://youtube.com/channel/{ch_id}",
+            "Suscriptores": subs,
+            "País del Canal": channel_country,
+            
+            # Meta
+            "Categoría": category,
+            "Palabra Clave": keyword if len(keywords) == 1 else attribute_keyword(keywords, title, tags, description),
+            "Región Búsqueda": row_region,
+            
+            # Actionable
+            "Ángulo de Idea": generate_idea_angle_spanish(title, category, views, engagement_rate),
+        })
+    
+    
+    return rows
+
+
+def empty_pushdown() -> Dict[str, int]:
+    """Counters of fetches avoided by pushing filters ahead of the API calls."""
+    return {
+        "search_pages": 0,       # pages not requested after results fell under min_views
+        "videos_duration": 0,    # known videos outside duration_range, not detail-fetched
+        "videos_big_channel": 0, # videos of channels known to exceed max_subs
+        "channels": 0,           # channel IDs not looked up
+        "detail_calls": 0,       # videos.list / channels.list calls skipped entirely
+    }
+
+
+def plan_fetches(
+    hits: List[Tuple[str, str]],
+    filters: Dict,
+    corpus: Optional[CorpusIndex],
+    pushdown: Dict[str, int],
+) -> List[Tuple[str, str]]:
+    """
+    Drop search hits that are bound to fail a filter before fetching their details.
+
+    Uses what the corpus already knows: durations never change, so known
+    videos outside `duration_range` go; channels last seen above `max_subs`
+    go with all their videos. Counts what was dropped in `pushdown`.
+    """
+    if corpus is None or not hits:
+        return hits
+
+    low, high = filters["duration_range"]
+    durations = corpus.video_durations(video_id for video_id, _ in hits)
+    big_channels = set()
+    if filters["max_subs"] > 0:
+        known = corpus.channel_records({channel_id for _, channel_id in hits})
+        big_channels = {c.id for c in known.values() if c.subscribers > filters["max_subs"]}
+
+    kept = []
+    for video_id, channel_id in hits:
+        if channel_id in big_channels:
+            pushdown["videos_big_channel"] += 1
+        elif video_id in durations and not low <= parse_duration_seconds(durations[video_id]) <= high:
+            pushdown["videos_duration"] += 1
+        else:
+            kept.append((video_id, channel_id))
+    pushdown["channels"] += len(big_channels)
+    return kept
+
+
+# ================== TIME-WINDOW HARVEST ==================
+
+def _parse_rfc3339(value: str) -> datetime:
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+
+
+def _format_rfc3339(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat("T") + "Z"
+
+
+def search_window(
+    keyword: str,
+    region_code: str,
+    after: str,
+    before: str,
+    api_key: str,
+    max_pages: int,
+    splittable: bool,
+    window_cap: int = SEARCH_RESULT_CAP,
+) -> Dict:
+    """
+    Page through one publishedAfter/publishedBefore window.
+
+    Stops after the first page when the window reports more results than
+    `window_cap` and can still be split: paging it would only reach the
+    cap, while its halves can each be paged further.
+    """
+    window = {"hits": [], "pages": 0, "saturated": False, "truncated": False, "stale_seconds": 0, "error": None}
+    page_token = None
+    while window["pages"] < max_pages:
+        search_data = cached_search_shorts(
+            keyword, after, region_code, api_key, SEARCH_PAGE_SIZE,
+            language="es", page_token=page_token, published_before=before
+        )
+        window["pages"] += 1
+        if "error" in search_data:
+            window["error"] = search_data["error"]
+            break
+        window["stale_seconds"] = max(window["stale_seconds"], search_data.get("stale_seconds", 0))
+        window["hits"].extend((v["id"]["videoId"], v["snippet"]["channelId"]) for v in search_data.get("items", []))
+        page_token = search_data.get("nextPageToken")
+        total = search_data.get("pageInfo", {}).get("totalResults", 0)
+        if total > window_cap or (page_token and len(window["hits"]) >= window_cap):
+            window["saturated"] = True
+            if splittable:
+                break
+        if not page_token:
+            break
+    else:
+        # Page budget ran out with results left in a window that won't be split
+        window["truncated"] = bool(page_token) and not (window["saturated"] and splittable)
+    return window
+
+
+def harvest_hits(
+    keyword: str,
+    region_code: str,
+    start_date: str,
+    api_key: str,
+    end_date: Optional[str] = None,
+    max_searches: int = 20,
+    workers: int = HARVEST_WORKERS,
+    window_cap: int = SEARCH_RESULT_CAP,
+) -> Dict:
+    """
+    Enumerate a query's hits past the per-query result cap by bisecting its time window.
+
+    Windows are searched in parallel waves; a window reporting more results
+    than the API will page through is split into two halves for the next
+    wave, down to `MIN_WINDOW_SECONDS`. Stops after `max_searches` search
+    pages (100 quota units each). Returns the deduplicated (video_id,
+    channel_id) hits plus searches, windows, splits, windows still
+    saturated, windows cut short and windows left unsearched by the budget.
+    """
+    if end_date:
+        end = _parse_rfc3339(end_date)
+    else:
+        # Open-ended up to the next UTC midnight (like the day-truncated start), so every
+        # window and split is the same all day and repeated harvests hit the cache
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    pending = [(_parse_rfc3339(start_date), end)]
+    harvest = {
+        "hits": [], "searches": 0, "windows": 0, "splits": 0, "saturated": 0, "truncated": 0, "unsearched": 0,
+        "stale_seconds": 0, "error": None,
+    }
+    found: Dict[str, str] = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending and harvest["searches"] < max_searches and harvest["error"] is None:
+            left = max_searches - harvest["searches"]
+            wave, pending = pending[:left], pending[left:]
+            pages_each = max(1, left // len(wave))
+            futures = [
+                (after, before, pool.submit(
+                    # Copy the context so the pool's requests count against this scan's owner
+                    contextvars.copy_context().run, search_window, keyword, region_code, _format_rfc3339(after), _format_rfc3339(before), api_key,
+                    pages_each, (before - after).total_seconds() >= 2 * MIN_WINDOW_SECONDS, window_cap,
+                ))
+                for after, before in wave
+            ]
+            for after, before, future in futures:
+                window = future.result()
+                harvest["searches"] += window["pages"]
+                harvest["windows"] += 1
+                harvest["truncated"] += window["truncated"]
+                harvest["stale_seconds"] = max(harvest["stale_seconds"], window["stale_seconds"])
+                harvest["error"] = harvest["error"] or window["error"]
+                for video_id, channel_id in window["hits"]:
+                    found.setdefault(video_id, channel_id)
+                if not window["saturated"]:
+                    continue
+                if (before - after).total_seconds() >= 2 * MIN_WINDOW_SECONDS:
+                    middle = after + (before - after) / 2
+                    pending += [(after, middle), (middle, before)]
+                    harvest["splits"] += 1
+                else:
+                    harvest["saturated"] += 1
+
+    harvest["unsearched"] = len(pending)
+    harvest["hits"] = list(found.items())
+    return harvest
+
+
+def fetch_hit_details(
+    page_hits: List[Tuple[str, str]],
+    filters: Dict,
+    api_key: str,
+    seen_video_ids: Set[str],
+    corpus: Optional[CorpusIndex],
+    vid_map: Dict[str, VideoRecord],
+    chan_map: Dict[str, ChannelRecord],
+    result: Dict,
+) -> bool:
+    """
+    Fetch details and channel stats of up to 50 search hits into `vid_map` / `chan_map`.
+
+    Skips videos seen earlier in the scan and those filter pushdown rules
+    out, updating `result`'s counters. Returns False on an API error, which
+    is also set as `result["error"]` so the task is not taken as complete.
+    """
+    pushdown = result["pushdown"]
+    new_hits = [(v, c) for v, c in page_hits if v not in seen_video_ids]
+    seen_video_ids.update(v for v, _ in new_hits)
+    result["search_videos"] += len(new_hits)
+    fetch_hits = plan_fetches(new_hits, filters, corpus, pushdown)
+    video_ids = [v for v, _ in fetch_hits]
+    channel_ids = [c for c in dict.fromkeys(c for _, c in fetch_hits) if c not in chan_map]
+
+    if new_hits and not video_ids:
+        pushdown["detail_calls"] += 2
+    if not video_ids:
+        return True
+
+    # Fetch detailed data
+    vid_details = cached_video_details(tuple(video_ids), api_key)
+    chan_details = cached_channel_stats(tuple(channel_ids), api_key) if channel_ids else {"items": []}
+
+    if "error" in vid_details or "error" in chan_details:
+        error = vid_details.get("error") or chan_details.get("error")
+        result["error"] = result["error"] or f"Error en detalles de '{result['keyword']}': {error}"
+        return False
+    result["stale_seconds"] = max(
+        result["stale_seconds"], vid_details.get("stale_seconds", 0), chan_details.get("stale_seconds", 0)
+    )
+
+    page_videos = {item.id: item for item in vid_details.get("items", [])}
+    page_channels = {item.id: item for item in chan_details.get("items", [])}
+    vid_map.update(page_videos)
+    chan_map.update(page_channels)
+
+    result["detail_payload_bytes"] += vid_details.get("payload_bytes", 0)
+    result["detail_record_bytes"] += records_size(page_videos.values())
+    result["detail_videos"] += len(page_videos)
+
+    if corpus is not None:
+        corpus.add(page_videos.values(), page_channels.values())
+    return True
+
+
+def run_search_task(
+    keyword: str,
+    region_name: str,
+    region_code: str,
+    start_date: str,
+    api_key: str,
+    results_per_keyword: int,
+    filters: Dict,
+    seen_video_ids: Optional[Set[str]] = None,
+    corpus: Optional[CorpusIndex] = None,
+    harvest_searches: int = 0,
+) -> Dict:
+    """
+    Search one keyword (or an OR query of several) in one region and build scored result rows.
+
+    `filters` is a plain JSON-serializable dict (see `default_filters`) so
+    tasks can be stored in the work queue. Returns the rows plus an
+    `error` message, if any, payload counters for the scan summary and the
+    fetches saved by filter pushdown. Fetched records are also added to
+    `corpus` when given.
+
+    Results come in pages of up to 50 ordered by view count, so paging
+    stops as soon as a page ends below `min_views`. An OR query asks for
+    `results_per_keyword` per packed keyword. A region-collapsed task
+    (empty `region_code`, `COLLAPSED_REGION_NAME`) searches without a region
+    and labels each row with its channel's country, dropping channels from
+    countries outside `filters["countries"]` (counted in `other_countries`).
+
+    With `harvest_searches`, hits come from `harvest_hits` instead, which
+    spends up to that many searches bisecting the time window.
+    """
+    result = {
+        "rows": [], "error": None, "detail_videos": 0, "detail_payload_bytes": 0, "detail_record_bytes": 0,
+        "search_videos": 0, "pushdown": empty_pushdown(), "keyword": keyword, "region": region_name, "video_ids": [],
+        "stale_seconds": 0, "other_countries": 0,
+    }
+    pushdown = result["pushdown"]
+    if seen_video_ids is None:
+        seen_video_ids = set()
+
+    hits = []
+    vid_map = {}
+    chan_map = {}
+
+    if harvest_searches > 0:
+        harvest = harvest_hits(keyword, region_code, start_date, api_key, max_searches=harvest_searches)
+        result["harvest"] = {k: harvest[k] for k in ("searches", "windows", "splits", "saturated", "truncated", "unsearched")}
+        if harvest["error"]:
+            result["error"] = f"Error en '{keyword}': {harvest['error']}"
+        result["stale_seconds"] = harvest["stale_seconds"]
+        hits = harvest["hits"]
+        result["video_ids"] = [v for v, _ in hits]
+        for start in range(0, len(hits), API_BATCH_SIZE):
+            if not fetch_hit_details(
+                hits[start:start + API_BATCH_SIZE], filters, api_key, seen_video_ids, corpus, vid_map, chan_map, result
+            ):
+                break
+        result["rows"] = build_rows(hits, vid_map, chan_map, keyword, region_name, filters)
+        result["other_countries"] = count_other_countries(hits, vid_map, chan_map, region_name, filters)
+        return result
+
+    remaining = results_per_keyword * len(query_keywords(keyword))
+    page_token = None
+
+    while remaining > 0:
+        # Search for videos
+        search_data = cached_search_shorts(
+            keyword, start_date, region_code, api_key,
+            min(remaining, SEARCH_PAGE_SIZE), language="es", page_token=page_token
+        )
+
+        if "error" in search_data:
+            result["error"] = f"Error en '{keyword}': {search_data['error']}"
+            break
+        result["stale_seconds"] = max(result["stale_seconds"], search_data.get("stale_seconds", 0))
+
+        page_hits = [(v["id"]["videoId"], v["snippet"]["channelId"]) for v in search_data.get("items", [])]
+        if not page_hits:
+            break
+        hits.extend(page_hits)
+        result["video_ids"].extend(v for v, _ in page_hits)
+        remaining -= len(page_hits)
+
+        if not fetch_hit_details(page_hits, filters, api_key, seen_video_ids, corpus, vid_map, chan_map, result):
+            break
+
+        page_token = search_data.get("nextPageToken")
+        if remaining <= 0 or not page_token:
+            break
+
+        # Ordered by view count: once this page ends under min_views, so does every later page
+        page_views = [vid_map[v].views for v, _ in page_hits if v in vid_map]
+        if filters["min_views"] > 0 and page_views and page_views[-1] < filters["min_views"]:
+            pushdown["search_pages"] += math.ceil(remaining / SEARCH_PAGE_SIZE)
+            break
+
+    result["rows"] = build_rows(hits, vid_map, chan_map, keyword, region_name, filters)
+    result["other_countries"] = count_other_countries(hits, vid_map, chan_map, region_name, filters)
+
+    return result
+
+
+def run_scan(
+    tasks: List[Tuple[str, str, str]],
+    start_date: str,
+    api_key: str,
+    results_per_keyword: int,
+    filters: Dict,
+    corpus: Optional[CorpusIndex] = None,
+    budget: Optional[ScanBudget] = None,
+    on_task: Optional[Callable[[int, Dict], None]] = None,
+    harvest_searches: int = 0,
+) -> Dict:
+    """
+    Run (keyword, region_name, region_code) tasks in order and merge their rows.
+
+    Headless counterpart of the UI scan: rows are de-duplicated by video and
+    sorted best first. `on_task(tasks_done, task_result)` is called after
+    each task; `budget` can stop the scan early. `harvest_searches` switches
+    every task to time-window harvesting (see `harvest_hits`).
+    """
+    seen_video_ids: Set[str] = set()
+    merged_video_ids: Set[str] = set()
+    rows = []
+    errors = []
+    pushdown = empty_pushdown()
+    done = 0
+
+    for keyword, region_name, region_code in tasks:
+        if budget is not None and budget.stop_reason():
+            break
+        task_result = run_search_task(
+            keyword, region_name, region_code, start_date, api_key,
+            results_per_keyword, filters, seen_video_ids, corpus, harvest_searches
+        )
+        done += 1
+        if task_result["error"]:
+            errors.append(task_result["error"])
+        for key, saved in task_result["pushdown"].items():
+            pushdown[key] += saved
+        for row in task_result["rows"]:
+            if row["Video ID"] not in merged_video_ids:
+                merged_video_ids.add(row["Video ID"])
+                rows.append(row)
+        if on_task is not None:
+            on_task(done, task_result)
+
+    rows.sort(key=lambda r: (r["Score Viralidad"], r["Vistas"]), reverse=True)
+    return {
+        "rows": rows,
+        "errors": errors,
+        "pushdown": pushdown,
+        "searches_done": done,
+        "searches_total": len(tasks),
+        "stopped": budget.stop_reason() if budget is not None and done < len(tasks) else None,
+    }
+
+
+def run_watchlist_task(
+    channel_ids: List[str],
+    start_date: str,
+    api_key: str,
+    filters: Dict,
+    uploads_per_channel: int = 10,
+    seen_video_ids: Optional[Set[str]] = None,
+    corpus: Optional[CorpusIndex] = None,
+) -> Dict:
+    """
+    Poll known channels through their uploads playlists and build scored rows.
+
+    Costs one unit per channel plus one per 50 videos/channels, instead of
+    100 units per search. Also returns each channel's best views/day
+    (`velocity`) so the watchlist can schedule its next poll, and the
+    channels whose poll `failed` so it can retry them soon.
+    """
+    result = {
+        "rows": [], "errors": [], "velocity": {}, "titles": {}, "failed": [],
+        "detail_videos": 0, "detail_payload_bytes": 0, "detail_record_bytes": 0,
+    }
+    if seen_video_ids is None:
+        seen_video_ids = set()
+    
+    # Latest uploads of every channel
+    video_channel_ids = []
+    for channel_id in channel_ids:
+        uploads = cached_playlist_items(uploads_playlist_id(channel_id), api_key, uploads_per_channel)
+        if "error" in uploads:
+            result["errors"].append(f"Error en canal '{channel_id}': {uploads['error']}")
+            result["failed"].append(channel_id)
+            continue
+        for item in uploads.get("items", []):
+            details = item.get("contentDetails", {})
+            video_id = details.get("videoId")
+            if video_id and details.get("videoPublishedAt", "") >= start_date[:19] and video_id not in seen_video_ids:
+                video_channel_ids.append((video_id, channel_id))
+                seen_video_ids.add(video_id)
+    
+    if not video_channel_ids:
+        return result
+    
+    # Batched details
+    vid_map = {}
+    chan_map = {}
+    video_ids = [video_id for video_id, _ in video_channel_ids]
+    for i in range(0, len(video_ids), API_BATCH_SIZE):
+        vid_details = cached_video_details(tuple(video_ids[i:i + API_BATCH_SIZE]), api_key)
+        if "error" in vid_details:
+            result["errors"].append(f"Error en detalles de watchlist: {vid_details['error']}")
+            result["failed"].extend(dict.fromkeys(c for _, c in video_channel_ids[i:i + API_BATCH_SIZE]))
+            continue
+        vid_map.update((item.id, item) for item in vid_details.get("items", []))
+        result["detail_payload_bytes"] += vid_details.get("payload_bytes", 0)
+    polled_channels = list(dict.fromkeys(channel_id for _, channel_id in video_channel_ids))
+    for i in range(0, len(polled_channels), API_BATCH_SIZE):
+        chan_details = cached_channel_stats(tuple(polled_channels[i:i + API_BATCH_SIZE]), api_key)
+        if "error" not in chan_details:
+            chan_map.update((item.id, item) for item in chan_details.get("items", []))
+    
+    result["detail_record_bytes"] = records_size(vid_map.values())
+    result["detail_videos"] = len(vid_map)
+    
+    if corpus is not None:
+        corpus.add(vid_map.values(), chan_map.values())
+    
+    for video_id, channel_id in video_channel_ids:
+        video = vid_map.get(video_id)
+        if video is not None:
+            views_per_day = video.views / max(calculate_days_old(video.published_at), 1)
+            result["velocity"][channel_id] = max(result["velocity"].get(channel_id, 0.0), views_per_day)
+            result["titles"][channel_id] = video.channel_title
+    
+    result["rows"] = build_rows(video_channel_ids, vid_map, chan_map, WATCHLIST_KEYWORD, "Watchlist", filters)
+    return result
+
+
+def run_local_search_task(
+    keyword: str,
+    start_date: str,
+    corpus: CorpusIndex,
+    filters: Dict,
+    limit: int = 50,
+    seen_video_ids: Optional[Set[str]] = None,
+) -> Dict:
+    """Answer a keyword search from the local corpus index, with no API calls."""
+    result = {"rows": [], "error": None, "detail_videos": 0, "detail_payload_bytes": 0, "detail_record_bytes": 0}
+    if seen_video_ids is None:
+        seen_video_ids = set()
+    
+    videos, chan_map = corpus.search(keyword, published_after=start_date, limit=limit)
+    videos = [v for v in videos if v.id not in seen_video_ids]
+    seen_video_ids.update(v.id for v in videos)
+    
+    result["rows"] = build_rows(
+        [(v.id, v.channel_id) for v in videos],
+        {v.id: v for v in videos}, chan_map, keyword, LOCAL_REGION_NAME, filters
+    )
+    return result
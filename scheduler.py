@@ -0,0 +1,159 @@
+"""
+Process-wide admission control for scans.
+
+At most `MAX_RUNNING_SCANS` scans run at once; the others wait in a queue
+that reports their position and estimated wait. A free slot goes first to
+the owner (session or client) with the fewest scans running, then to quick
+scans, then in arrival order, so a large sweep cannot hold back a
+single-region search. While a scan runs, its API requests are tagged with
+its owner, and `youtube_api.request_gate` shares request slots and quota
+between owners the same way; each ticket also tallies the quota its own
+requests spent, apart from the owner's other scans.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from youtube_api import request_gate, request_meter, request_owner
+
+MAX_RUNNING_SCANS = int(os.environ.get("MAX_RUNNING_SCANS", 3))
+# Scans with at most this many searches jump ahead of larger ones
+QUICK_SCAN_TASKS = 10
+# Seconds per search until real ones have been measured; then a moving average
+DEFAULT_TASK_SECONDS = 3.0
+TASK_SECONDS_WEIGHT = 0.2
+
+
+class ScanTicket:
+    """A scan's place in the scheduler: queued, running or finished."""
+
+    def __init__(self, owner: str, tasks: int, on_admit: Optional[Callable[["ScanTicket"], None]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.tasks = tasks
+        self.done = 0
+        self.status = "queued"
+        self.created_at = time.time()
+        self.last_task_at: Optional[float] = None
+        # Requests sent and quota units spent inside `owned(ticket)`
+        self.usage: Counter = Counter()
+        self.on_admit = on_admit
+        self.admitted = threading.Event()
+
+
+class ScanScheduler:
+    """
+    Queue of scans with a cap on how many run at once.
+
+    `submit` a ticket, then either block in `wait` or pass `on_admit` to be
+    called once it may run. Run the scan inside `owned(ticket)`, report each
+    search with `task_done` and always `finish` the ticket, even when the
+    scan is cancelled while still queued.
+    """
+
+    def __init__(self, max_running: int = MAX_RUNNING_SCANS):
+        self.max_running = max_running
+        self.task_seconds = DEFAULT_TASK_SECONDS
+        self._lock = threading.Lock()
+        self._queued: List[ScanTicket] = []
+        self._running: Dict[str, ScanTicket] = {}
+
+    def submit(
+        self, owner: str, tasks: int, on_admit: Optional[Callable[[ScanTicket], None]] = None
+    ) -> ScanTicket:
+        ticket = ScanTicket(owner, tasks, on_admit)
+        with self._lock:
+            self._queued.append(ticket)
+            admitted = self._admit()
+        self._notify(admitted)
+        return ticket
+
+    def _order(self) -> List[ScanTicket]:
+        """Queued tickets in the order they will be admitted (caller holds the lock)."""
+        running = Counter(t.owner for t in self._running.values())
+        return sorted(self._queued, key=lambda t: (running[t.owner], t.tasks > QUICK_SCAN_TASKS, t.created_at))
+
+    def _admit(self) -> List[ScanTicket]:
+        """Move tickets from the queue into free slots (caller holds the lock)."""
+        admitted = []
+        while self._queued and len(self._running) < self.max_running:
+            ticket = self._order()[0]
+            self._queued.remove(ticket)
+            ticket.status = "running"
+            ticket.last_task_at = time.monotonic()
+            self._running[ticket.id] = ticket
+            admitted.append(ticket)
+        return admitted
+
+    def _notify(self, admitted: List[ScanTicket]) -> None:
+        for ticket in admitted:
+            ticket.admitted.set()
+            if ticket.on_admit is not None:
+                ticket.on_admit(ticket)
+
+    def wait(self, ticket: ScanTicket, timeout: Optional[float] = None) -> bool:
+        """Block until the ticket may run (True) or `timeout` passes (False)."""
+        return ticket.admitted.wait(timeout)
+
+    @contextmanager
+    def owned(self, ticket: ScanTicket) -> Iterator[None]:
+        """Attribute the API requests made in this block to the ticket's owner and tally them on the ticket."""
+        token = request_owner.set(ticket.owner)
+        meter_token = request_meter.set(ticket.usage)
+        try:
+            yield
+        finally:
+            request_meter.reset(meter_token)
+            request_owner.reset(token)
+
+    def task_done(self, ticket: ScanTicket) -> None:
+        """Count one finished search and refine the seconds-per-search estimate."""
+        now = time.monotonic()
+        with self._lock:
+            ticket.done += 1
+            if ticket.last_task_at is not None:
+                elapsed = now - ticket.last_task_at
+                self.task_seconds += TASK_SECONDS_WEIGHT * (elapsed - self.task_seconds)
+            ticket.last_task_at = now
+
+    def finish(self, ticket: ScanTicket) -> None:
+        """Release the ticket's slot (or its place in the queue) and admit the next scans."""
+        with self._lock:
+            if ticket in self._queued:
+                self._queued.remove(ticket)
+            self._running.pop(ticket.id, None)
+            ticket.status = "finished"
+            still_active = any(t.owner == ticket.owner for t in self._queued + list(self._running.values()))
+            admitted = self._admit()
+        if not still_active:
+            request_gate.forget(ticket.owner)
+        self._notify(admitted)
+
+    def queue_status(self, ticket: ScanTicket) -> Dict:
+        """Position in the queue (1 = next; 0 once running) and estimated seconds until it runs."""
+        with self._lock:
+            if ticket.status != "queued":
+                return {"status": ticket.status, "position": 0, "estimated_wait": 0.0}
+            order = self._order()
+            position = order.index(ticket) + 1
+            # Searches that must finish first, spread over the running slots
+            ahead = sum(max(t.tasks - t.done, 0) for t in self._running.values())
+            ahead += sum(t.tasks for t in order[:position - 1])
+            wait = ahead * self.task_seconds / max(self.max_running, 1)
+            return {"status": "queued", "position": position, "estimated_wait": round(wait, 1)}
+
+    def usage(self) -> Dict:
+        """Scans running and queued, the per-search estimate and the request gate's load."""
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued": len(self._queued),
+                "max_running": self.max_running,
+                "task_seconds": round(self.task_seconds, 2),
+                "requests": request_gate.usage(),
+            }
@@ -0,0 +1,465 @@
+"""
+Headless JSON HTTP service over the scan engine.
+
+    YOUTUBE_API_KEY=... python service.py --port 8080
+
+    POST /scans               {"category": "...", "regions": ["ES", "MX"], "days": 7, ...}
+    GET  /scans/<id>          status and progress of a scan
+    GET  /scans/<id>/results  ?page=1&page_size=50&sort=Vistas&order=desc
+    GET  /catalog             categories, regions and request defaults
+    GET  /health
+
+Scans run in the background on a small thread pool and share the process
+API cache, so clients never need a Streamlit session. Scans beyond the pool
+wait in a `ScanScheduler` queue that is fair between clients; their status
+reports the queue position and estimated wait. Submitting a scan
+identical to one that is running, or that finished within the cache TTL,
+returns that scan instead of running the pipeline again. Past the TTL, up
+to the maximum staleness, the old scan is still returned at once (with its
+`stale_seconds`) while a refresh runs in the background.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from catalog import NICHE_KEYWORDS, REGION_CODES, REGION_NAMES
+from corpus_index import CorpusIndex
+from dedup import collapse_rows, normalize_text
+from scanner import COLLAPSED_REGION_NAME, ScanBudget, batch_keywords, run_scan, search_start_date
+from scheduler import ScanScheduler, ScanTicket
+from usage_log import UsageLog
+from youtube_api import CACHE_MAX_STALE_SECONDS, CACHE_TTL_SECONDS
+
+# Same defaults as the UI sidebar: viral Shorts from small channels, in Spanish
+REQUEST_DEFAULTS = {
+    "regions": ["ES"],
+    "collapse_regions": False,
+    "days": 7,
+    "results_per_keyword": 10,
+    "keyword_batch_size": 1,
+    "harvest_searches": 0,
+    "keywords": [],
+    "spanish_only": True,
+    "duration_range": [0, 60],
+    "min_views": 5000,
+    "max_subs": 50000,
+    "min_engagement": 0.0,
+    "min_virality": 0,
+    "collapse_duplicates": True,
+    "max_seconds": None,
+}
+
+MAX_PAGE_SIZE = 200
+MAX_JOBS = 500
+
+
+class ScanRequestError(ValueError):
+    """Invalid scan request; reported to the client as a 400."""
+
+
+def find_catalog_name(name: str, names) -> Optional[str]:
+    """Entry of `names` matching `name`, ignoring emoji, case and accents."""
+    if name in names:
+        return name
+    wanted = normalize_text(name)
+    for candidate in names:
+        if normalize_text(candidate) == wanted:
+            return candidate
+    return None
+
+
+def parse_scan_request(body: Dict) -> Dict:
+    """Validate a scan request and fill in defaults."""
+    if not isinstance(body, dict):
+        raise ScanRequestError("El cuerpo debe ser un objeto JSON")
+    unknown = set(body) - set(REQUEST_DEFAULTS) - {"category"}
+    if unknown:
+        raise ScanRequestError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+
+    request = {**REQUEST_DEFAULTS, **body}
+    category = find_catalog_name(str(body.get("category", "")), NICHE_KEYWORDS)
+    if category is None:
+        raise ScanRequestError(f"Categoría desconocida: {body.get('category')!r} (ver GET /catalog)")
+    request["category"] = category
+
+    for field in ("regions", "keywords", "duration_range"):
+        if not isinstance(request[field], list):
+            raise ScanRequestError(f"'{field}' debe ser una lista")
+    for field in ("spanish_only", "collapse_regions", "collapse_duplicates"):
+        if not isinstance(request[field], bool):
+            raise ScanRequestError(f"'{field}' debe ser true o false")
+    duration_range = request["duration_range"]
+    if (
+        len(duration_range) != 2
+        or not all(isinstance(v, int) and not isinstance(v, bool) for v in duration_range)
+        or duration_range[0] > duration_range[1]
+    ):
+        raise ScanRequestError("'duration_range' debe ser [mínimo, máximo] en segundos, con mínimo <= máximo")
+
+    regions = []
+    for region in request["regions"]:
+        code = str(region).upper()
+        if code not in REGION_NAMES:
+            name = find_catalog_name(str(region), REGION_CODES)
+            code = REGION_CODES.get(name)
+        if code is None:
+            raise ScanRequestError(f"Región desconocida: {region!r}")
+        regions.append(code)
+    if not regions:
+        raise ScanRequestError("Indica al menos una región")
+    request["regions"] = list(dict.fromkeys(regions))
+
+    try:
+        request["days"] = min(max(int(request["days"]), 1), 30)
+        request["results_per_keyword"] = min(max(int(request["results_per_keyword"]), 1), 200)
+        request["keyword_batch_size"] = min(max(int(request["keyword_batch_size"]), 1), 5)
+        request["harvest_searches"] = min(max(int(request["harvest_searches"]), 0), 100)
+        request["min_views"] = int(request["min_views"])
+        request["max_subs"] = int(request["max_subs"])
+        request["min_engagement"] = float(request["min_engagement"])
+        request["min_virality"] = float(request["min_virality"])
+        request["keywords"] = [str(k).strip() for k in request["keywords"] if str(k).strip()]
+        if request["max_seconds"] is not None:
+            request["max_seconds"] = float(request["max_seconds"])
+    except (TypeError, ValueError) as e:
+        raise ScanRequestError(f"Parámetro inválido: {e}")
+    return request
+
+
+def plan_scan(request: Dict) -> Tuple[List[Tuple[str, str, str]], Dict]:
+    """(keyword, region_name, region_code) tasks and row filters of a parsed request."""
+    keywords = NICHE_KEYWORDS[request["category"]] + request["keywords"]
+    queries = batch_keywords(keywords, request["keyword_batch_size"])
+    regions = [(REGION_NAMES[code], code) for code in request["regions"]]
+    if request["collapse_regions"] and len(regions) > 1:
+        regions = [(COLLAPSED_REGION_NAME, "")]
+    tasks = [(query, region_name, code) for region_name, code in regions for query in queries]
+    filters = {
+        "category": request["category"],
+        "spanish_only": request["spanish_only"],
+        "duration_range": request["duration_range"],
+        "min_views": request["min_views"],
+        "max_subs": request["max_subs"],
+        "min_engagement": request["min_engagement"],
+        "min_virality": request["min_virality"],
+        "countries": request["regions"],
+    }
+    return tasks, filters
+
+# ================== JOBS ==================
+
+class ScanJob:
+    """One submitted scan and, once finished, its merged result rows."""
+
+    def __init__(self, request: Dict, key: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.key = key
+        self.status = "queued"
+        self.done = 0
+        self.total = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.rows: List[Dict] = []
+        self.errors: List[str] = []
+        self.pushdown: Dict[str, int] = {}
+        self.stopped: Optional[str] = None
+        self.error: Optional[str] = None
+        self.refresh_id: Optional[str] = None
+        self.ticket: Optional[ScanTicket] = None
+
+    def to_status(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "request": self.request,
+            "progress": {"done": self.done, "total": self.total},
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "result_count": len(self.rows),
+            "errors": self.errors,
+            "pushdown": self.pushdown,
+            "stopped": self.stopped,
+            "error": self.error,
+            "refresh_id": self.refresh_id,
+        }
+
+
+class ScanService:
+    """
+    Runs scans on a thread pool and keeps their results for paginated reads.
+
+    Jobs reach the pool only once `scheduler` admits them, so the pool runs
+    as many scans as the scheduler allows (by default, `workers`).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        workers: int = 4,
+        corpus: Optional[CorpusIndex] = None,
+        usage_log: Optional[UsageLog] = None,
+        result_ttl: float = CACHE_TTL_SECONDS,
+        max_stale: float = CACHE_MAX_STALE_SECONDS,
+        max_jobs: int = MAX_JOBS,
+        scheduler: Optional[ScanScheduler] = None,
+    ):
+        self.api_key = api_key
+        self.corpus = corpus
+        self.usage_log = usage_log
+        self.result_ttl = result_ttl
+        self.max_stale = max_stale
+        self.max_jobs = max_jobs
+        self.scheduler = scheduler or ScanScheduler(max_running=workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.scheduler.max_running, thread_name_prefix="scan")
+        self._closed = False
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ScanJob] = {}
+        self._by_key: Dict[str, str] = {}
+
+    def submit(self, body: Dict, client: str = "") -> Tuple[ScanJob, bool]:
+        """
+        Queue a scan; returns (job, reused) where reused means no new pipeline run.
+
+        `client` identifies the caller so the scheduler can share slots fairly.
+        """
+        request = parse_scan_request(body)
+        key = json.dumps(request, sort_keys=True)
+
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status in ("queued", "running"):
+                return existing, True
+            if existing is not None and existing.status == "done":
+                age = time.time() - existing.finished_at
+                if age < self.result_ttl:
+                    return existing, True
+                if age < self.result_ttl + self.max_stale:
+                    # Stale-while-revalidate: answer with the old scan, refresh it once in the background
+                    refresh = self._jobs.get(existing.refresh_id or "")
+                    if refresh is None or refresh.status not in ("queued", "running"):
+                        existing.refresh_id = self._start(request, key, "", publish=False).id
+                    return existing, True
+            job = self._start(request, key, client)
+
+        if self.usage_log is not None:
+            self.usage_log.log_search(request["category"], request["regions"], request["days"], request["results_per_keyword"])
+        return job, False
+
+    def _start(self, request: Dict, key: str, client: str, publish: bool = True) -> ScanJob:
+        """Create and queue a job (caller holds the lock); unpublished refreshes replace the old job when done."""
+        job = ScanJob(request, key)
+        self._jobs[job.id] = job
+        if publish:
+            self._by_key[key] = job.id
+        self._evict()
+        tasks, filters = plan_scan(request)
+        job.total = len(tasks)
+        # Same day-truncated window as the UI, so identical requests share cache entries
+        start_date = search_start_date(request["days"])
+
+        def on_admit(ticket: ScanTicket) -> None:
+            job.ticket = ticket
+            if not self._closed:
+                self._executor.submit(self._run, job, ticket, tasks, filters, start_date)
+
+        job.ticket = self.scheduler.submit(client, len(tasks), on_admit)
+        return job
+
+    def stale_seconds(self, job: ScanJob) -> float:
+        """How far past the result TTL a finished job is (0 while fresh)."""
+        if job.finished_at is None:
+            return 0.0
+        return round(max(time.time() - job.finished_at - self.result_ttl, 0.0))
+
+    def status(self, job: ScanJob) -> Dict:
+        status = {**job.to_status(), "stale_seconds": self.stale_seconds(job)}
+        if job.status == "queued" and job.ticket is not None:
+            queue = self.scheduler.queue_status(job.ticket)
+            status["queue_position"] = queue["position"]
+            status["estimated_wait"] = queue["estimated_wait"]
+        return status
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs beyond `max_jobs` (caller holds the lock)."""
+        finished = sorted((j for j in self._jobs.values() if j.finished_at), key=lambda j: j.finished_at)
+        for job in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+    def _run(self, job: ScanJob, ticket: ScanTicket, tasks: List[Tuple[str, str, str]], filters: Dict, start_date: str) -> None:
+        request = job.request
+        job.status = "running"
+
+        def on_task(done: int, _result: Dict) -> None:
+            job.done = done
+            self.scheduler.task_done(ticket)
+
+        try:
+            with self.scheduler.owned(ticket):
+                scan = run_scan(
+                    tasks, start_date, self.api_key, request["results_per_keyword"], filters,
+                    corpus=self.corpus, budget=ScanBudget(request["max_seconds"]), on_task=on_task,
+                    harvest_searches=request["harvest_searches"],
+                )
+            rows = scan["rows"]
+            if request["collapse_duplicates"]:
+                rows = collapse_rows(rows)
+                rows.sort(key=lambda r: (r["Score Viralidad"], r["Vistas"]), reverse=True)
+            job.rows = rows
+            job.errors = scan["errors"]
+            job.pushdown = scan["pushdown"]
+            job.stopped = scan["stopped"]
+            # finished_at first: submit() reads it as soon as it sees "done"
+            with self._lock:
+                job.finished_at = time.time()
+                job.status = "done"
+                self._by_key[job.key] = job.id
+        except Exception as e:  # report it on the job; keep serving
+            with self._lock:
+                job.error = f"{type(e).__name__}: {e}"
+                job.finished_at = time.time()
+                job.status = "failed"
+        finally:
+            self.scheduler.finish(ticket)
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def results(self, job: ScanJob, page: int = 1, page_size: int = 50, sort: str = "", descending: bool = True) -> Dict:
+        """One page of a finished scan's rows, optionally re-sorted by a column."""
+        page = max(page, 1)
+        page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+        rows = job.rows
+        if sort:
+            if rows and sort not in rows[0]:
+                raise ScanRequestError(f"Columna de orden desconocida: {sort!r}")
+            rows = sorted(rows, key=lambda r: r[sort], reverse=descending)
+        start = (page - 1) * page_size
+        return {
+            "id": job.id,
+            "status": job.status,
+            "stale_seconds": self.stale_seconds(job),
+            "page": page,
+            "page_size": page_size,
+            "total": len(rows),
+            "pages": max(1, -(-len(rows) // page_size)),
+            "rows": rows[start:start + page_size],
+        }
+
+    def shutdown(self) -> None:
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ================== HTTP ==================
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    """Routes the JSON endpoints to a `ScanService` (set on the server)."""
+
+    server_version = "ShortsFinderService/1.0"
+
+    @property
+    def service(self) -> ScanService:
+        return self.server.service
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", "scheduler": self.service.scheduler.usage()})
+        if parts == ["catalog"]:
+            return self._send_json(200, {
+                "categories": {name: len(kws) for name, kws in NICHE_KEYWORDS.items()},
+                "regions": REGION_NAMES,
+                "defaults": REQUEST_DEFAULTS,
+            })
+        if len(parts) in (2, 3) and parts[0] == "scans":
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": f"Búsqueda no encontrada: {parts[1]}"})
+            if len(parts) == 2:
+                return self._send_json(200, self.service.status(job))
+            if parts[2] == "results":
+                if job.status != "done":
+                    return self._send_json(409, {"error": "La búsqueda aún no terminó", **self.service.status(job)})
+                try:
+                    return self._send_json(200, self.service.results(
+                        job,
+                        page=int(query.get("page", 1)),
+                        page_size=int(query.get("page_size", 50)),
+                        sort=query.get("sort", ""),
+                        descending=query.get("order", "desc") != "asc",
+                    ))
+                except ValueError as e:
+                    return self._send_json(400, {"error": str(e)})
+        self._send_json(404, {"error": "Ruta desconocida"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.rstrip("/") != "/scans":
+            return self._send_json(404, {"error": "Ruta desconocida"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job, reused = self.service.submit(body, client=self.client_address[0])
+        except ValueError as e:  # bad JSON or ScanRequestError
+            return self._send_json(400, {"error": str(e)})
+        status = 200 if reused and job.status == "done" else 202
+        self._send_json(status, {**self.service.status(job), "reused": reused})
+
+    def log_message(self, format: str, *args) -> None:
+        if os.environ.get("SERVICE_ACCESS_LOG") == "1":
+            super().log_message(format, *args)
+
+
+def make_server(service: ScanService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """Threaded HTTP server (one lightweight thread per connection) bound to `service`."""
+    server = ThreadingHTTPServer((host, port), ScanRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the scan engine as a JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="scans run at the same time")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"))
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error("YouTube API key required (--api-key or YOUTUBE_API_KEY)")
+
+    service = ScanService(args.api_key, workers=args.workers, corpus=CorpusIndex(), usage_log=UsageLog())
+    server = make_server(service, args.host, args.port)
+    print(f"Sirviendo en http://{args.host}:{server.server_address[1]} ({args.workers} búsquedas en paralelo)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Local thumbnail cache for lightweight table previews.
+
+Fetches the small `default`/`medium` YouTube thumbnail variants in parallel
+into a bounded on-disk cache and serves them back as inline data URIs, so
+the browser never downloads the full-size images for the results table.
+"""
+
+import base64
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+
+from paths import CACHE_DIR
+
+# ================== CONSTANTS ==================
+
+THUMBNAIL_URL = "https://i.ytimg.com/vi/{video_id}/{file}"
+
+# default = 120×90, medium = 320×180
+THUMBNAIL_VARIANTS = {
+    "default": "default.jpg",
+    "medium": "mqdefault.jpg",
+}
+
+DEFAULT_CACHE_DIR = os.path.join(CACHE_DIR, "thumbnails")
+
+# A partial write older than this was left by a crashed process, not one in progress
+ORPHAN_TMP_SECONDS = 60
+
+# transport(url, timeout) -> image bytes, or None when unavailable
+Transport = Callable[[str, float], Optional[bytes]]
+
+
+def http_transport(url: str, timeout: float) -> Optional[bytes]:
+    """Default transport: plain HTTP GET."""
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    except requests.exceptions.RequestException:
+        return None
+
+
+def thumbnail_url(video_id: str, variant: str = "default") -> str:
+    """Public URL of a small thumbnail variant."""
+    return THUMBNAIL_URL.format(video_id=video_id, file=THUMBNAIL_VARIANTS[variant])
+
+# ================== CACHE ==================
+
+class ThumbnailCache:
+    """Bounded on-disk cache of small thumbnails, evicted least-recently-used first."""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = 50 * 1024 * 1024,
+        transport: Optional[Transport] = None,
+        max_workers: int = 8,
+        timeout: float = 5.0,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.transport = transport or http_transport
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.remove_orphans()
+
+    def _path(self, video_id: str, variant: str) -> str:
+        safe_id = "".join(c for c in video_id if c.isalnum() or c in "-_")
+        return os.path.join(self.cache_dir, f"{safe_id}_{variant}.jpg")
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+            os.utime(path)  # mark as recently used
+            return data
+        except OSError:
+            return None
+
+    def _fetch(self, video_id: str, variant: str) -> Optional[bytes]:
+        data = self.transport(thumbnail_url(video_id, variant), self.timeout)
+        if not data:
+            return None
+        path = self._path(video_id, variant)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return data
+
+    def get_many(self, video_ids: Iterable[str], variant: str = "default") -> Dict[str, bytes]:
+        """Return thumbnail bytes for each video, fetching misses in parallel."""
+        found: Dict[str, bytes] = {}
+        missing = []
+        for video_id in dict.fromkeys(v for v in video_ids if v):
+            data = self._read(self._path(video_id, variant))
+            if data is None:
+                missing.append(video_id)
+            else:
+                found[video_id] = data
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                for video_id, data in zip(missing, pool.map(lambda v: self._fetch(v, variant), missing)):
+                    if data:
+                        found[video_id] = data
+            self.evict()
+
+        return found
+
+    def preview_uris(self, video_ids: Iterable[str], variant: str = "default") -> Dict[str, str]:
+        """Return inline `data:` URIs for each video's cached thumbnail."""
+        return {
+            video_id: "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+            for video_id, data in self.get_many(video_ids, variant).items()
+        }
+
+    def evict(self) -> int:
+        """Delete least-recently-used files until under the byte budget."""
+        with self._lock:
+            entries = []
+            total = 0
+            removed = 0
+            for entry in os.scandir(self.cache_dir):
+                # In-progress writes are renamed into place without the lock; skip them
+                if not entry.name.endswith(".jpg"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass  # another process evicted it first
+                except OSError:
+                    continue
+                total -= size
+            return removed
+
+    def remove_orphans(self) -> int:
+        """Delete partial writes older than `ORPHAN_TMP_SECONDS`, left by crashed processes."""
+        orphaned_before = time.time() - ORPHAN_TMP_SECONDS
+        removed = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".tmp"):
+                continue
+            try:
+                if entry.stat().st_mtime < orphaned_before:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # renamed into place or removed meanwhile
+        return removed
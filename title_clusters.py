@@ -0,0 +1,232 @@
+"""
+Hook-pattern clustering of video titles for the Ideas tab.
+
+Titles become sparse TF-IDF vectors over words, word pairs and their
+opening words, and are grouped with mini-batch spherical k-means written
+in plain numpy, so 100k+ titles cluster in a few seconds on a laptop.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corpus_index import STOPWORDS
+from dedup import normalize_text
+
+MAX_FEATURES = 20_000
+MAX_CLUSTERS = 30
+BATCH_SIZE = 2048
+DOT_CHUNK_ROWS = 8192
+
+# ================== TF-IDF ==================
+
+def title_terms(title: str) -> List[str]:
+    """Features of one title: content words, word pairs and its opening ("^...")."""
+    words = normalize_text(title).split()
+    terms = [w for w in words if w not in STOPWORDS and len(w) > 1]
+    terms += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if words and words[0] not in STOPWORDS:
+        terms.append("^" + words[0])
+    if len(words) > 1:
+        terms.append("^" + " ".join(words[:2]))
+    return terms
+
+
+class SparseRows:
+    """Row-compressed (CSR) matrix with just what TF-IDF vectors and k-means need."""
+
+    __slots__ = ("indptr", "indices", "data", "n_cols")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_cols = n_cols
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def _gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Flat positions of the non-zeros of `rows`, their row number in `rows`, and row lengths."""
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + offsets, row_of, lengths
+
+    def dot(self, dense: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Products of the given rows with each row of `dense` (k × n_cols) -> len(rows) × k."""
+        if rows is None:
+            rows = np.arange(len(self))
+        out = np.zeros((len(rows), dense.shape[0]), dtype=np.float32)
+        for start in range(0, len(rows), DOT_CHUNK_ROWS):
+            chunk = rows[start:start + DOT_CHUNK_ROWS]
+            flat, _, lengths = self._gather(chunk)
+            if not len(flat):
+                continue
+            contrib = self.data[flat, None] * dense.T[self.indices[flat]]
+            filled = lengths > 0
+            segment_starts = (np.cumsum(lengths) - lengths)[filled]
+            out[start + np.flatnonzero(filled)] = np.add.reduceat(contrib, segment_starts, axis=0)
+        return out
+
+    def add_rows_to(self, sums: np.ndarray, rows: np.ndarray, labels: np.ndarray) -> None:
+        """Add each row into `sums[label]` (dense k × n_cols)."""
+        flat, row_of, _ = self._gather(rows)
+        np.add.at(sums, (labels[row_of], self.indices[flat]), self.data[flat])
+
+
+def tfidf_vectors(titles: Sequence[str], max_features: int = MAX_FEATURES) -> Tuple[SparseRows, List[str]]:
+    """L2-normalized TF-IDF vectors of the titles, plus the feature names."""
+    docs = [Counter(title_terms(t)) for t in titles]
+    n_docs = len(docs)
+    doc_freq = Counter()
+    for doc in docs:
+        doc_freq.update(doc.keys())
+
+    # Terms seen once say nothing recurring; terms in most titles separate nothing
+    min_df = 2 if n_docs >= 50 else 1
+    max_df = max(0.5 * n_docs, min_df)
+    kept = [t for t, df in doc_freq.items() if min_df <= df <= max_df]
+    kept.sort(key=lambda t: -doc_freq[t])
+    vocabulary = kept[:max_features]
+    term_ids = {t: i for i, t in enumerate(vocabulary)}
+    idf = np.array([math.log((1 + n_docs) / (1 + doc_freq[t])) + 1 for t in vocabulary], dtype=np.float32)
+
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[float] = []
+    for doc in docs:
+        for term, count in doc.items():
+            term_id = term_ids.get(term)
+            if term_id is not None:
+                indices.append(term_id)
+                counts.append(count)
+        indptr.append(len(indices))
+
+    indptr_arr = np.array(indptr, dtype=np.int64)
+    indices_arr = np.array(indices, dtype=np.int64)
+    data = np.array(counts, dtype=np.float32) * idf[indices_arr] if indices else np.zeros(0, dtype=np.float32)
+    lengths = np.diff(indptr_arr)
+    norms = np.sqrt(np.add.reduceat(data ** 2, indptr_arr[:-1][lengths > 0])) if len(data) else np.zeros(0)
+    data /= np.repeat(norms, lengths[lengths > 0]).astype(np.float32)
+    return SparseRows(indptr_arr, indices_arr, data, len(vocabulary)), vocabulary
+
+# ================== MINI-BATCH K-MEANS ==================
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _init_centroids(X: SparseRows, candidates: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding on a sample of rows (cosine distance)."""
+    sample = rng.choice(candidates, size=min(len(candidates), 20 * k), replace=False)
+    centroids = np.zeros((k, X.n_cols), dtype=np.float32)
+    chosen = [sample[rng.integers(len(sample))]]
+    X.add_rows_to(centroids, np.array(chosen), np.array([0]))
+    best_sim = X.dot(centroids[:1], sample)[:, 0]
+    for c in range(1, k):
+        distance = np.clip(1 - best_sim.astype(np.float64), 0, None)
+        if distance.sum() <= 0:
+            break
+        pick = sample[rng.choice(len(sample), p=distance / distance.sum())]
+        X.add_rows_to(centroids, np.array([pick]), np.array([c]))
+        best_sim = np.maximum(best_sim, X.dot(centroids[c:c + 1], sample)[:, 0])
+    return centroids
+
+
+def minibatch_kmeans(
+    X: SparseRows,
+    k: int,
+    batch_size: int = BATCH_SIZE,
+    iterations: int = 60,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means with mini-batch updates (Sculley, 2010).
+
+    Each step assigns a random batch to its most similar centroid and moves
+    that centroid towards the batch mean with a per-centroid learning rate.
+    Returns (labels for every row, centroids); rows without features get -1.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = np.flatnonzero(np.diff(X.indptr) > 0)
+    labels = np.full(len(X), -1, dtype=np.int64)
+    if not len(candidates):
+        return labels, np.zeros((0, X.n_cols), dtype=np.float32)
+
+    k = min(k, len(candidates))
+    centroids = _init_centroids(X, candidates, k, rng)
+    seen = np.zeros(k, dtype=np.float64)
+    batch_size = min(batch_size, len(candidates))
+
+    for _ in range(iterations):
+        batch = rng.choice(candidates, size=batch_size, replace=False)
+        batch_labels = X.dot(centroids, batch).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        X.add_rows_to(sums, batch, batch_labels)
+        batch_counts = np.bincount(batch_labels, minlength=k).astype(np.float64)
+        moved = batch_counts > 0
+        seen[moved] += batch_counts[moved]
+        rate = (batch_counts[moved] / seen[moved])[:, None].astype(np.float32)
+        centroids[moved] = (1 - rate) * centroids[moved] + rate * (sums[moved] / batch_counts[moved, None])
+        centroids = _normalize_rows(centroids).astype(np.float32)
+
+    labels[candidates] = X.dot(centroids, candidates).argmax(axis=1)
+    return labels, centroids
+
+# ================== CLUSTERS ==================
+
+def default_cluster_count(n_titles: int) -> int:
+    """Roughly one cluster per few dozen titles, between 2 and MAX_CLUSTERS."""
+    return max(2, min(MAX_CLUSTERS, int(math.sqrt(n_titles / 2))))
+
+
+def _opening(title: str) -> str:
+    words = title.split()
+    return " ".join(words[:2]) + ("…" if len(words) > 2 else "")
+
+
+def cluster_titles(
+    titles: Sequence[str],
+    scores: Sequence[float],
+    k: Optional[int] = None,
+    examples: int = 3,
+    seed: int = 0,
+) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Group titles into recurring hook patterns.
+
+    Returns one summary per cluster — most common opening, top terms,
+    size, average score and best-scoring example titles — sorted by average
+    score, plus each title's cluster number (-1 when it has no features).
+    """
+    if not titles:
+        return [], np.zeros(0, dtype=np.int64)
+
+    X, vocabulary = tfidf_vectors(titles)
+    labels, centroids = minibatch_kmeans(X, k or default_cluster_count(len(titles)), seed=seed)
+    scores_arr = np.asarray(scores, dtype=np.float64)
+
+    clusters = []
+    for c in range(len(centroids)):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        top_terms = [vocabulary[i].lstrip("^") for i in np.argsort(-centroids[c])[:8] if centroids[c, i] > 0]
+        best = members[np.argsort(-scores_arr[members])[:examples]]
+        clusters.append({
+            "id": c,
+            "hook": Counter(_opening(titles[i]) for i in members).most_common(1)[0][0],
+            "terms": list(dict.fromkeys(top_terms))[:5],
+            "size": len(members),
+            "avg_score": round(float(scores_arr[members].mean()), 1),
+            "examples": [titles[i] for i in best],
+        })
+
+    clusters.sort(key=lambda c: (-c["avg_score"], -c["size"]))
+    return clusters, labels
@@ -0,0 +1,75 @@
+"""
+Append-only log of searches run from the UI.
+
+Feeds the cache pre-warmer: which (category, region, days) combinations are
+searched most, and at which hours.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from paths import CACHE_DIR
+
+DEFAULT_USAGE_LOG_PATH = os.path.join(CACHE_DIR, "usage_log.jsonl")
+
+# (category, region_code, days, results_per_keyword)
+Combination = Tuple[str, str, int, int]
+
+
+class UsageLog:
+    """JSON-lines search log shared by every session of the process."""
+
+    def __init__(self, path: str = DEFAULT_USAGE_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def log_search(self, category: str, region_codes: List[str], days: int, results_per_keyword: int) -> None:
+        """Record one search click (one event per searched region)."""
+        now = time.time()
+        lines = "".join(
+            json.dumps({
+                "ts": now,
+                "category": category,
+                "region": code,
+                "days": days,
+                "results_per_keyword": results_per_keyword,
+            }, ensure_ascii=False) + "\n"
+            for code in region_codes
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(lines)
+
+    def events(self, since_seconds: float = 14 * 86400, now: Optional[float] = None) -> List[Dict]:
+        """Events from the last `since_seconds`."""
+        if not os.path.exists(self.path):
+            return []
+        cutoff = (time.time() if now is None else now) - since_seconds
+        events = []
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get("ts", 0) >= cutoff:
+                    events.append(event)
+        return events
+
+    def top_combinations(self, n: int = 5, events: Optional[List[Dict]] = None) -> List[Tuple[Combination, int]]:
+        """Most-requested (category, region, days, results_per_keyword) combinations."""
+        events = self.events() if events is None else events
+        counts = Counter(
+            (e["category"], e["region"], int(e["days"]), int(e["results_per_keyword"])) for e in events
+        )
+        return counts.most_common(n)
+
+    def peak_hours(self, n: int = 3, events: Optional[List[Dict]] = None) -> List[int]:
+        """Busiest UTC hours of the day."""
+        events = self.events() if events is None else events
+        counts = Counter(time.gmtime(e["ts"]).tm_hour for e in events)
+        return [hour for hour, _ in counts.most_common(n)]
@@ -0,0 +1,132 @@
+"""
+Channel watchlist with velocity-based poll scheduling.
+
+Channels that keep going viral are polled through their uploads playlist
+(see `scanner.run_watchlist_task`); faster channels are polled more often.
+There is no background poller: channels that are due are polled when a
+scan runs in the app.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from paths import CACHE_DIR
+
+DEFAULT_WATCHLIST_PATH = os.path.join(CACHE_DIR, "watchlist.json")
+
+# (min views/day of the channel's best recent upload, seconds between polls)
+POLL_TIERS = [
+    (50_000, 1 * 3600),
+    (5_000, 6 * 3600),
+    (0, 24 * 3600),
+]
+# A channel whose poll failed is retried this soon, whatever its tier
+RETRY_SECONDS = 15 * 60
+
+_CHANNEL_ID_RE = re.compile(r"(UC[\w-]{22})")
+
+
+def parse_channel_id(text: str) -> Optional[str]:
+    """Extract a channel ID from an ID or a youtube.com/channel/... URL."""
+    match = _CHANNEL_ID_RE.search(text or "")
+    return match.group(1) if match else None
+
+
+def poll_interval(velocity: float) -> int:
+    """Seconds until the next poll for a channel with this views/day velocity."""
+    for min_velocity, interval in POLL_TIERS:
+        if velocity >= min_velocity:
+            return interval
+    return POLL_TIERS[-1][1]
+
+
+class Watchlist:
+    """JSON-file watchlist of channels, shared by every session of the process."""
+
+    def __init__(self, path: str = DEFAULT_WATCHLIST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._channels: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self._channels = json.load(fh)
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Per process: the app, the service and workers may save the same file at once
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self._channels, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def channels(self) -> List[Dict]:
+        """All watched channels, soonest poll first."""
+        with self._lock:
+            return sorted(({"id": k, **v} for k, v in self._channels.items()), key=lambda c: c["next_poll"])
+
+    def add(self, channel_id: str, title: str = "") -> bool:
+        """Watch a channel; returns False if it was already watched."""
+        with self._lock:
+            if channel_id in self._channels:
+                return False
+            self._channels[channel_id] = {
+                "title": title or channel_id,
+                "added_at": time.time(),
+                "last_polled": None,
+                "next_poll": 0.0,  # due right away
+                "velocity": 0.0,
+            }
+            self._save()
+            return True
+
+    def remove(self, channel_id: str) -> None:
+        """Stop watching a channel."""
+        with self._lock:
+            if self._channels.pop(channel_id, None) is not None:
+                self._save()
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Channel IDs whose next poll time has passed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [k for k, v in self._channels.items() if v["next_poll"] <= now]
+
+    def record_polls(
+        self,
+        channel_ids: List[str],
+        velocity: Dict[str, float],
+        titles: Optional[Dict[str, str]] = None,
+        now: Optional[float] = None,
+        failed: Iterable[str] = (),
+    ) -> None:
+        """
+        Store poll results and schedule each channel's next poll by its velocity.
+
+        Channels without new uploads keep their previous velocity (no data is
+        not a slowdown); `failed` channels keep theirs and are retried after
+        `RETRY_SECONDS`.
+        """
+        now = time.time() if now is None else now
+        failed = set(failed)
+        with self._lock:
+            for channel_id in channel_ids:
+                entry = self._channels.get(channel_id)
+                if entry is None:
+                    continue
+                if channel_id in failed:
+                    entry["next_poll"] = now + RETRY_SECONDS
+                    continue
+                if channel_id in velocity:
+                    entry["velocity"] = round(velocity[channel_id], 1)
+                if titles and titles.get(channel_id):
+                    entry["title"] = titles[channel_id]
+                entry["last_polled"] = now
+                entry["next_poll"] = now + poll_interval(entry["velocity"])
+            self._save()
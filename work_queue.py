@@ -0,0 +1,191 @@
+"""
+Durable SQLite work queue for multi-process sweeps on one host.
+
+A scan is split into keyword × region tasks. Workers lease a task, run it
+through the scan engine and write its rows back. Leases expire, so a task
+held by a crashed worker goes back to the pool and is retried up to
+`max_attempts` times. Tasks whose result carries an `error` (search or
+detail fetches) are failed and retried too.
+
+WAL mode relies on shared memory, so the database must sit on a local disk
+and every worker must run on the same host; network filesystems are not
+supported.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from paths import CACHE_DIR
+
+DEFAULT_QUEUE_PATH = os.environ.get(
+    "SWEEP_QUEUE_DB",
+    os.path.join(CACHE_DIR, "sweep_queue.db"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id TEXT NOT NULL REFERENCES scans(id),
+    keyword TEXT NOT NULL,
+    region_name TEXT NOT NULL,
+    region_code TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_scan ON tasks(scan_id, status);
+"""
+
+
+class WorkQueue:
+    """SQLite-backed task queue shared by every worker pointing at the same file."""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ================== PRODUCER ==================
+
+    def create_scan(self, params: Dict, tasks: Iterable[Tuple[str, str, str]]) -> str:
+        """Store a scan and its (keyword, region_name, region_code) tasks; returns the scan ID."""
+        scan_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO scans (id, params, created_at) VALUES (?, ?, ?)",
+                (scan_id, json.dumps(params), time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO tasks (scan_id, keyword, region_name, region_code) VALUES (?, ?, ?, ?)",
+                [(scan_id, kw, name, code) for kw, name, code in tasks],
+            )
+            conn.execute("COMMIT")
+        return scan_id
+
+    def cancel(self, scan_id: str) -> int:
+        """Drop a scan's tasks that no worker is running; leased tasks still finish."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'cancelled', lease_owner = NULL, lease_expires = NULL "
+                "WHERE scan_id = ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))",
+                (scan_id, time.time()),
+            )
+        return cursor.rowcount
+
+    def scan_params(self, scan_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT params FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        return json.loads(row["params"]) if row else None
+
+    # ================== WORKER ==================
+
+    def lease(self, worker_id: str, lease_seconds: float = 120, scan_id: Optional[str] = None) -> Optional[Dict]:
+        """Atomically lease the next pending (or lease-expired) task."""
+        now = time.time()
+        scan_filter = "AND scan_id = ?" if scan_id else ""
+        args = (now, scan_id) if scan_id else (now,)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Tasks whose lease ran out too many times are given up on
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                f"{scan_filter} ORDER BY id LIMIT 1",
+                args,
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        task = dict(row)
+        task.update(status="leased", lease_owner=worker_id, lease_expires=now + lease_seconds, attempts=row["attempts"] + 1)
+        return task
+
+    def complete(self, task_id: int, worker_id: str, result: Dict) -> bool:
+        """Store a task's result; False if the lease was lost to another worker."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = ?, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result), result.get("error"), task_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> None:
+        """Release a failed task for retry, or mark it failed after `max_attempts`."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (self.max_attempts, error, task_id, worker_id),
+            )
+
+    # ================== CONSUMER ==================
+
+    def progress(self, scan_id: str) -> Dict[str, int]:
+        """Task counts by status for one scan."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0, "cancelled": 0}
+        with self._connect() as conn:
+            for row in conn.execute(
+                "SELECT status, COUNT(*) AS n FROM tasks WHERE scan_id = ? GROUP BY status", (scan_id,)
+            ):
+                counts[row["status"]] = row["n"]
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def results(self, scan_id: str) -> List[Dict]:
+        """Results of every finished task of a scan, from all workers."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM tasks WHERE scan_id = ? AND status = 'done' ORDER BY id", (scan_id,)
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def errors(self, scan_id: str) -> List[str]:
+        """Error messages of failed tasks of a scan."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT keyword, region_name, error FROM tasks WHERE scan_id = ? AND status = 'failed'", (scan_id,)
+            ).fetchall()
+        return [f"Error en '{row['keyword']}' ({row['region_name']}): {row['error']}" for row in rows]
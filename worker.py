@@ -0,0 +1,112 @@
+"""
+Sweep worker: leases tasks from the shared work queue and runs them.
+
+Start as many as you like on the machine that holds the queue file
+(SWEEP_QUEUE_DB, on a local disk). The SQLite queue is single-host only:
+workers on other machines cannot share it over a network filesystem.
+
+    YOUTUBE_API_KEY=... python worker.py
+"""
+
+import argparse
+import os
+import socket
+import time
+import uuid
+from typing import Callable, Optional
+
+from corpus_index import CorpusIndex
+from scanner import run_search_task
+from work_queue import DEFAULT_QUEUE_PATH, WorkQueue
+
+
+def new_worker_id() -> str:
+    """Unique, human-readable worker ID."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def run_one_task(
+    queue: WorkQueue,
+    worker_id: str,
+    api_key: str,
+    scan_id: Optional[str] = None,
+    lease_seconds: float = 120,
+    corpus: Optional[CorpusIndex] = None,
+) -> Optional[dict]:
+    """Lease and run a single task; returns the task, or None when nothing is available."""
+    task = queue.lease(worker_id, lease_seconds, scan_id=scan_id)
+    if task is None:
+        return None
+
+    params = queue.scan_params(task["scan_id"])
+    try:
+        result = run_search_task(
+            task["keyword"], task["region_name"], task["region_code"], params["start_date"], api_key,
+            params["results_per_keyword"], params["filters"], corpus=corpus,
+            harvest_searches=params.get("harvest_searches", 0),
+        )
+    except Exception as e:  # keep the worker alive; the task is retried
+        queue.fail(task["id"], worker_id, f"{type(e).__name__}: {e}")
+        return task
+
+    if result["error"]:
+        queue.fail(task["id"], worker_id, result["error"])
+    else:
+        queue.complete(task["id"], worker_id, result)
+    return task
+
+
+def run_worker(
+    queue: WorkQueue,
+    api_key: str,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 120,
+    idle_sleep: float = 2.0,
+    exit_when_idle: bool = False,
+    on_task: Optional[Callable[[dict], None]] = None,
+    corpus: Optional[CorpusIndex] = None,
+) -> int:
+    """Process tasks until interrupted (or until idle); returns the number of tasks run."""
+    worker_id = worker_id or new_worker_id()
+    processed = 0
+    while True:
+        task = run_one_task(queue, worker_id, api_key, lease_seconds=lease_seconds, corpus=corpus)
+        if task is None:
+            if exit_when_idle:
+                return processed
+            time.sleep(idle_sleep)
+            continue
+        processed += 1
+        if on_task:
+            on_task(task)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run sweep tasks from the shared work queue.")
+    parser.add_argument("--db", default=DEFAULT_QUEUE_PATH, help="Path to the queue database")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"), help="YouTube API key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--lease", type=float, default=120, help="Lease duration in seconds")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts before a task is marked failed")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or YOUTUBE_API_KEY)")
+
+    queue = WorkQueue(args.db, max_attempts=args.max_attempts)
+    worker_id = new_worker_id()
+    print(f"Worker {worker_id} using {args.db}")
+    try:
+        count = run_worker(
+            queue, args.api_key, worker_id, args.lease,
+            exit_when_idle=args.exit_when_idle,
+            corpus=CorpusIndex(),
+            on_task=lambda t: print(f"  {t['keyword']} / {t['region_code']} (intento {t['attempts']})"),
+        )
+        print(f"Done: {count} tasks")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()